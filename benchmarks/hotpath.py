@@ -0,0 +1,205 @@
+""" Throughput and latency of logging calls, per logger configuration.
+
+Each case configures a logger with init_logger (or get_logger), then times
+logging calls through it: throughput from a timed batch of calls, and latency
+percentiles from individually timed calls. Results may be saved as JSON, and
+compared with results saved earlier. The logmuse measured is whichever is
+importable, so install the version of interest, or set PYTHONPATH to a source
+tree, to compare versions.
+
+    python benchmarks/hotpath.py -o results.json
+    python benchmarks/hotpath.py --compare results.json
+
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+import logmuse
+from logmuse import init_logger
+from logmuse.est import TRACE_LEVEL_VALUE, get_logger
+
+DEFAULT_CALLS = 20000
+LATENCY_SAMPLES = 2000
+PERCENTILES = (50, 90, 99)
+
+
+def _to_devnull(log):
+    """ Point a logger's stream handlers at the null device. """
+    devnull = open(os.devnull, "w")
+    for h in log.handlers:
+        if isinstance(h, logging.StreamHandler) and \
+                not isinstance(h, logging.FileHandler):
+            h.setStream(devnull)
+    return devnull
+
+
+def _streaming(**kwargs):
+    def setup(folder):
+        log = init_logger(name="bench", **kwargs)
+        devnull = _to_devnull(log)
+        return (lambda i: log.info("message %d", i)), devnull.close
+    return setup
+
+
+def _filing(**kwargs):
+    def setup(folder):
+        log = init_logger(name="bench", logfile=os.path.join(folder, "bench.log"),
+                          **kwargs)
+        return (lambda i: log.info("message %d", i)), \
+            (lambda: [h.close() for h in log.handlers])
+    return setup
+
+
+def _silent(folder):
+    log = init_logger(name="bench", silent=True)
+    return (lambda i: log.info("message %d", i)), None
+
+
+def _filtered(folder):
+    log = init_logger(name="bench", verbosity=3)
+    return (lambda i: log.debug("message %d", i)), None
+
+
+def _whispering(level):
+    def setup(folder):
+        init_logger(name="bench", level=level)
+        log = get_logger("bench")
+        devnull = _to_devnull(log)
+        return (lambda i: log.whisper("message %d", i)), devnull.close
+    return setup
+
+
+CASES = OrderedDict([
+    ("silent", _silent),
+    ("filtered_level", _filtered),
+    ("stream", _streaming()),
+    ("stream_devmode", _streaming(devmode=True)),
+    ("stream_devmode_full_names", _streaming(devmode=True, use_full_names=True)),
+    ("file", _filing()),
+    ("file_full_names", _filing(use_full_names=True)),
+    ("file_buffered", _filing(sink="buffered")),
+    ("file_mmap", _filing(sink="mmap")),
+    ("whisper_disabled", _whispering(logging.INFO)),
+    ("whisper_enabled", _whispering(TRACE_LEVEL_VALUE)),
+])
+
+
+def run_case(setup, calls, samples=LATENCY_SAMPLES):
+    """
+    Time logging calls through one logger configuration.
+
+    :param function(str) -> (function(int) -> object, function()) setup:
+        function to configure the logger, given a scratch folder, returning
+        the logging call to time and a teardown function (or None)
+    :param int calls: number of calls to time as a batch
+    :param int samples: number of calls to time individually
+    :return dict: records per second, and per-call latency in nanoseconds
+    """
+    folder = tempfile.mkdtemp(prefix="logmuse-bench-")
+    try:
+        call, teardown = setup(folder)
+        try:
+            for i in range(min(calls, 1000)):
+                call(i)
+            start = time.perf_counter()
+            for i in range(calls):
+                call(i)
+            elapsed = time.perf_counter() - start
+            latencies = []
+            clock = time.perf_counter_ns
+            for i in range(samples):
+                t0 = clock()
+                call(i)
+                latencies.append(clock() - t0)
+        finally:
+            if teardown:
+                teardown()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    latencies.sort()
+    result = OrderedDict([
+        ("calls", calls),
+        ("records_per_second", calls / elapsed),
+        ("mean_ns", elapsed * 1e9 / calls),
+    ])
+    for p in PERCENTILES:
+        result["p{}_ns".format(p)] = \
+            latencies[min(len(latencies) - 1, len(latencies) * p // 100)]
+    return result
+
+
+def run(cases=None, calls=DEFAULT_CALLS):
+    """
+    Run benchmark cases.
+
+    :param Iterable[str] cases: names of cases to run; by default, all
+    :param int calls: number of calls to time as a batch, per case
+    :return dict: results by case, along with details of the environment
+    """
+    results = OrderedDict()
+    for name in cases or CASES:
+        results[name] = run_case(CASES[name], calls)
+    return OrderedDict([
+        ("logmuse_version", logmuse.__version__),
+        ("python", sys.version.split()[0]),
+        ("platform", platform.platform()),
+        ("time", time.strftime("%Y-%m-%dT%H:%M:%S")),
+        ("results", results),
+    ])
+
+
+def report(data, baseline=None):
+    """
+    Render results as text, comparing with a baseline if provided.
+
+    :param dict data: benchmark results, as from run
+    :param dict baseline: benchmark results with which to compare
+    :return str: table of results
+    """
+    header = "{:<28}{:>14}{:>10}{:>10}".format("case", "records/s", "mean ns",
+                                               "p99 ns")
+    if baseline:
+        header += "{:>10}".format("speedup")
+    lines = [header]
+    for name, res in data["results"].items():
+        line = "{:<28}{:>14,.0f}{:>10,.0f}{:>10,}".format(
+            name, res["records_per_second"], res["mean_ns"], res["p99_ns"])
+        base = (baseline or {}).get("results", {}).get(name)
+        if base:
+            line += "{:>9.2f}x".format(
+                res["records_per_second"] / base["records_per_second"])
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--calls", type=int, default=DEFAULT_CALLS,
+                        help="Number of logging calls to time per case.")
+    parser.add_argument("-c", "--case", action="append", choices=list(CASES),
+                        help="Case to run; may be repeated. Default: all.")
+    parser.add_argument("-o", "--output", help="Path to which to save results.")
+    parser.add_argument("--compare", help="Path to results to compare with.")
+    opts = parser.parse_args(args)
+    data = run(opts.case, opts.calls)
+    baseline = None
+    if opts.compare:
+        with open(opts.compare) as f:
+            baseline = json.load(f)
+    print(report(data, baseline))
+    if opts.output:
+        with open(opts.output, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+""" Throughput of logging calls made from many threads at once, by thread count.
+
+Each case configures a logger with init_logger, then has a number of threads
+each make a batch of logging calls through it, all released at once, for
+each of a series of thread counts. Total records per second are reported, so
+a configuration whose throughput holds up as threads are added doesn't make
+logging a point at which the threads wait on one another. Results may be
+saved as JSON.
+
+    python benchmarks/threads.py -t 1 -t 8 -t 64
+    python benchmarks/threads.py -o results.json
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import logmuse
+from logmuse import init_logger
+
+DEFAULT_CALLS = 5000
+DEFAULT_THREADS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def _filing(**kwargs):
+    def setup(folder):
+        return init_logger(name="bench-threads",
+                           logfile=os.path.join(folder, "bench.log"), **kwargs)
+    return setup
+
+
+CASES = OrderedDict([
+    ("file", _filing()),
+    ("file_async", _filing(async_mode=True)),
+])
+
+
+def run_case(setup, threads, calls):
+    """
+    Time logging calls made by several threads at once.
+
+    :param function(str) -> logging.Logger setup: function to configure the
+        logger, given a scratch folder
+    :param int threads: number of threads logging
+    :param int calls: number of logging calls per thread
+    :return dict: records per second, over all threads, up to the point at
+        which everything logged has been written
+    """
+    folder = tempfile.mkdtemp(prefix="logmuse-bench-")
+    try:
+        log = setup(folder)
+        barrier = threading.Barrier(threads + 1)
+
+        def work():
+            barrier.wait()
+            for i in range(calls):
+                log.info("message %d", i)
+
+        workers = [threading.Thread(target=work) for _ in range(threads)]
+        for w in workers:
+            w.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for w in workers:
+            w.join()
+        for h in log.handlers:
+            h.flush()
+        elapsed = time.perf_counter() - start
+        for h in log.handlers:
+            h.close()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    return OrderedDict([
+        ("threads", threads),
+        ("calls", threads * calls),
+        ("records_per_second", threads * calls / elapsed),
+    ])
+
+
+def run(cases=None, threads=DEFAULT_THREADS, calls=DEFAULT_CALLS):
+    """
+    Run benchmark cases, at each thread count.
+
+    :param Iterable[str] cases: names of cases to run; by default, all
+    :param Iterable[int] threads: numbers of threads with which to run each
+    :param int calls: number of logging calls per thread
+    :return dict: results by case and thread count, along with details of
+        the environment
+    """
+    results = OrderedDict()
+    for name in cases or CASES:
+        results[name] = [run_case(CASES[name], n, calls) for n in threads]
+    return OrderedDict([
+        ("logmuse_version", logmuse.__version__),
+        ("python", sys.version.split()[0]),
+        ("platform", platform.platform()),
+        ("time", time.strftime("%Y-%m-%dT%H:%M:%S")),
+        ("results", results),
+    ])
+
+
+def report(data):
+    """
+    Render results as text: records per second, by case and thread count.
+
+    :param dict data: benchmark results, as from run
+    :return str: table of results
+    """
+    results = data["results"]
+    counts = [r["threads"] for r in next(iter(results.values()))]
+    lines = ["{:<24}".format("case / threads") +
+             "".join("{:>11}".format(n) for n in counts)]
+    for name, rows in results.items():
+        lines.append("{:<24}".format(name) + "".join(
+            "{:>11,.0f}".format(r["records_per_second"]) for r in rows))
+    return "\n".join(lines)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--calls", type=int, default=DEFAULT_CALLS,
+                        help="Number of logging calls per thread.")
+    parser.add_argument("-t", "--threads", type=int, action="append",
+                        help="Number of threads; may be repeated. Default: "
+                             "{}.".format(", ".join(map(str, DEFAULT_THREADS))))
+    parser.add_argument("-c", "--case", action="append", choices=list(CASES),
+                        help="Case to run; may be repeated. Default: all.")
+    parser.add_argument("-o", "--output", help="Path to which to save results.")
+    opts = parser.parse_args(args)
+    data = run(opts.case, opts.threads or DEFAULT_THREADS, opts.calls)
+    print(report(data))
+    if opts.output:
+        with open(opts.output, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,64 @@
-from .est import *
+"""
+Logging setup for command-line tools.
+
+Names are imported from the submodule providing each on first use, as are the
+submodules themselves, so that importing the package, e.g. at the top of a
+CLI's main module, costs little.
+
+"""
+
 from ._version import __version__
-from .est import LEVEL_BY_VERBOSITY, DEV_LOGGING_FMT
+
+# Submodule providing each name available from the package.
+_SOURCES = {
+    "add_logging_options": "est",
+    "logger_via_cli": "est",
+    "init_logger": "est",
+    "setup_logger": "est",
+    "AbsentOptionException": "est",
+    "LOGGING_CLI_OPTDATA": "est",
+    "lazy_log": "est",
+    "LEVEL_BY_VERBOSITY": "est",
+    "DEV_LOGGING_FMT": "est",
+    "set_verbosity": "est",
+    "MuseLogger": "est",
+    "init_loggers": "config",
+    "context": "contextual",
+    "get_context": "contextual",
+    "with_context": "contextual",
+    "step_verbosity": "control",
+    "watch_control_file": "control",
+    "watch_signals": "control",
+    "async_logger_via_cli": "aio",
+    "init_async_logger": "aio",
+    "logger_flush": "aio",
+    "dump_flight_recorder": "handlers",
+    "profile_report": "metrics",
+    "stats": "metrics",
+    "init_worker_logger": "multiproc",
+    "worker_config": "multiproc",
+}
+
+__all__ = ["__version__"] + list(_SOURCES)
+
+
+def __getattr__(name):
+    from importlib import import_module
+
+    source = _SOURCES.get(name)
+    if source is not None:
+        value = getattr(import_module("." + source, __name__), name)
+        globals()[name] = value
+        return value
+    # A submodule, e.g. logmuse.est, is imported on first use, too.
+    if not name.startswith("__"):
+        try:
+            return import_module("." + name, __name__)
+        except ModuleNotFoundError as e:
+            if e.name != "{}.{}".format(__name__, name):
+                raise
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SOURCES))
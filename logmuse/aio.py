@@ -0,0 +1,87 @@
+"""
+Logging from asyncio applications, without blocking the event loop.
+
+A logger set up here is in async mode: a logging call only puts the record on
+a queue, and a listener thread does the formatting and writing. Setup, which
+opens files, and flushing, which waits for the queue to empty, are run in the
+loop's default executor, so both may be awaited.
+
+"""
+
+import asyncio
+import functools
+import logging
+from .est import (
+    OVERFLOW_DROP_OLDEST,
+    _init_logger_kwargs,
+    init_logger,
+)
+
+__all__ = ["async_logger_via_cli", "init_async_logger", "logger_flush"]
+
+
+async def init_async_logger(name="", **kwargs):
+    """
+    Establish and configure a logger whose logging calls don't write.
+
+    Unless a multiprocess collector is requested, this implies async mode,
+    with a default overflow policy of discarding the oldest queued record,
+    so that a full queue never holds up the event loop.
+
+    :param str name: name for the logger
+    :param kwargs: further arguments for init_logger
+    :return logging.Logger: configured Logger instance
+    """
+    if not kwargs.get("multiprocess"):
+        kwargs["async_mode"] = True
+        kwargs.setdefault("overflow", OVERFLOW_DROP_OLDEST)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, functools.partial(init_logger, name=name, **kwargs)
+    )
+
+
+async def async_logger_via_cli(opts, strict=True, **kwargs):
+    """
+    Establish a logger like init_async_logger, from parsed logging options.
+
+    :param argparse.Namespace opts: command-line options/arguments.
+    :param bool strict: whether to raise an exception
+    :param kwargs: arguments for init_logger, overriding the options
+    :return logging.Logger: configured logger instance.
+    :raise pararead.logs.AbsentOptionException: if one of the expected options
+        isn't available in the given Namespace, and strict is True
+    """
+    logs_cli_args = _init_logger_kwargs(opts, strict)
+    logs_cli_args.update(kwargs)
+    return await init_async_logger(**logs_cli_args)
+
+
+async def logger_flush(logger=None, close=False):
+    """
+    Wait, without blocking the event loop, until what's logged is written.
+
+    :param logging.Logger | str logger: logger, or name of logger, whose
+        handlers to flush; by default, those of every logger
+    :param bool close: whether to close the handlers, too, e.g. at shutdown
+    """
+    if logger is None:
+        loggers = [logging.getLogger()] + [
+            l
+            for l in list(logging.Logger.manager.loggerDict.values())
+            if isinstance(l, logging.Logger)
+        ]
+    elif isinstance(logger, logging.Logger):
+        loggers = [logger]
+    else:
+        loggers = [logging.getLogger(logger)]
+    handlers = [h for l in loggers for h in l.handlers]
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, _flush, handlers, close)
+
+
+def _flush(handlers, close):
+    for h in handlers:
+        h.flush()
+        if close:
+            h.close()
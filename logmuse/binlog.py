@@ -0,0 +1,363 @@
+"""
+Compact binary logfiles, to which records are written without being formatted.
+
+Each call site's message template, logger name, and source location are
+written once, the first time it logs, under an ID. A record is then just that
+ID, the time, level, thread, and process, and the message's arguments, packed
+straight into a memory-mapped file. Rendering records as text is left for
+later, with read_records or 'python -m logmuse.decode'.
+
+"""
+
+import logging
+import os
+import struct
+import time
+from .sinks import _MappedWriter, _claim_file, _release_file
+
+__all__ = ["BinaryLogHandler", "read_records"]
+
+
+MAGIC = b"LOGMUSE\x01"
+
+# Magic number, and time at which the file was started
+_HEADER = struct.Struct("<8sd")
+# Tag, template ID, and number of bytes of the definition that follows
+_TEMPLATE = struct.Struct("<cII")
+# Tag, template ID, time, level, thread, process, argument count, and flags
+_RECORD = struct.Struct("<cIdHQIBB")
+_LENGTH = struct.Struct("<I")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+
+_TEMPLATE_TAG = b"T"
+# The message is the template's, and the arguments follow.
+_RECORD_TAG = b"R"
+# The message follows, already merged with its arguments.
+_MESSAGE_TAG = b"M"
+
+# Flags for text following a record's arguments
+_HAS_EXC_TEXT = 1
+_HAS_STACK_INFO = 2
+_HAS_CONTEXT = 4
+
+_ARG_INT = b"i"
+_ARG_BIG_INT = b"I"
+_ARG_FLOAT = b"f"
+_ARG_STR = b"s"
+_ARG_BYTES = b"b"
+_ARG_NONE = b"n"
+_ARG_TRUE = b"t"
+_ARG_FALSE = b"F"
+
+_MIN_INT = -(2 ** 63)
+_MAX_INT = 2 ** 63 - 1
+# Arguments are counted in a byte.
+_MAX_ARGS = 255
+
+# Renders tracebacks of records logged with exception info.
+_EXC_FORMATTER = logging.Formatter()
+
+
+def _encode_arg(value):
+    """
+    Pack a value, tagged with its type.
+
+    :param object value: value to pack
+    :return bytes | NoneType: the packed value, or null if it's not of a type
+        that can be packed
+    """
+    kind = type(value)
+    if kind is str:
+        data = value.encode("utf-8", "surrogateescape")
+        return _ARG_STR + _LENGTH.pack(len(data)) + data
+    if kind is int:
+        if _MIN_INT <= value <= _MAX_INT:
+            return _ARG_INT + _INT.pack(value)
+        data = str(value).encode("ascii")
+        return _ARG_BIG_INT + _LENGTH.pack(len(data)) + data
+    if kind is float:
+        return _ARG_FLOAT + _FLOAT.pack(value)
+    if kind is bool:
+        return _ARG_TRUE if value else _ARG_FALSE
+    if value is None:
+        return _ARG_NONE
+    if kind is bytes:
+        return _ARG_BYTES + _LENGTH.pack(len(value)) + value
+    return None
+
+
+def _decode_args(data, pos, count):
+    """
+    Unpack a number of values packed by _encode_arg.
+
+    :param bytes data: the packed values
+    :param int pos: position in the data of the first value
+    :param int count: number of values to unpack
+    :return list, int: the values, and the position following the last
+    """
+    values = []
+    for _ in range(count):
+        tag = data[pos : pos + 1]
+        pos += 1
+        if tag == _ARG_INT:
+            values.append(_INT.unpack_from(data, pos)[0])
+            pos += _INT.size
+        elif tag == _ARG_FLOAT:
+            values.append(_FLOAT.unpack_from(data, pos)[0])
+            pos += _FLOAT.size
+        elif tag in (_ARG_STR, _ARG_BYTES, _ARG_BIG_INT):
+            size = _LENGTH.unpack_from(data, pos)[0]
+            pos += _LENGTH.size
+            raw = bytes(data[pos : pos + size])
+            pos += size
+            if tag == _ARG_STR:
+                values.append(raw.decode("utf-8", "surrogateescape"))
+            elif tag == _ARG_BIG_INT:
+                values.append(int(raw))
+            else:
+                values.append(raw)
+        elif tag == _ARG_NONE:
+            values.append(None)
+        elif tag in (_ARG_TRUE, _ARG_FALSE):
+            values.append(tag == _ARG_TRUE)
+        else:
+            raise ValueError(
+                "Invalid argument tag at byte {}: {}".format(pos - 1, tag)
+            )
+    return values, pos
+
+
+class BinaryLogHandler(logging.Handler):
+    """
+    Handler that writes records, unformatted, to a compact binary logfile.
+
+    A record's message template and arguments are kept apart when the
+    arguments are all strings, bytes, numbers, booleans, or None; otherwise,
+    the message is merged with its arguments as usual, and written whole.
+    Tracebacks and fields from logmuse.context are rendered as text. The
+    handler's formatter isn't used.
+    """
+
+    def __init__(self, filename, mode="w"):
+        """
+        Open and map the logfile.
+
+        :param str filename: path to the logfile
+        :param str mode: 'w' to start the file anew, 'a' to append to it
+        :raise ValueError: if the file's open for another handler
+        """
+        super(BinaryLogHandler, self).__init__()
+        self.baseFilename = os.path.abspath(filename)
+        self.mode = mode
+        self._key = _claim_file(self.baseFilename, self)
+        try:
+            self._writer = _MappedWriter(
+                self.baseFilename, mode, find_end=_end_of_records
+            )
+        except Exception:
+            _release_file(self._key, self)
+            raise
+        self._templates = {}
+        if self._writer.position == 0:
+            self._writer.write(_HEADER.pack(MAGIC, time.time()))
+
+    def emit(self, record):
+        """
+        Write a record.
+
+        :param logging.LogRecord record: the record to write
+        """
+        try:
+            args = record.args
+            pieces = None
+            if args and type(args) is tuple and isinstance(record.msg, str):
+                pieces = [_encode_arg(a) for a in args[:_MAX_ARGS]]
+                if len(args) > _MAX_ARGS or None in pieces:
+                    pieces = None
+            if pieces is None:
+                tag, msg = _MESSAGE_TAG, None
+                pieces = [_encode_arg(record.getMessage())]
+            else:
+                tag, msg = _RECORD_TAG, record.msg
+            key = (record.name, record.pathname, record.lineno, record.funcName, msg)
+            template_id = self._templates.get(key)
+            if template_id is None:
+                template_id = self._define_template(key)
+            count, flags = len(pieces), 0
+            if record.exc_info and not record.exc_text:
+                record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+            if record.exc_text:
+                flags |= _HAS_EXC_TEXT
+                pieces.append(_encode_arg(record.exc_text))
+            if record.stack_info:
+                flags |= _HAS_STACK_INFO
+                pieces.append(_encode_arg(record.stack_info))
+            context = str(getattr(record, "context", "") or "")
+            if context:
+                flags |= _HAS_CONTEXT
+                pieces.append(_encode_arg(context))
+            writer = self._writer
+            pos = writer.reserve(_RECORD.size + sum(map(len, pieces)))
+            _RECORD.pack_into(
+                writer.map,
+                pos,
+                tag,
+                template_id,
+                record.created,
+                record.levelno,
+                record.thread or 0,
+                record.process or 0,
+                count,
+                flags,
+            )
+            pos += _RECORD.size
+            for piece in pieces:
+                end = pos + len(piece)
+                writer.map[pos:end] = piece
+                pos = end
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """ Write changes through to the logfile. """
+        with self.lock:
+            self._writer.flush()
+
+    def close(self):
+        """ Cut the logfile to the size of what's been written, and close it. """
+        with self.lock:
+            try:
+                self._writer.close()
+            finally:
+                _release_file(self._key, self)
+        super(BinaryLogHandler, self).close()
+
+    def _define_template(self, key):
+        name, pathname, lineno, func, msg = key
+        definition = b"".join(
+            _encode_arg(v) for v in (name, pathname, lineno, func, msg or "")
+        )
+        template_id = len(self._templates)
+        self._writer.write(
+            _TEMPLATE.pack(_TEMPLATE_TAG, template_id, len(definition)) + definition
+        )
+        self._templates[key] = template_id
+        return template_id
+
+
+def read_records(path):
+    """
+    Read the records in a binary logfile.
+
+    Reading stops at the end of what was written, even if the file wasn't
+    closed properly, e.g. by a process that was killed.
+
+    :param str path: path to the logfile
+    :return Iterable[logging.LogRecord]: the records, in the order logged,
+        ready to be formatted
+    :raise ValueError: if the file isn't a binary logfile
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not a binary logfile: {}".format(path))
+    start = _HEADER.unpack_from(data, 0)[1]
+    templates = {}
+    for tag, fields, _ in _entries(data):
+        if tag == _TEMPLATE_TAG:
+            template_id, definition = fields
+            templates[template_id] = definition
+            continue
+        template_id, created, levelno, thread, process, args, extras = fields
+        exc_text, stack_info, context = extras
+        name, pathname, lineno, func, msg = templates[template_id]
+        if tag == _MESSAGE_TAG:
+            msg, args = args[0], None
+        filename = os.path.basename(pathname)
+        yield logging.makeLogRecord(
+            {
+                "name": name,
+                "msg": msg,
+                "args": tuple(args) if args else None,
+                "levelno": levelno,
+                "levelname": logging.getLevelName(levelno),
+                "pathname": pathname,
+                "filename": filename,
+                "module": os.path.splitext(filename)[0],
+                "lineno": lineno,
+                "funcName": func,
+                "created": created,
+                "msecs": (created - int(created)) * 1000,
+                "relativeCreated": (created - start) * 1000,
+                "thread": thread,
+                "process": process,
+                "exc_text": exc_text,
+                "stack_info": stack_info,
+                "context": context or "",
+            }
+        )
+
+
+def _entries(data):
+    """
+    Walk the templates and records of a binary logfile.
+
+    :param bytes data: the logfile's content, header and all
+    :return Iterable[(bytes, tuple, int)]: each entry's tag, its fields, and
+        the position following it
+    """
+    pos = _HEADER.size
+    while pos < len(data):
+        tag = data[pos : pos + 1]
+        if tag == _TEMPLATE_TAG:
+            _, template_id, size = _TEMPLATE.unpack_from(data, pos)
+            pos += _TEMPLATE.size
+            entry = template_id, _decode_args(data, pos, 5)[0]
+            pos += size
+        elif tag in (_RECORD_TAG, _MESSAGE_TAG):
+            fields = _RECORD.unpack_from(data, pos)
+            _, template_id, created, levelno, thread, process, count, flags = fields
+            args, pos = _decode_args(data, pos + _RECORD.size, count)
+            extras = []
+            for flag in (_HAS_EXC_TEXT, _HAS_STACK_INFO, _HAS_CONTEXT):
+                if flags & flag:
+                    (text,), pos = _decode_args(data, pos, 1)
+                    extras.append(text)
+                else:
+                    extras.append(None)
+            entry = template_id, created, levelno, thread, process, args, extras
+        else:
+            # The zeros beyond the end of what was written
+            break
+        if pos > len(data):
+            # An entry cut short
+            break
+        yield tag, entry, pos
+
+
+def _end_of_records(f):
+    """
+    Find the end of the last whole entry in a binary logfile.
+
+    What follows it, the zeros of a file that wasn't closed and perhaps the
+    start of an entry cut short, is to be written over.
+
+    :param io.BufferedRandom f: the open logfile
+    :return int: offset following the last whole entry, or 0 if the file's
+        empty
+    :raise ValueError: if the file isn't a binary logfile
+    """
+    f.seek(0)
+    data = f.read()
+    if not data.strip(b"\0"):
+        return 0
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not a binary logfile: {}".format(f.name))
+    end = _HEADER.size
+    try:
+        for _, _, end in _entries(data):
+            pass
+    except (struct.error, ValueError):
+        pass
+    return end
@@ -0,0 +1,187 @@
+"""
+Configuration of a tree of loggers at once, from a dict or a file.
+
+A spec maps logger names to init_logger options, with defaults for all:
+
+    defaults:
+      logfile: run.log
+    loggers:
+      mypkg:
+        level: INFO
+      mypkg.io:
+        level: DEBUG
+        stream: ERR
+
+A logger inherits the options of each configured ancestor, nearest last, and
+every logger that writes to a destination (a logfile or a stream) with the
+same options shares one handler for it.
+
+"""
+
+import json
+import logging
+import os
+from .est import (
+    STREAMS,
+    DEFAULT_STREAM,
+    _release_handlers,
+    _resolve_level,
+    init_logger,
+)
+
+__all__ = ["init_loggers", "load_spec"]
+
+
+# Options that pertain to a logger itself rather than to its handlers
+_LOGGER_OPTIONS = ("level", "verbosity", "propagate", "silent", "logfile", "stream")
+# Options that tie handlers to a single logger, so preclude sharing
+_UNSHARED_OPTIONS = ("flight_recorder", "multiprocess", "make_root", "name")
+
+
+def load_spec(path):
+    """
+    Read a logging spec from a YAML, TOML, or JSON file.
+
+    :param str path: path to the file; its extension determines its format
+    :return dict: the spec
+    :raise ImportError: if the library needed for the file's format isn't
+        installed: PyYAML for YAML, or before Python 3.11, tomli for TOML
+    :raise ValueError: if the file's extension isn't recognized
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Reading a YAML logging spec requires PyYAML")
+        with open(path) as f:
+            return yaml.safe_load(f) or {}
+    if ext == ".toml":
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError("Reading a TOML logging spec requires tomli")
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if ext == ".json":
+        with open(path) as f:
+            return json.load(f)
+    raise ValueError(
+        "Unknown logging spec format ('{}'); use YAML, TOML, or JSON".format(ext)
+    )
+
+
+def init_loggers(spec):
+    """
+    Establish and configure several loggers, sharing handlers among them.
+
+    Each logger's handlers are set up as init_logger would do for it, except
+    that one handler serves every logger with the same destination and
+    handler options; such a handler passes what any of those loggers does,
+    and each logger filters by its own level. Loggers don't propagate unless
+    the spec says so.
+
+    :param dict | str spec: logging spec, with init_logger options by logger
+        name under 'loggers', and options for every logger under 'defaults';
+        or path to a YAML, TOML, or JSON file with such a spec
+    :return dict[str, logging.Logger]: configured loggers, by name
+    :raise ValueError: if an option that ties handlers to one logger is
+        specified, or if loggers that share a logfile differ in its options
+    """
+    if isinstance(spec, str):
+        spec = load_spec(spec)
+    defaults = spec.get("defaults") or {}
+    configured = {n: opts or {} for n, opts in (spec.get("loggers") or {}).items()}
+
+    # Determine each logger's options, and the handlers it needs.
+    options = {}
+    uses = {}
+    for name in sorted(configured):
+        opts = dict(defaults)
+        parts = name.split(".")
+        for i in range(1, len(parts) + 1):
+            nearer = configured.get(".".join(parts[:i]), {})
+            # Level and verbosity are alternatives; the nearer one applies.
+            for k, alt in (("level", "verbosity"), ("verbosity", "level")):
+                if k in nearer and alt not in nearer:
+                    opts.pop(alt, None)
+            opts.update(nearer)
+        bad = [o for o in _UNSHARED_OPTIONS if o in opts]
+        if bad:
+            raise ValueError(
+                "Options not supported for multiple loggers: {}".format(
+                    ", ".join(bad)
+                )
+            )
+        opts["level"] = _resolve_level(opts.get("level"), opts.pop("verbosity", None))
+        options[name] = opts
+        if opts.get("silent"):
+            continue
+        shared = {k: v for k, v in opts.items() if k not in _LOGGER_OPTIONS}
+        shared_key = repr(sorted(shared.items()))
+        logfile = opts.get("logfile")
+        dests = []
+        if logfile:
+            dests.append(("logfile", os.path.realpath(logfile)))
+        if opts.get("stream") or not logfile:
+            dests.append(("stream", _stream_key(opts.get("stream"))))
+        for dest in dests:
+            key = dest + (shared_key,)
+            if key not in uses:
+                if dest[0] == "logfile" and any(k[:2] == dest for k in uses):
+                    raise ValueError(
+                        "Loggers sharing a logfile must use the same options "
+                        "for it: {}".format(logfile)
+                    )
+                uses[key] = {
+                    "name": name,
+                    "logfile": logfile if dest[0] == "logfile" else None,
+                    "stream": opts.get("stream") if dest[0] == "stream" else None,
+                    "level": opts["level"],
+                    "shared": shared,
+                    "loggers": [],
+                }
+            use = uses[key]
+            use["level"] = min(use["level"], opts["level"])
+            use["loggers"].append(name)
+
+    # Release handlers from a previous setup.
+    _release_handlers([logging.getLogger(name) for name in options])
+
+    # Create the handlers for each destination once, via the first logger
+    # that uses it, at the finest level of any that do.
+    handlers = {name: [] for name in options}
+    for use in uses.values():
+        logger = init_logger(
+            name=use["name"],
+            level=use["level"],
+            logfile=use["logfile"],
+            stream=use["stream"],
+            **use["shared"]
+        )
+        for name in use["loggers"]:
+            handlers[name].extend(logger.handlers)
+        logger.handlers = []
+
+    loggers = {}
+    for name, opts in options.items():
+        logger = logging.getLogger(name)
+        if opts.get("silent"):
+            handlers[name] = [logging.NullHandler()]
+        logger.handlers = handlers[name]
+        logger.setLevel(opts["level"])
+        logger.propagate = bool(opts.get("propagate", False))
+        loggers[name] = logger
+    return loggers
+
+
+def _stream_key(stream):
+    """ Identity of the stream that init_logger would choose. """
+    if not stream:
+        return id(DEFAULT_STREAM)
+    if isinstance(stream, str):
+        return id(STREAMS.get(stream.upper(), DEFAULT_STREAM))
+    return id(stream)
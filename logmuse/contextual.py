@@ -0,0 +1,121 @@
+"""
+Fields that apply to every record logged within a scope, e.g. a run or sample.
+
+    with logmuse.context(sample="x"):
+        ...
+
+Loggers configured by init_logger attach the fields in effect to each record
+as its 'context' attribute, which '%(context)s' renders in a format template
+(see init_logger's show_context), and which JSON output spreads into fields.
+
+The fields are held in a context variable, so they follow asyncio tasks; for
+a thread or executor, wrap the function to run with with_context. Each scope
+makes one immutable snapshot of the fields, rendered in advance, so a record
+just takes a reference to it.
+
+"""
+
+import contextlib
+import contextvars
+import functools
+import logging
+import types
+from json.encoder import encode_basestring_ascii
+from .formatters import _encode
+
+__all__ = ["ContextFilter", "context", "get_context", "with_context"]
+
+
+class _Snapshot(object):
+    """ Immutable set of context fields, with its text forms. """
+
+    __slots__ = ("fields", "text", "json")
+
+    def __init__(self, fields):
+        """
+        Render the fields.
+
+        :param Mapping[str, object] fields: the fields in effect
+        """
+        self.fields = types.MappingProxyType(dict(fields))
+        self.text = " ".join("{}={}".format(k, v) for k, v in fields.items())
+        self.json = ",".join(
+            encode_basestring_ascii(k) + ":" + _encode(v) for k, v in fields.items()
+        )
+
+    def __getstate__(self):
+        return dict(self.fields)
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return "context({})".format(self.text)
+
+
+_EMPTY = _Snapshot({})
+_CONTEXT = contextvars.ContextVar("logmuse_context", default=_EMPTY)
+
+
+@contextlib.contextmanager
+def context(**fields):
+    """
+    Add fields to the records logged within a scope.
+
+    Fields add to, or replace, those of enclosing scopes.
+
+    :param fields: field values by name
+    """
+    current = _CONTEXT.get()
+    merged = dict(current.fields)
+    merged.update(fields)
+    token = _CONTEXT.set(_Snapshot(merged))
+    try:
+        yield
+    finally:
+        _CONTEXT.reset(token)
+
+
+def get_context():
+    """
+    Get the fields in effect.
+
+    :return Mapping[str, object]: read-only field values by name
+    """
+    return _CONTEXT.get().fields
+
+
+def with_context(func):
+    """
+    Bind a function to the fields in effect, e.g. to run it in another thread.
+
+    :param function func: the function to bind
+    :return function: function that runs the given one with the fields in
+        effect when it was bound; each call runs in a copy of the bound
+        context, so calls may overlap, e.g. in a thread pool
+    """
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def bound(*args, **kwargs):
+        return ctx.copy().run(func, *args, **kwargs)
+
+    return bound
+
+
+class ContextFilter(logging.Filter):
+    """ Filter that attaches the fields in effect to each record. """
+
+    def filter(self, record):
+        """
+        Attach the context to a record, unless it has one already.
+
+        :param logging.LogRecord record: the record being logged
+        :return bool: True; no record is filtered out
+        """
+        if not hasattr(record, "context"):
+            record.context = _CONTEXT.get()
+        return True
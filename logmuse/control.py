@@ -0,0 +1,183 @@
+"""
+Triggers for changing a logger's verbosity while a program's running.
+
+A signal (by default, SIGUSR1 for more verbose and SIGUSR2 for less) steps the
+verbosity up or down a level, and a control file sets it to whatever the file
+says, whenever the file changes. Either way, the logger's level is changed in
+place, with set_verbosity, so its handlers and files are left as they are.
+
+"""
+
+import logging
+import os
+import signal
+import threading
+from .est import LEVEL_BY_VERBOSITY, _resolve_level, set_verbosity
+
+__all__ = [
+    "ControlFileWatcher",
+    "step_verbosity",
+    "watch_control_file",
+    "watch_signals",
+]
+
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def _output_level(logger):
+    """ Level from which a logger's records are written, as configured. """
+    from .filters import LevelOverrideFilter
+    from .metrics import CallSiteProfiler
+
+    for h in logger.handlers:
+        # A flight recorder lowers the logger's level to keep finer records.
+        pass_level = getattr(h, "pass_level", None)
+        if pass_level is not None:
+            return pass_level
+    # A profiler lowers it to count every call, leaving the level to the
+    # handlers.
+    if any(isinstance(h, CallSiteProfiler) for h in logger.handlers):
+        for h in logger.handlers:
+            if isinstance(h, (CallSiteProfiler, logging.NullHandler)):
+                continue
+            for f in h.filters:
+                if isinstance(f, LevelOverrideFilter):
+                    return f.default_level
+            return h.level
+    return logger.getEffectiveLevel()
+
+
+def step_verbosity(logger, steps=1):
+    """
+    Make a logger more or less verbose, by a number of verbosity levels.
+
+    :param logging.Logger | str logger: logger, or name of logger, to adjust
+    :param int steps: number of levels by which to increase the verbosity;
+        negative to decrease it. The result is limited to the levels that
+        verbosity can express.
+    :return int: the logger's new logging level
+    """
+    if not isinstance(logger, logging.Logger):
+        logger = logging.getLogger(logger)
+    current = _output_level(logger)
+    levels = [
+        _resolve_level(verbosity=v) for v in range(1, len(LEVEL_BY_VERBOSITY) + 1)
+    ]
+    if steps > 0:
+        options = sorted((l for l in levels if l < current), reverse=True)
+    else:
+        options = sorted(l for l in levels if l > current)
+    if not steps or not options:
+        return current
+    return set_verbosity(logger, level=options[min(abs(steps), len(options)) - 1])
+
+
+def watch_signals(logger, up=None, down=None):
+    """
+    Step a logger's verbosity up or down on receipt of a signal.
+
+    This must be called from the main thread, as signal handlers are set.
+
+    :param logging.Logger | str logger: logger, or name of logger, to adjust
+    :param int up: number of signal on which to increase the verbosity; by
+        default, SIGUSR1
+    :param int down: number of signal on which to decrease the verbosity; by
+        default, SIGUSR2
+    :raise ValueError: if a signal isn't given, and the platform hasn't the
+        default one
+    """
+    up = up or getattr(signal, "SIGUSR1", None)
+    down = down or getattr(signal, "SIGUSR2", None)
+    if up is None or down is None:
+        raise ValueError("No default signals for verbosity on this platform")
+    signal.signal(up, lambda signum, frame: step_verbosity(logger, 1))
+    signal.signal(down, lambda signum, frame: step_verbosity(logger, -1))
+
+
+class ControlFileWatcher(threading.Thread):
+    """
+    Thread that sets a logger's verbosity from a file, when the file changes.
+
+    The file's content is a verbosity, or logging level name, as for
+    init_logger. What the file says when watching starts is disregarded, lest
+    it be left over from an earlier run.
+    """
+
+    def __init__(self, logger, path, interval=DEFAULT_POLL_INTERVAL):
+        """
+        Note the file's current state, without starting to watch it.
+
+        :param logging.Logger | str logger: logger, or name of logger, to
+            adjust
+        :param str path: path to the control file, which needn't exist yet
+        :param float interval: number of seconds between checks of the file
+        """
+        super(ControlFileWatcher, self).__init__(name="logmuse-control")
+        self.daemon = True
+        if not isinstance(logger, logging.Logger):
+            logger = logging.getLogger(logger)
+        self.logger = logger
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._signature = self._stat()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """
+        Apply the verbosity in the control file, if the file's changed.
+
+        :return bool: whether a verbosity was applied
+        """
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        try:
+            with open(self.path) as f:
+                text = f.read().strip()
+        except OSError:
+            return False
+        if not text:
+            return False
+        try:
+            set_verbosity(self.logger, verbosity=text)
+        except (IndexError, TypeError, ValueError):
+            self.logger.warning(
+                "Invalid verbosity in control file %s: %s", self.path, text
+            )
+            return False
+        return True
+
+    def stop(self):
+        """ Stop watching the control file. """
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def watch_control_file(logger, path, interval=DEFAULT_POLL_INTERVAL):
+    """
+    Start setting a logger's verbosity from a file, when the file changes.
+
+    :param logging.Logger | str logger: logger, or name of logger, to adjust
+    :param str path: path to the control file, which needn't exist yet; its
+        content is to be a verbosity, or logging level name
+    :param float interval: number of seconds between checks of the file
+    :return ControlFileWatcher: the thread watching the file; stop it with
+        its stop method
+    """
+    watcher = ControlFileWatcher(logger, path, interval)
+    watcher.start()
+    return watcher
@@ -0,0 +1,96 @@
+"""
+Render a binary logfile, as written by init_logger(sink='binary'), as text.
+
+    python -m logmuse.decode [--format FMT] [--datefmt DATEFMT] LOGFILE
+
+"""
+
+import argparse
+import os
+import sys
+from .binlog import read_records
+from .est import (
+    BASIC_LOGGING_FORMAT,
+    DEFAULT_DATE_FMT,
+    DEV_LOGGING_FMT,
+    FULL_DEV_LOGGING_FMT,
+    JSON_FORMAT,
+)
+
+__all__ = ["decode", "main"]
+
+
+# Formats that may be named rather than given
+FORMATS = {
+    "basic": BASIC_LOGGING_FORMAT,
+    "dev": DEV_LOGGING_FMT,
+    "full": FULL_DEV_LOGGING_FMT,
+}
+
+
+def decode(path, fmt=DEV_LOGGING_FMT, datefmt=DEFAULT_DATE_FMT, out=None):
+    """
+    Write the records in a binary logfile as text.
+
+    :param str path: path to the binary logfile
+    :param str fmt: message format template, or 'json' to write each record
+        as a line of JSON
+    :param str datefmt: format/template for time component of a record
+    :param file out: where to write the text; by default, standard output
+    :return int: number of records written
+    """
+    from .formatters import JSON_DEV_FIELDS, get_formatter, get_json_formatter
+
+    formatter = (
+        get_json_formatter(JSON_DEV_FIELDS)
+        if fmt == JSON_FORMAT
+        else get_formatter(fmt, datefmt=datefmt)
+    )
+    out = out or sys.stdout
+    count = 0
+    for record in read_records(path):
+        out.write(formatter.format(record) + "\n")
+        count += 1
+    return count
+
+
+def main(argv=None):
+    """
+    Render a binary logfile named on the command line.
+
+    :param Iterable[str] argv: command-line arguments; by default, those of
+        the current process
+    :return int: exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m logmuse.decode", description="Render a binary logfile."
+    )
+    parser.add_argument("logfile", help="Path to binary logfile.")
+    parser.add_argument(
+        "-f",
+        "--format",
+        default="dev",
+        help="Message format template, one of: {}; or '{}' for JSON lines "
+        "(default: dev).".format(", ".join(FORMATS), JSON_FORMAT),
+    )
+    parser.add_argument(
+        "-d",
+        "--datefmt",
+        default=DEFAULT_DATE_FMT,
+        help="Format of record time (default: {}).".format(
+            DEFAULT_DATE_FMT.replace("%", "%%")
+        ),
+    )
+    args = parser.parse_args(argv)
+    try:
+        decode(args.logfile, FORMATS.get(args.format, args.format), args.datefmt)
+    except BrokenPipeError:
+        # The reader's gone (e.g., head); don't complain writing at exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except (OSError, ValueError) as e:
+        parser.exit(1, "{}\n".format(e))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,10 +7,10 @@ local level, but this will at least provide a foundation.
 
 """
 
+import functools
 import logging
-import os
 import sys
-import warnings
+import threading
 from ._version import __version__
 
 __author__ = "Vince Reuter"
@@ -23,6 +23,9 @@ __all__ = [
     "setup_logger",
     "AbsentOptionException",
     "LOGGING_CLI_OPTDATA",
+    "lazy_log",
+    "set_verbosity",
+    "MuseLogger",
 ]
 
 
@@ -34,6 +37,7 @@ FULL_DEV_LOGGING_FMT = (
     "%(levelname)s %(asctime)s | %(name)s:%(module)s:%(lineno)d > %(message)s "
 )
 DEFAULT_DATE_FMT = "%H:%M:%S"
+JSON_FORMAT = "json"
 PACKAGE_NAME = "logmuse"
 STREAMS = {"OUT": sys.stdout, "ERR": sys.stderr}
 DEFAULT_STREAM = STREAMS["ERR"]
@@ -42,16 +46,90 @@ LOGGING_LOCATIONS = (DEFAULT_STREAM,)
 TRACE_LEVEL_VALUE = 5
 TRACE_LEVEL_NAME = "TRACE"
 CUSTOM_LEVELS = {TRACE_LEVEL_NAME: TRACE_LEVEL_VALUE}
+
+# Handling of records in async mode, when the queue is full.
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST)
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_RECORDER_CAPACITY = 1000
+
+# Kinds of handler for a logfile, and their settings.
+SINK_FILE = "file"
+SINK_BUFFERED = "buffered"
+SINK_BINARY = "binary"
+SINK_MMAP = "mmap"
+SINKS = (SINK_FILE, SINK_BUFFERED, SINK_BINARY, SINK_MMAP)
+LOGFILE_MODE_TRUNCATE = "w"
+LOGFILE_MODE_APPEND = "a"
+LOGFILE_MODES = (LOGFILE_MODE_TRUNCATE, LOGFILE_MODE_APPEND)
+DEFAULT_BUFFER_SIZE = 64 * 1024
+DEFAULT_BUFFER_RECORDS = 1000
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAP_CHUNK_SIZE = 4 * 1024 * 1024
+# Compression methods for rotated logfiles, mapped to filename suffix.
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
 SILENCE_LOGS_OPTNAME = "silent"
 VERBOSITY_OPTNAME = "verbosity"
 DEVMODE_OPTNAME = "logdev"
-PARAM_BY_OPTNAME = {DEVMODE_OPTNAME: "devmode"}
+FORMAT_OPTNAME = "logformat"
+MAX_BYTES_OPTNAME = "logmaxbytes"
+ROTATE_INTERVAL_OPTNAME = "logrotate"
+BACKUP_COUNT_OPTNAME = "logbackups"
+COMPRESS_OPTNAME = "logcompress"
+RATE_LIMIT_OPTNAME = "lograte"
+SAMPLE_OPTNAME = "logsample"
+DEDUP_OPTNAME = "logdedup"
+LEVELS_OPTNAME = "loglevels"
+PROFILE_OPTNAME = "logprofile"
+SINK_OPTNAME = "logsink"
+
+# Lowest level a logger may have without deferring to its parent's, which a
+# profiled logger has so that every logging call reaches the profiler.
+_PROFILED_LOGGER_LEVEL = 1
+
+# Frames by which to raise stacklevel in a function that calls Logger._log,
+# to attribute the record to the function's caller. As of Python 3.11
+# (bpo-45171), stacklevel counts the calling function itself; before, it
+# started from that function's caller.
+_OWN_FRAME = 1 if sys.version_info >= (3, 11) else 0
+
+# Serializes changes of level made to loggers in place.
+_RECONFIGURATION_LOCK = threading.RLock()
+
+# Options a parser must have for logger_via_cli in strict mode; others, added
+# since, take init_logger's defaults when absent.
+_REQUIRED_OPTNAMES = (SILENCE_LOGS_OPTNAME, VERBOSITY_OPTNAME, DEVMODE_OPTNAME)
+
+PARAM_BY_OPTNAME = {
+    DEVMODE_OPTNAME: "devmode",
+    FORMAT_OPTNAME: "fmt",
+    MAX_BYTES_OPTNAME: "max_bytes",
+    ROTATE_INTERVAL_OPTNAME: "rotate_interval",
+    BACKUP_COUNT_OPTNAME: "backup_count",
+    COMPRESS_OPTNAME: "compress",
+    RATE_LIMIT_OPTNAME: "rate_limit",
+    SAMPLE_OPTNAME: "sample",
+    DEDUP_OPTNAME: "dedup_window",
+    LEVELS_OPTNAME: "level_overrides",
+    PROFILE_OPTNAME: "profile",
+    SINK_OPTNAME: "sink",
+}
 
 # Translation of verbosity into logging level.
 # Log message count monotonically increases in verbosity while it decreases
 # in logging level, making verbosity a more intuitive specification mechanism.
 _WARN_REPR = "WARN"
-LEVEL_BY_VERBOSITY = ["CRITICAL", "ERROR", _WARN_REPR, "INFO", "DEBUG"]
+LEVEL_BY_VERBOSITY = [
+    "CRITICAL",
+    "ERROR",
+    _WARN_REPR,
+    "INFO",
+    "DEBUG",
+    TRACE_LEVEL_NAME,
+]
 _MIN_VERBOSITY = 1
 _MAX_VERBOSITY = len(LEVEL_BY_VERBOSITY)
 _VERBOSITY_CHOICES = (
@@ -76,6 +154,59 @@ LOGGING_CLI_OPTDATA = {
         "action": "store_true",
         "help": "Expand content of logging message format.",
     },
+    FORMAT_OPTNAME: {
+        "metavar": "FMT",
+        "help": "Logging message format template, or '{}' to log each "
+        "message as a line of JSON.".format(JSON_FORMAT),
+    },
+    MAX_BYTES_OPTNAME: {
+        "metavar": "N",
+        "type": int,
+        "help": "Start a new logfile once it reaches this size.",
+    },
+    ROTATE_INTERVAL_OPTNAME: {
+        "metavar": "SECONDS",
+        "type": float,
+        "help": "Start a new logfile after this many seconds.",
+    },
+    BACKUP_COUNT_OPTNAME: {
+        "metavar": "N",
+        "type": int,
+        "help": "Number of old logfiles to keep when starting a new one.",
+    },
+    COMPRESS_OPTNAME: {
+        "choices": list(COMPRESSIONS),
+        "help": "Compress old logfiles with this method.",
+    },
+    RATE_LIMIT_OPTNAME: {
+        "metavar": "N",
+        "type": float,
+        "help": "Log at most N debug messages per second from each line of code.",
+    },
+    SAMPLE_OPTNAME: {
+        "metavar": "N",
+        "type": int,
+        "help": "Log only one in N debug messages from each line of code.",
+    },
+    DEDUP_OPTNAME: {
+        "metavar": "SECONDS",
+        "type": float,
+        "help": "Suppress repeats of a debug message for this many seconds.",
+    },
+    LEVELS_OPTNAME: {
+        "metavar": "NAME=LEVEL[,...]",
+        "help": "Logging levels for particular loggers and their descendants, "
+        "e.g. pkg.sub=DEBUG,other=WARN.",
+    },
+    PROFILE_OPTNAME: {
+        "action": "store_true",
+        "help": "Report the logging cost of the costliest lines of code at exit.",
+    },
+    SINK_OPTNAME: {
+        "choices": list(SINKS),
+        "default": SINK_FILE,
+        "help": "Kind of writer for the logfile.",
+    },
 }
 
 
@@ -110,6 +241,22 @@ def logger_via_cli(opts, strict=True, **kwargs):
         parameter is True. Such a case suggests that a client application
         didn't use this module to add the expected logging options to a parser.
     """
+    logs_cli_args = _init_logger_kwargs(opts, strict)
+    logs_cli_args.update(kwargs)
+    return init_logger(**logs_cli_args)
+
+
+def _init_logger_kwargs(opts, strict=True):
+    """
+    Get init_logger's arguments from parsed logging options.
+
+    :param argparse.Namespace opts: command-line options/arguments.
+    :param bool strict: whether to raise an exception
+    :return dict: keyword arguments for init_logger
+    :raise pararead.logs.AbsentOptionException: if one of the required
+        options (silent, verbosity, and logdev) isn't available in the given
+        Namespace, and strict is True
+    """
     # Within the key, translate the option name if needed. If it's not
     # present within the translations mapping, use the original optname.
     # Once translation's done (if needed), parse out the
@@ -120,15 +267,14 @@ def logger_via_cli(opts, strict=True, **kwargs):
         try:
             optval = getattr(opts, name)
         except AttributeError:
-            if strict:
+            if strict and optname in _REQUIRED_OPTNAMES:
                 raise AbsentOptionException(optname)
             continue
         else:
             # Translate the option name if needed (i.e., for discordance
             # between the CLI version and the logger setup signature).
             logs_cli_args[PARAM_BY_OPTNAME.get(optname, name)] = optval
-    logs_cli_args.update(kwargs)
-    return init_logger(**logs_cli_args)
+    return logs_cli_args
 
 
 def init_logger(
@@ -146,6 +292,30 @@ def init_logger(
     plain_format=False,
     style=None,
     use_full_names=False,
+    async_mode=False,
+    queue_size=DEFAULT_QUEUE_SIZE,
+    overflow=OVERFLOW_BLOCK,
+    sink=SINK_FILE,
+    buffer_size=DEFAULT_BUFFER_SIZE,
+    buffer_records=DEFAULT_BUFFER_RECORDS,
+    flush_interval=DEFAULT_FLUSH_INTERVAL,
+    multiprocess=False,
+    max_bytes=None,
+    rotate_interval=None,
+    backup_count=None,
+    compress=None,
+    rate_limit=None,
+    sample=None,
+    dedup_window=None,
+    level_overrides=None,
+    instrument=False,
+    stats_at_exit=False,
+    flight_recorder=0,
+    recorder_level=TRACE_LEVEL_VALUE,
+    recorder_trigger=logging.ERROR,
+    show_context=False,
+    profile=False,
+    logfile_mode=LOGFILE_MODE_TRUNCATE,
 ):
     """
     Establish and configure primary logger.
@@ -166,6 +336,8 @@ def init_logger(
         over a standard stream as the destination for log messages.
     :param str | FileIO[str] logfile: path to filesystem location to use as
         logs destination. if provided, this mutes standard stream logging.
+        With a '.gz' or '.zst' extension, the file is compressed as it's
+        written, on a background thread (zstd requires zstandard package).
     :param bool make_root: whether to use returned logger as root logger. This
         means the name will be 'root' and that messages will not propagate.
     :param bool propagate: whether to allow messages from this logger to reach
@@ -183,7 +355,9 @@ def init_logger(
         that better accords with intuition about how to convey this. It's
         positively associated with message volume rather than negatively so, as
         logging level is. This takes precedence over 'level' if both are present.
-    :param str fmt: message format/template.
+    :param str fmt: message format/template, or 'json' to render each record
+        as a line of JSON; in that case, the fields included depend on
+        devmode, level, and destination as do the default templates.
     :param str datefmt: format/template for time component of a log record.
     :param bool plain_format: force use of plain message format, even if
         in development mode (debug level)
@@ -191,9 +365,82 @@ def init_logger(
         https://docs.python.org/3/howto/logging-cookbook.html#use-of-alternative-formatting-styles;
         only valid in Python3.2+
     :param bool use_full_names: don't truncate level names
+    :param bool async_mode: whether to emit records from a background thread,
+        so that logging calls only enqueue records rather than write them
+    :param int queue_size: maximum number of records waiting to be emitted in
+        async mode; nonpositive means unbounded
+    :param str overflow: what to do with a record when the queue is full in
+        async mode: 'block' until there's room, 'drop_oldest' queued record,
+        or 'drop_newest', i.e. the incoming record
+    :param str sink: kind of handler to use for a logfile: 'file' writes each
+        record as it's logged, 'buffered' writes records in batches, and
+        'binary' writes records unformatted, in a compact binary form, to be
+        rendered later with 'python -m logmuse.decode', and so can't have a
+        compressed logfile, and 'mmap' copies each record into a
+        memory-mapped file, for the highest record rates
+    :param int buffer_size: for a buffered sink, the number of characters of
+        pending text that triggers a write
+    :param int buffer_records: for a buffered sink, the number of pending
+        records that triggers a write
+    :param float flush_interval: for a buffered sink, the maximum number of
+        seconds for which a record may remain unwritten; records at ERROR
+        level or above are always written at once
+    :param bool multiprocess: whether to start a collector through which
+        worker processes log, to write a single log; workers should call
+        init_worker_logger. This implies async mode, without a size limit.
+    :param int max_bytes: size at which to start a new logfile
+    :param float rotate_interval: number of seconds after which to start a
+        new logfile; with this or max_bytes, the logfile's appended to rather
+        than overwritten, and the sink option doesn't apply.
+    :param int backup_count: number of old logfiles to keep when starting a
+        new one; these are named by appending .1, .2, etc., newest first
+    :param str compress: how to compress old logfiles, if at all, on a
+        background thread: 'gzip' or 'zstd' (requires zstandard package);
+        applies only to a logfile that rolls over
+    :param float rate_limit: maximum average number of DEBUG (or finer)
+        records per second to emit from each line of code
+    :param int sample: emit only one in this many DEBUG (or finer) records
+        from each line of code
+    :param float dedup_window: number of seconds for which to suppress
+        repeats of a DEBUG (or finer) message; the next one after that, or
+        else a flush of the handlers once the window's closed, or their
+        closing, notes the number suppressed
+    :param dict[str, int | str] | str level_overrides: logging levels for
+        particular loggers and their descendants, by logger name, or as text
+        like 'pkg.sub=DEBUG,other=WARN'. The levels are set on those loggers,
+        and this logger's handlers apply each to records from its loggers.
+    :param bool instrument: whether to count and time the work done by the
+        handlers installed here; see logmuse.stats
+    :param bool stats_at_exit: whether to write the handler stats to
+        standard error, as JSON, at exit; this implies instrument
+    :param int flight_recorder: number of records below the logging level to
+        keep, unformatted, in case of trouble: when a record at the trigger
+        level arrives, the kept records are written just ahead of it. The
+        logger's level is lowered to the recorder level to create them.
+        They may be written on request, too, with dump_flight_recorder.
+    :param int recorder_level: minimal level of records for the flight
+        recorder to keep
+    :param int recorder_trigger: minimal level of a record that releases the
+        records the flight recorder is keeping
+    :param bool show_context: whether to follow each message with the fields
+        from logmuse.context, when using a default format. A given format
+        isn't changed, so must include them as '%(context)s' (a warning is
+        issued if it doesn't); JSON output always includes them
+    :param bool profile: whether to tally records, and the time spent
+        handling and formatting them, by line of code and level, and write a
+        report of the costliest to standard error at exit; see
+        logmuse.profile_report. Every logging call then makes a record, to
+        be counted, even one below the logging level.
+    :param str logfile_mode: 'w' to start the logfile anew, or 'a' to append
+        to it; a text logfile that's open already, e.g. for another logger,
+        is shared rather than opened again, so isn't truncated. A logfile
+        that rolls over is always appended to.
     :return logging.Logger: configured Logger instance
     :raise ValueError: if attempting to name explicitly non-root logger with
-        a root name, or if both level and verbosity are specified
+        a root name, or if both level and verbosity are specified, or if the
+        overflow policy, sink, or logfile mode is unknown, or if rollover or
+        a binary sink is requested for a compressed logfile, or if the
+        logfile's open for a handler of another kind
     """
 
     if make_root is True:
@@ -210,13 +457,9 @@ def init_logger(
                 "Requested non-root logger with root name: {}".format(name)
             )
 
-    # Enable named ultrafine logging for debugging.
-    for level_name, level_value in CUSTOM_LEVELS.items():
-        logging.addLevelName(level_value, level_name)
-
-    # Establish the logger.
-    logger = logging.getLogger(name)
-    logger.handlers = []
+    # Establish the logger, releasing any handlers from a previous setup.
+    logger = _equip(logging.getLogger(name))
+    _release_handlers([logger])
     logger.propagate = propagate
 
     # Either short-circuit with a silent logger or parse and set level.
@@ -225,40 +468,101 @@ def init_logger(
         return logger
 
     # Determine the logger's listening level.
-    if level is not None and verbosity is not None:
+    level = _resolve_level(level, verbosity)
+    logger.setLevel(level)
+    if isinstance(level_overrides, str):
+        level_overrides = _parse_level_overrides(level_overrides)
+    overrides = {
+        n: _resolve_level(level=l) for n, l in (level_overrides or {}).items()
+    }
+    # Handlers pass what any overridden logger does, and filter by name.
+    handler_level = min([level] + list(overrides.values()))
+
+    if sink not in SINKS:
         raise ValueError(
-            "Cannot specify both level and verbosity; got {} and "
-            "{}, respectively".format(level, verbosity)
+            "Invalid logfile sink ('{}'); choose from: {}".format(
+                sink, ", ".join(SINKS)
+            )
         )
-    elif level is not None:
-        # Handle int- or text-specific logging level.
-        try:
-            level = int(level)
-        except ValueError:
-            level = level.upper()
-    else:
-        level = _level_from_verbosity(verbosity or LOGGING_LEVEL)
-    try:
-        level = getattr(logging, level) if isinstance(level, str) else level
-        logger.setLevel(level)
-    except Exception:
-        logging.error(
-            "Can't set logging level to %s; instead using: '%s'",
-            str(level),
-            str(LOGGING_LEVEL),
+
+    if logfile_mode not in LOGFILE_MODES:
+        raise ValueError(
+            "Invalid logfile mode ('{}'); choose from: {}".format(
+                logfile_mode, ", ".join(LOGFILE_MODES)
+            )
         )
-        level = LOGGING_LEVEL
-        logger.setLevel(level)
 
     handlers = []
 
+    if compress and not (logfile and (max_bytes or rotate_interval)):
+        import warnings
+
+        warnings.warn(
+            "compress has no effect unless a logfile rolls over; set max_bytes "
+            "or rotate_interval"
+        )
+
     if logfile:
-        logfile_folder = os.path.dirname(logfile)
-        if not os.path.exists(logfile_folder):
-            os.makedirs(logfile_folder)
+        from .sinks import _open_in_folder
+
+        compression = next(
+            (m for m, sfx in COMPRESSIONS.items() if logfile.endswith(sfx)), None
+        )
+        if (max_bytes or rotate_interval) and compression:
+            raise ValueError(
+                "A compressed logfile can't be rolled over: {}".format(logfile)
+            )
+        if compression and sink == SINK_BINARY:
+            raise ValueError(
+                "A binary logfile can't be compressed: {}".format(logfile)
+            )
+
+        # Create the handler; files which roll over are appended to.
+        def open_logfile():
+            if max_bytes or rotate_interval:
+                from .sinks import RotatingFileSink
+
+                return RotatingFileSink(
+                    logfile,
+                    max_bytes=max_bytes,
+                    rotate_interval=rotate_interval,
+                    backup_count=backup_count,
+                    compress=compress,
+                )
+            if compression:
+                from .sinks import CompressedFileHandler
+
+                return CompressedFileHandler(
+                    logfile,
+                    mode=logfile_mode,
+                    compress=compression,
+                    buffer_records=buffer_records,
+                    flush_interval=flush_interval,
+                )
+            if sink == SINK_BUFFERED:
+                from .sinks import BufferedFileHandler
+
+                return BufferedFileHandler(
+                    logfile,
+                    mode=logfile_mode,
+                    buffer_size=buffer_size,
+                    buffer_records=buffer_records,
+                    flush_interval=flush_interval,
+                )
+            if sink == SINK_MMAP:
+                from .sinks import MmapFileHandler
+
+                return MmapFileHandler(logfile, mode=logfile_mode)
+            if sink == SINK_BINARY:
+                from .binlog import BinaryLogHandler
+
+                return BinaryLogHandler(logfile, mode=logfile_mode)
+            from .sinks import SharedFileHandler
+
+            return SharedFileHandler(logfile, mode=logfile_mode)
+
+        handlers.append(_open_in_folder(logfile, open_logfile))
 
-        # Create and add the handler, overwriting rather than appending.
-        handlers.append(logging.FileHandler(logfile, mode="w"))
     if stream or not logfile:
         if not stream:
             stream = DEFAULT_STREAM
@@ -281,17 +585,30 @@ def init_logger(
         handlers.append(logging.StreamHandler(stream_loc))
 
     fine = level <= logging.DEBUG
+    use_dev_fmt = lambda hdlr: not plain_format and (
+        devmode or fine or isinstance(hdlr, logging.FileHandler)
+    )
     get_fmt = (
         (lambda _: fmt)
         if fmt
         else (
-            lambda hdlr: BASIC_LOGGING_FORMAT
-            if plain_format
-            or not (devmode or fine or isinstance(hdlr, logging.FileHandler))
-            else (FULL_DEV_LOGGING_FMT if use_full_names else DEV_LOGGING_FMT)
+            lambda hdlr: (FULL_DEV_LOGGING_FMT if use_full_names else DEV_LOGGING_FMT)
+            if use_dev_fmt(hdlr)
+            else BASIC_LOGGING_FORMAT
         )
     )
 
+    if show_context and not fmt:
+        base_fmt = get_fmt
+        get_fmt = lambda hdlr: base_fmt(hdlr).rstrip() + " %(context)s"
+    elif show_context and fmt != JSON_FORMAT and "context" not in fmt:
+        import warnings
+
+        warnings.warn(
+            "show_context has no effect with a given format; include the "
+            "fields with '%(context)s'"
+        )
+
     fmt_kwargs = {"datefmt": datefmt}
     if style:
         vers = sys.version_info
@@ -303,10 +620,113 @@ def init_logger(
         else:
             fmt_kwargs["style"] = style
 
+    # Formatters are shared by every handler with the same configuration.
+    from .formatters import (
+        JSON_DEV_FIELDS,
+        JSON_FIELDS,
+        get_formatter,
+        get_json_formatter,
+    )
+
     for h in handlers:
-        h.setFormatter(logging.Formatter(get_fmt(h), **fmt_kwargs))
-        h.setLevel(level)
+        if fmt == JSON_FORMAT:
+            fields = JSON_DEV_FIELDS if use_dev_fmt(h) else JSON_FIELDS
+            h.setFormatter(get_json_formatter(fields))
+        else:
+            h.setFormatter(get_formatter(get_fmt(h), **fmt_kwargs))
+        h.setLevel(handler_level)
+
+    # A listener thread takes ownership of the writing handlers.
+    if multiprocess:
+        from .multiproc import start_collector
+
+        handlers = [start_collector(handlers, logger.name, logger.level, propagate)]
+        handlers[0].setLevel(handler_level)
+    elif async_mode:
+        from .handlers import QueueingHandler
+
+        handlers = [QueueingHandler(handlers, queue_size, overflow)]
+        handlers[0].setLevel(handler_level)
+
+    if instrument or stats_at_exit:
+        from .metrics import dump_stats_at_exit, instrument_handler, iter_handlers
+
+        for h in iter_handlers(handlers):
+            instrument_handler(h)
+        if stats_at_exit:
+            dump_stats_at_exit(logger)
+
+    # Thin out fine-grained records before they reach any queue or writer.
+    filters = []
+    if sample or rate_limit or dedup_window:
+        from .filters import DedupFilter, RateLimitFilter, SamplingFilter
+    if sample:
+        filters.append(SamplingFilter(sample))
+    if rate_limit:
+        filters.append(RateLimitFilter(rate_limit))
+    dedup_filter = None
+    if dedup_window:
+        dedup_filter = DedupFilter(dedup_window)
+        filters.append(dedup_filter)
+    level_filter = None
+    if overrides:
+        from .filters import LevelOverrideFilter
+
+        level_filter = LevelOverrideFilter(overrides, level)
+        filters.append(level_filter)
+        level_filter.set_logger_levels()
+    # Attach the fields from logmuse.context to each record as it's logged.
+    from .contextual import ContextFilter
+
+    context_filter = ContextFilter()
+    filters.append(context_filter)
+
+    # The profiler sees each record ahead of the handlers it watches, even one
+    # below the logging level, which is left to the handlers to apply.
+    if profile:
+        from .metrics import CallSiteProfiler, dump_profile_at_exit
+
+        profiler = CallSiteProfiler()
+        for h in handlers:
+            profiler.watch(h)
+        logger.addHandler(profiler)
+        logger.setLevel(_PROFILED_LOGGER_LEVEL)
+        dump_profile_at_exit(logger)
+
+    # The flight recorder goes ahead of the writers, so context precedes its
+    # trigger.
+    if flight_recorder:
+        from .handlers import RingBufferHandler
+
+        recorder = RingBufferHandler(
+            handlers,
+            capacity=flight_recorder,
+            trigger_level=recorder_trigger,
+            pass_level=level,
+            pass_filter=level_filter,
+        )
+        recorder.setLevel(recorder_level)
+        recorder.addFilter(context_filter)
+        logger.addHandler(recorder)
+        logger.setLevel(min(logger.level, recorder_level))
+
+    for h in handlers:
+        for f in filters:
+            h.addFilter(f)
+        if dedup_filter is not None:
+            dedup_filter.report_to(h)
         logger.addHandler(h)
+
+    # With the logger's level lowered, to see finer records than are written,
+    # its ancestors are passed only what the logging level lets through.
+    if propagate and logger.level < level:
+        from .handlers import PropagatingHandler
+
+        forwarder = PropagatingHandler(logger, handler_level)
+        if level_filter is not None:
+            forwarder.addFilter(level_filter)
+        logger.addHandler(forwarder)
+        logger.propagate = False
     logger.debug(
         "Configured logger '%s' using %s v%s", logger.name, PACKAGE_NAME, __version__
     )
@@ -330,6 +750,8 @@ def setup_logger(
     style=None,
 ):
     """ Old alias for init_logger for backwards compatibility """
+    import warnings
+
     warnings.warn("Please use init_logger in place of setup_logger", DeprecationWarning)
     return init_logger(
         name,
@@ -348,6 +770,122 @@ def setup_logger(
     )
 
 
+def set_verbosity(logger, verbosity=None, level=None):
+    """
+    Change the level of a configured logger and its handlers, in place.
+
+    Unlike configuring the logger anew, this neither replaces its handlers
+    nor reopens its logfile. The handlers' levels are set as init_logger
+    would set them, except that a handler shared with other loggers (see
+    init_loggers) is kept at the finest of their levels, so they log as
+    before.
+
+    :param logging.Logger | str logger: logger, or name of logger, to adjust
+    :param int | str verbosity: new verbosity, as for init_logger
+    :param int | str level: alternative to verbosity: new logging level
+    :return int: the new logging level
+    :raise ValueError: if both level and verbosity are specified
+    """
+    from .filters import LevelOverrideFilter
+    from .handlers import RingBufferHandler
+    from .metrics import CallSiteProfiler, iter_handlers
+
+    if not isinstance(logger, logging.Logger):
+        logger = logging.getLogger(logger)
+    level = _resolve_level(level, verbosity)
+    with _RECONFIGURATION_LOCK:
+        logger_level = handler_level = level
+        # Each handler, with the one on the logger that owns it
+        handlers = []
+        for top in logger.handlers:
+            for h in iter_handlers([top]):
+                if isinstance(h, RingBufferHandler):
+                    logger_level = min(logger_level, h.level)
+                elif isinstance(h, CallSiteProfiler):
+                    logger_level = _PROFILED_LOGGER_LEVEL
+                elif not isinstance(h, logging.NullHandler):
+                    handlers.append((h, top))
+                for f in h.filters:
+                    if isinstance(f, LevelOverrideFilter):
+                        f.set_default_level(level)
+                        handler_level = min(level, f.min_level)
+        shared_levels = _shared_levels(logger)
+
+        def set_handler_levels():
+            for h, top in handlers:
+                shared_level = shared_levels.get(id(top), handler_level)
+                h.setLevel(min(handler_level, shared_level))
+            for h in logger.handlers:
+                if isinstance(h, RingBufferHandler):
+                    h.pass_level = level
+
+        # Open the handlers before the logger, and close the logger before
+        # the handlers, so no record passes the one only to be lost at the
+        # other while the levels change.
+        if min(logger_level, handler_level) < logger.getEffectiveLevel():
+            set_handler_levels()
+            logger.setLevel(logger_level)
+        else:
+            logger.setLevel(logger_level)
+            set_handler_levels()
+    return level
+
+
+def _parse_level_overrides(text):
+    """
+    Parse logging levels for particular loggers from text.
+
+    :param str text: comma-separated logger name and level pairs, each joined
+        by '=', e.g. 'pkg.sub=DEBUG,other=WARN'
+    :return dict[str, str]: level by logger name
+    :raise ValueError: if a pair lacks its name or level
+    """
+    overrides = {}
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        name, sep, level = item.partition("=")
+        if not (sep and name.strip() and level.strip()):
+            raise ValueError(
+                "Invalid logging level override ('{}'); use NAME=LEVEL".format(item)
+            )
+        overrides[name.strip()] = level.strip()
+    return overrides
+
+
+def _resolve_level(level=None, verbosity=None):
+    """
+    Determine a numeric logging level from a level or a verbosity.
+
+    :param int | str level: logging level, by value or name
+    :param int | str verbosity: alternative to level, as for init_logger
+    :return int: numeric logging level; INFO if the level's invalid
+    :raise ValueError: if both level and verbosity are specified
+    """
+    if level is not None and verbosity is not None:
+        raise ValueError(
+            "Cannot specify both level and verbosity; got {} and "
+            "{}, respectively".format(level, verbosity)
+        )
+    elif level is not None:
+        # Handle int- or text-specific logging level.
+        try:
+            level = int(level)
+        except ValueError:
+            level = level.upper()
+    else:
+        level = _level_from_verbosity(verbosity or LOGGING_LEVEL)
+    try:
+        return _level_value(level) if isinstance(level, str) else level
+    except Exception:
+        logging.error(
+            "Can't set logging level to %s; instead using: '%s'",
+            str(level),
+            str(LOGGING_LEVEL),
+        )
+        return getattr(logging, LOGGING_LEVEL)
+
+
 def _level_from_verbosity(verbosity):
     """
     Translation of verbosity into logging level.
@@ -374,7 +912,7 @@ def _level_from_verbosity(verbosity):
                 "Invalid logging verbosity ('{}'); choose from: "
                 "{}".format(verbosity, ", ".join(LEVEL_BY_VERBOSITY))
             )
-        return getattr(logging, v)
+        return _level_value(v)
     elif isinstance(verbosity, int):
         return LEVEL_BY_VERBOSITY[verbosity - 1]  # 1-based user, 0-based internal
     else:
@@ -385,6 +923,78 @@ def _level_from_verbosity(verbosity):
         )
 
 
+def _all_loggers():
+    """
+    Get every logger there is, the root included.
+
+    :return list[logging.Logger]: the loggers
+    """
+    return [logging.getLogger()] + [
+        l
+        for l in list(logging.Logger.manager.loggerDict.values())
+        if isinstance(l, logging.Logger)
+    ]
+
+
+def _shared_levels(logger):
+    """
+    Find the finest level of the other loggers holding each of a logger's
+    handlers.
+
+    :param logging.Logger logger: logger whose handlers to look for
+    :return dict[int, int]: level by ID of a handler another logger holds
+    """
+    ids = {id(h) for h in logger.handlers}
+    levels = {}
+    for other in _all_loggers():
+        if other is logger:
+            continue
+        for h in other.handlers:
+            if id(h) in ids:
+                level = other.getEffectiveLevel()
+                levels[id(h)] = min(levels.get(id(h), level), level)
+    return levels
+
+
+def _release_handlers(loggers):
+    """
+    Detach the handlers of loggers, closing those that no other logger holds.
+
+    A handler may be shared among loggers, as init_loggers arranges, so it's
+    left open while it still serves another. Levels that a closed handler's
+    overrides set on other loggers are undone, unless another filter still
+    overrides them.
+
+    :param Iterable[logging.Logger] loggers: loggers to strip of handlers
+    """
+    from .filters import LevelOverrideFilter
+
+    released = []
+    for logger in loggers:
+        released.extend(h for h in logger.handlers if h not in released)
+        logger.handlers = []
+    held = [h for l in _all_loggers() for h in l.handlers]
+    held_ids = {id(h) for h in held}
+    held_filters = {id(f) for h in held for f in h.filters}
+    for h in released:
+        if id(h) not in held_ids:
+            for f in h.filters:
+                if isinstance(f, LevelOverrideFilter) and id(f) not in held_filters:
+                    f.restore_logger_levels()
+            h.close()
+
+
+def _level_value(name):
+    """
+    Numeric value of a logging level, by name.
+
+    :param str name: name of a builtin or custom logging level, in capitals
+    :return int: the level's value
+    :raise AttributeError: if there's no such level
+    """
+    return CUSTOM_LEVELS[name] if name in CUSTOM_LEVELS else getattr(logging, name)
+
+
 class AbsentOptionException(Exception):
     """ Exception subtype suggesting that client should add log options. """
 
@@ -398,14 +1008,122 @@ class AbsentOptionException(Exception):
         super(AbsentOptionException, self).__init__(likely_reason)
 
 
+def lazy_log(logger, level, build, *args, **kwargs):
+    """
+    Log a message that's only built if the logger will handle the level.
+
+    This is for messages that are expensive to create, e.g. the text
+    representation of a large data structure. Whether the level's enabled is
+    cached by the logger, until its level is set again (e.g., by init_logger).
+
+    :param logging.Logger logger: logger with which to log the message
+    :param int level: level at which to log the message
+    :param function() -> str build: function that creates the message
+    :param Iterable args: arguments for the message template, if any
+    :param kwargs: keyword arguments for the logging call, e.g. exc_info
+    """
+    if logger.isEnabledFor(level):
+        # Attribute the record to the caller rather than to this function.
+        kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + _OWN_FRAME
+        logger._log(level, build(), args, **kwargs)
+
+
+def _whisper(logger, msg, *args, **kwargs):
+    """ Log at TRACE level, bailing out early if the level's disabled. """
+    if logger.isEnabledFor(TRACE_LEVEL_VALUE):
+        kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + _OWN_FRAME
+        logger._log(TRACE_LEVEL_VALUE, msg, args, **kwargs)
+
+
+class MuseLogger(logging.Logger):
+    """
+    Logger with methods for TRACE level, and for messages built on demand.
+
+    This is the logger class while logging's is otherwise the default, so
+    it's what logging.getLogger creates, as well as init_logger and
+    get_logger.
+    """
+
+    def trace(self, msg, *args, **kwargs):
+        """
+        Log at TRACE level, bailing out early if the level's disabled.
+
+        :param str msg: message template
+        :param Iterable args: arguments for the message template, if any
+        :param kwargs: keyword arguments for the logging call, e.g. exc_info
+        """
+        if self.isEnabledFor(TRACE_LEVEL_VALUE):
+            kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + _OWN_FRAME
+            self._log(TRACE_LEVEL_VALUE, msg, args, **kwargs)
+
+    whisper = trace
+
+    def lazy_whisper(self, build, *args, **kwargs):
+        """
+        Log at TRACE level a message that's only built if the level's enabled.
+
+        :param function() -> str build: function that creates the message
+        :param Iterable args: arguments for the message template, if any
+        :param kwargs: keyword arguments for the logging call, e.g. exc_info
+        """
+        if self.isEnabledFor(TRACE_LEVEL_VALUE):
+            kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
+            lazy_log(self, TRACE_LEVEL_VALUE, build, *args, **kwargs)
+
+    def lazy_debug(self, build, *args, **kwargs):
+        """
+        Log at DEBUG level a message that's only built if the level's enabled.
+
+        :param function() -> str build: function that creates the message
+        :param Iterable args: arguments for the message template, if any
+        :param kwargs: keyword arguments for the logging call, e.g. exc_info
+        """
+        if self.isEnabledFor(logging.DEBUG):
+            kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 1
+            lazy_log(self, logging.DEBUG, build, *args, **kwargs)
+
+
+# Register the custom levels, and the logger class, once.
+for _name, _value in CUSTOM_LEVELS.items():
+    logging.addLevelName(_value, _name)
+if logging.getLoggerClass() is logging.Logger:
+    logging.setLoggerClass(MuseLogger)
+
+
+def _equip(logger):
+    """
+    Give a logger the methods of MuseLogger, if it hasn't them.
+
+    A plain logger, e.g. one created before this module was imported, is
+    made a MuseLogger; the methods are attached to any other kind, such as
+    the root logger.
+
+    :param logging.Logger logger: logger to equip
+    :return logging.Logger: the same logger
+    """
+    if isinstance(logger, MuseLogger):
+        return logger
+    if type(logger) is logging.Logger:
+        logger.__class__ = MuseLogger
+        return logger
+    logger.trace = logger.whisper = functools.partial(_whisper, logger)
+    logger.lazy_whisper = functools.partial(lazy_log, logger, TRACE_LEVEL_VALUE)
+    logger.lazy_debug = functools.partial(lazy_log, logger, logging.DEBUG)
+    return logger
+
+
 # Stolen from peppy. Probably need to make peppy/looper rely on this.
 def get_logger(name):
     """
-    Return a logger with given name, equipped with custom method.
+    Return a logger with given name, equipped with custom methods.
+
+    Beyond the standard methods, the logger has trace (or whisper), for
+    logging at TRACE level, and lazy_whisper and lazy_debug, which take a
+    function that creates the message rather than the message itself (see
+    lazy_log).
 
     :param str name: name for the logger to get/create.
-    :return logging.Logger: named, custom logger instance.
+    :return logging.Logger: named, custom logger instance; a MuseLogger,
+        unless it's the root logger or another class was already in use
     """
-    l = logging.getLogger(name)
-    l.whisper = lambda msg, *args, **kwargs: l.log(5, msg, *args, **kwargs)
-    return l
+    return _equip(logging.getLogger(name))
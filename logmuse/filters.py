@@ -0,0 +1,356 @@
+"""
+Filters that thin out high-volume, fine-grained log records.
+
+These are meant for logging in hot loops: each applies only to records at or
+below a level (DEBUG by default), so warnings and errors are never lost, and
+each keeps its state by call site, i.e. source file and line number. A filter
+may be shared by several handlers; a record's fate is decided just once. A
+note of repeats that DedupFilter has suppressed is never itself thinned out.
+
+LevelOverrideFilter is different: it applies levels by logger name, so that
+one handler may serve loggers at different levels.
+
+"""
+
+import logging
+import threading
+import time
+
+__all__ = ["DedupFilter", "LevelOverrideFilter", "RateLimitFilter", "SamplingFilter"]
+
+
+DEFAULT_FILTERED_LEVEL = logging.DEBUG
+
+# Number of remembered messages above which expired ones are forgotten.
+_DEDUP_PRUNE_SIZE = 10000
+
+# Levels of loggers from before they were overridden, with the number of
+# filters overriding each, by logger name
+_REPLACED_LEVELS = {}
+_REPLACED_LEVELS_LOCK = threading.Lock()
+
+
+class _CallSiteFilter(logging.Filter):
+    """ Base for filters that decide once per record, below a given level. """
+
+    def __init__(self, max_level=DEFAULT_FILTERED_LEVEL):
+        """
+        Set up the filter's state.
+
+        :param int max_level: level at and below which records are filtered;
+            records above it always pass
+        """
+        super(_CallSiteFilter, self).__init__()
+        self.max_level = max_level
+        self._lock = threading.Lock()
+        self._last = threading.local()
+
+    def filter(self, record):
+        """
+        Determine whether a record is to be emitted.
+
+        :param logging.LogRecord record: the record in question
+        :return bool: whether to emit the record
+        """
+        if record.levelno > self.max_level or hasattr(record, "suppressed_repeats"):
+            return True
+        # A record's passed to each handler in turn, on the same thread.
+        last = getattr(self._last, "decision", None)
+        if last is not None and last[0] is record:
+            return last[1]
+        with self._lock:
+            keep = self._decide(record)
+        self._last.decision = (record, keep)
+        return keep
+
+    def _decide(self, record):
+        raise NotImplementedError
+
+
+class SamplingFilter(_CallSiteFilter):
+    """ Filter that passes one in every N records from each call site. """
+
+    def __init__(self, n, max_level=DEFAULT_FILTERED_LEVEL):
+        """
+        Set up the filter, with no records yet counted.
+
+        :param int n: pass one in this many records from each call site,
+            starting with the first
+        :param int max_level: level at and below which records are filtered
+        :raise ValueError: if the sampling interval isn't positive
+        """
+        if n < 1:
+            raise ValueError("Sampling interval must be positive: {}".format(n))
+        super(SamplingFilter, self).__init__(max_level)
+        self.n = n
+        self._counts = {}
+
+    def _decide(self, record):
+        key = (record.pathname, record.lineno)
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        return count % self.n == 0
+
+
+class RateLimitFilter(_CallSiteFilter):
+    """
+    Filter that passes at most a given rate of records from each call site.
+
+    Each call site has a token bucket, refilled at the given rate up to the
+    burst size; a record passes if it can take a token.
+    """
+
+    def __init__(self, rate, burst=None, max_level=DEFAULT_FILTERED_LEVEL):
+        """
+        Set up the filter, with each call site's bucket to start out full.
+
+        :param float rate: number of records per second to pass from each
+            call site, on average
+        :param float burst: number of records that may pass from a call site
+            at once; by default the rate, but at least 1
+        :param int max_level: level at and below which records are filtered
+        :raise ValueError: if the rate isn't positive
+        """
+        if rate <= 0:
+            raise ValueError("Rate limit must be positive: {}".format(rate))
+        super(RateLimitFilter, self).__init__(max_level)
+        self.rate = rate
+        self.burst = max(1.0, rate) if burst is None else burst
+        self._buckets = {}
+
+    def _decide(self, record):
+        key = (record.pathname, record.lineno)
+        now = record.created
+        tokens, last = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        keep = tokens >= 1
+        self._buckets[key] = (tokens - 1 if keep else tokens, now)
+        return keep
+
+
+class DedupFilter(_CallSiteFilter):
+    """
+    Filter that suppresses repeats of a message within a time window.
+
+    The first occurrence of a message opens the window. When the message next
+    occurs after the window's closed, it passes with a note of the number of
+    repeats suppressed in the meantime, and opens a new window. A handler that
+    the filter reports to passes on the note without waiting for the message
+    to recur: when it's flushed, for windows that have closed, and when it's
+    closed, for all of them. The note's a copy of the last repeat, with its
+    message amended, and the count as its 'suppressed_repeats' attribute.
+    """
+
+    def __init__(self, window, max_level=DEFAULT_FILTERED_LEVEL):
+        """
+        Set up the filter, with no messages yet seen.
+
+        :param float window: number of seconds for which to suppress repeats
+        :param int max_level: level at and below which records are filtered
+        :raise ValueError: if the window isn't positive
+        """
+        if window <= 0:
+            raise ValueError("Dedup window must be positive: {}".format(window))
+        super(DedupFilter, self).__init__(max_level)
+        self.window = window
+        # Start of the window, count of repeats, and last repeat, by message
+        self._seen = {}
+        self._handlers = []
+        # Earliest end of a window with repeats not yet noted, if any
+        self._due = None
+
+    def report_to(self, handler):
+        """
+        Have a handler pass on notes of suppressed repeats when it's flushed
+        or closed.
+
+        The handler's flush and close methods are replaced on the instance by
+        versions that first pass the notes to each handler reported to.
+
+        :param logging.Handler handler: handler with the filter
+        """
+        with self._lock:
+            self._handlers.append(handler)
+        flush, close = handler.flush, handler.close
+
+        def reporting_flush():
+            self.report()
+            flush()
+
+        def reporting_close():
+            self.report(everything=True)
+            with self._lock:
+                if handler in self._handlers:
+                    self._handlers.remove(handler)
+            close()
+
+        handler.flush = reporting_flush
+        handler.close = reporting_close
+
+    def report(self, everything=False):
+        """
+        Pass notes of suppressed repeats to the handlers reported to.
+
+        :param bool everything: whether to note repeats in windows that are
+            still open, rather than just those in windows that have closed
+        """
+        due = self._due
+        if due is None or (not everything and time.time() < due):
+            return
+        notes = []
+        with self._lock:
+            now = time.time()
+            self._due = None
+            for seen in self._seen.values():
+                if not seen[1]:
+                    continue
+                end = seen[0] + self.window
+                if everything or end <= now:
+                    notes.append(_note_repeats(seen[2], seen[1]))
+                    seen[1], seen[2] = 0, None
+                elif self._due is None or end < self._due:
+                    self._due = end
+            handlers = list(self._handlers)
+        for note in notes:
+            for h in handlers:
+                if note.levelno >= h.level:
+                    h.handle(note)
+
+    def _decide(self, record):
+        key = (record.name, record.levelno, record.getMessage())
+        seen = self._seen.get(key)
+        if seen is not None and record.created - seen[0] < self.window:
+            seen[1] += 1
+            seen[2] = record
+            end = seen[0] + self.window
+            if self._due is None or end < self._due:
+                self._due = end
+            return False
+        if seen is not None and seen[1]:
+            record.msg = "{} (suppressed {} repeats)".format(record.msg, seen[1])
+        elif len(self._seen) >= _DEDUP_PRUNE_SIZE:
+            self._prune(record.created)
+        self._seen[key] = [record.created, 0, None]
+        return True
+
+    def _prune(self, now):
+        # Repeats not yet noted are kept until they are.
+        self._seen = {
+            k: v for k, v in self._seen.items() if v[1] or now - v[0] < self.window
+        }
+
+
+def _note_repeats(record, count):
+    """
+    Make a note of suppressed repeats of a record's message.
+
+    :param logging.LogRecord record: the last repeat
+    :param int count: number of repeats suppressed
+    :return logging.LogRecord: copy of the record, noting the count
+    """
+    note = logging.makeLogRecord(record.__dict__)
+    note.msg = "{} (suppressed {} repeats)".format(record.msg, count)
+    note.suppressed_repeats = count
+    return note
+
+
+class LevelOverrideFilter(logging.Filter):
+    """
+    Filter that applies levels to records by the name of their logger.
+
+    A logger's level is that given for the nearest of it and its ancestors,
+    or else the default. It's determined the first time the logger's name is
+    seen, and simply looked up after that. The levels may also be set on the
+    loggers named, so that they create the records, and later restored.
+    """
+
+    def __init__(self, overrides, default_level):
+        """
+        Compile the levels.
+
+        :param Mapping[str, int] overrides: level by logger name, applying to
+            the logger and its descendants
+        :param int default_level: level for every other logger
+        """
+        super(LevelOverrideFilter, self).__init__()
+        self.overrides = dict(overrides)
+        self.default_level = default_level
+        self._levels = {}
+        self._levels_set = False
+
+    @property
+    def min_level(self):
+        """
+        Finest level that the filter lets through for any logger.
+
+        :return int: lowest of the levels
+        """
+        return min([self.default_level] + list(self.overrides.values()))
+
+    def level_for(self, name):
+        """
+        Determine the level for a logger.
+
+        :param str name: name of the logger
+        :return int: the logger's level
+        """
+        level = self._levels.get(name)
+        if level is None:
+            level = self.default_level
+            parts = name.split(".")
+            for i in range(len(parts), 0, -1):
+                prefix = ".".join(parts[:i])
+                if prefix in self.overrides:
+                    level = self.overrides[prefix]
+                    break
+            self._levels[name] = level
+        return level
+
+    def set_logger_levels(self):
+        """ Set the levels on the loggers named, noting those they replace. """
+        with _REPLACED_LEVELS_LOCK:
+            if self._levels_set:
+                return
+            self._levels_set = True
+            for name, level in self.overrides.items():
+                logger = logging.getLogger(name)
+                replaced = _REPLACED_LEVELS.setdefault(name, [logger.level, 0])
+                replaced[1] += 1
+                logger.setLevel(level)
+
+    def restore_logger_levels(self):
+        """
+        Give the loggers named back the levels they had before any filter set
+        them, unless another filter still overrides them.
+        """
+        with _REPLACED_LEVELS_LOCK:
+            if not self._levels_set:
+                return
+            self._levels_set = False
+            for name in self.overrides:
+                replaced = _REPLACED_LEVELS[name]
+                replaced[1] -= 1
+                if not replaced[1]:
+                    del _REPLACED_LEVELS[name]
+                    logging.getLogger(name).setLevel(replaced[0])
+
+    def set_default_level(self, level):
+        """
+        Change the level for loggers without one of their own.
+
+        :param int level: the new default level
+        """
+        self.default_level = level
+        self._levels = {}
+
+    def filter(self, record):
+        """
+        Determine whether a record is at or above its logger's level.
+
+        :param logging.LogRecord record: the record in question
+        :return bool: whether to emit the record
+        """
+        level = self._levels.get(record.name)
+        if level is None:
+            level = self.level_for(record.name)
+        return record.levelno >= level
@@ -0,0 +1,187 @@
+"""
+Formatters for log records, and the cache through which handlers share them.
+
+"""
+
+import json
+import logging
+import time
+from json.encoder import encode_basestring_ascii
+from operator import attrgetter
+from .est import JSON_FORMAT
+
+__all__ = [
+    "FastFormatter",
+    "JsonFormatter",
+    "get_formatter",
+    "get_json_formatter",
+    "JSON_FORMAT",
+    "JSON_FIELDS",
+    "JSON_DEV_FIELDS",
+]
+
+
+JSON_FIELDS = ("time", "level", "name", "message")
+JSON_DEV_FIELDS = JSON_FIELDS + ("module", "lineno")
+
+# Attributes of every record, so not to be treated as 'extra' fields.
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {
+    "asctime",
+    "context",
+    "message",
+}
+
+# How to get a field's value from a record, where that's not simply the
+# record's attribute of the same name.
+_FIELD_GETTERS = {
+    "time": attrgetter("created"),
+    "level": attrgetter("levelname"),
+    "message": logging.LogRecord.getMessage,
+}
+
+_dumps = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+# Formatters in use, shared by every handler with the same configuration.
+_FORMATTERS = {}
+
+
+def _encode(value):
+    """ JSON text for a value, bypassing the general encoder when possible. """
+    kind = type(value)
+    if kind is str:
+        return encode_basestring_ascii(value)
+    if kind is int:
+        return int.__repr__(value)
+    if value is None:
+        return "null"
+    return _dumps(value)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatter that renders each record as one compact line of JSON.
+
+    The fields to include are fixed when the formatter's created, so each
+    record is written straight to text, without building a dict for it.
+    Attributes added to a record (e.g., by logging with 'extra') follow the
+    fixed fields, as do any exception traceback, as 'exc_info', any stack
+    trace, as 'stack_info', and any fields from logmuse.context.
+    """
+
+    def __init__(self, fields=JSON_FIELDS, datefmt=None):
+        """
+        Compile the field list.
+
+        :param Iterable[str] fields: names of the fields to include; besides
+            'time' (seconds since the epoch), 'level', and 'message', each is
+            the name of a log record attribute, e.g. 'module' or 'lineno'.
+        :param str datefmt: not used, but accepted for compatibility with
+            logging.Formatter
+        """
+        super(JsonFormatter, self).__init__(datefmt=datefmt)
+        self.fields = tuple(fields)
+        self._compiled = tuple(
+            (encode_basestring_ascii(f) + ":", _FIELD_GETTERS.get(f, attrgetter(f)))
+            for f in self.fields
+        )
+
+    def format(self, record):
+        """
+        Render a record as JSON text.
+
+        :param logging.LogRecord record: the record to format
+        :return str: JSON object text for the record
+        """
+        parts = [key + _encode(get(record)) for key, get in self._compiled]
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            parts.append('"exc_info":' + _encode(record.exc_text))
+        if record.stack_info:
+            parts.append('"stack_info":' + _encode(self.formatStack(record.stack_info)))
+        # Fields from logmuse.context, rendered in advance
+        context = getattr(getattr(record, "context", None), "json", None)
+        if context:
+            parts.append(context)
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                parts.append(encode_basestring_ascii(key) + ":" + _encode(value))
+        return "{" + ",".join(parts) + "}"
+
+
+class FastFormatter(logging.Formatter):
+    """
+    Formatter that avoids repeating per-record work that needn't be repeated.
+
+    Whether the template uses the time is determined once, rather than for
+    each record, and the formatted time is reused for every record logged in
+    the same second.
+    """
+
+    def __init__(self, fmt=None, datefmt=None, style="%"):
+        """
+        Compile the template.
+
+        :param str fmt: message format/template
+        :param str datefmt: format/template for time component of a record
+        :param str style: formatting style of the template: '%', '{', or '$'
+        """
+        super(FastFormatter, self).__init__(fmt, datefmt, style)
+        self._uses_time = self._style.usesTime()
+        self._last_time = (None, None, None)
+
+    def usesTime(self):
+        """
+        Determine whether the template includes the time.
+
+        :return bool: whether the template includes the time
+        """
+        return self._uses_time
+
+    def formatTime(self, record, datefmt=None):
+        """
+        Render the time at which a record was created.
+
+        :param logging.LogRecord record: the record being formatted
+        :param str datefmt: format/template for the time
+        :return str: text representation of the record's time
+        """
+        second = int(record.created)
+        last_second, last_datefmt, text = self._last_time
+        if second != last_second or datefmt != last_datefmt:
+            ct = self.converter(record.created)
+            text = time.strftime(datefmt or self.default_time_format, ct)
+            self._last_time = (second, datefmt, text)
+        if datefmt or not self.default_msec_format:
+            return text
+        return self.default_msec_format % (text, record.msecs)
+
+
+def get_formatter(fmt=None, datefmt=None, style="%"):
+    """
+    Get the shared formatter for a template, creating it if needed.
+
+    :param str fmt: message format/template
+    :param str datefmt: format/template for time component of a record
+    :param str style: formatting style of the template: '%', '{', or '$'
+    :return FastFormatter: formatter for the given configuration
+    """
+    key = (fmt, datefmt, style)
+    try:
+        return _FORMATTERS[key]
+    except KeyError:
+        return _FORMATTERS.setdefault(key, FastFormatter(fmt, datefmt, style))
+
+
+def get_json_formatter(fields=JSON_FIELDS):
+    """
+    Get the shared JSON formatter for a list of fields, creating it if needed.
+
+    :param Iterable[str] fields: names of the fields to include
+    :return JsonFormatter: formatter for the given fields
+    """
+    key = (JSON_FORMAT, tuple(fields))
+    try:
+        return _FORMATTERS[key]
+    except KeyError:
+        return _FORMATTERS.setdefault(key, JsonFormatter(fields))
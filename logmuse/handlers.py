@@ -0,0 +1,327 @@
+"""
+Handlers that move the cost of emitting log records off the caller's path.
+
+These are installed by init_logger when requested; the handlers that actually
+write (to a stream or a file) are built there as usual and then handed to one
+of these to own.
+
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+import weakref
+from collections import deque
+from .est import (
+    DEFAULT_QUEUE_SIZE,
+    DEFAULT_RECORDER_CAPACITY,
+    OVERFLOW_BLOCK,
+    OVERFLOW_DROP_NEWEST,
+    OVERFLOW_DROP_OLDEST,
+    OVERFLOW_POLICIES,
+)
+
+__all__ = [
+    "PropagatingHandler",
+    "QueueingHandler",
+    "RingBufferHandler",
+    "dump_flight_recorder",
+]
+
+
+# Queueing handlers with a running listener, so that a forked child process
+# can be given listeners of its own (threads don't survive a fork).
+_ACTIVE_QUEUEING_HANDLERS = weakref.WeakSet()
+
+
+class QueueingHandler(logging.handlers.QueueHandler):
+    """
+    Handler that hands records to a background thread for emission.
+
+    Records go into a bounded in-memory queue, drained by a listener thread
+    that owns the handlers that do the actual writing. What happens when the
+    queue is full is determined by the overflow policy: block the caller until
+    there's room, discard the oldest queued record, or discard the new one.
+    Discarded records are counted in the 'dropped' attribute.
+    """
+
+    def __init__(
+        self, handlers, queue_size=DEFAULT_QUEUE_SIZE, overflow=OVERFLOW_BLOCK
+    ):
+        """
+        Create the queue and start the thread that drains it.
+
+        :param Iterable[logging.Handler] handlers: handlers to which the
+            listener thread should pass each record; these are owned by this
+            handler from here on, and closed along with it.
+        :param int queue_size: maximum number of records to hold in the queue;
+            nonpositive means unbounded.
+        :param str overflow: policy for a full queue; one of OVERFLOW_POLICIES
+        :raise ValueError: if the overflow policy is unknown
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                "Invalid overflow policy ('{}'); choose from: {}".format(
+                    overflow, ", ".join(OVERFLOW_POLICIES)
+                )
+            )
+        super(QueueingHandler, self).__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.dropped = 0
+        self.listener = _QueueListener(self.queue, *handlers)
+        self.listener.start()
+        _ACTIVE_QUEUEING_HANDLERS.add(self)
+
+    @property
+    def handlers(self):
+        """
+        Handlers to which the listener thread passes records.
+
+        :return list[logging.Handler]: handlers owned by this one
+        """
+        return list(self.listener.handlers) if self.listener else []
+
+    def prepare(self, record):
+        """
+        Resolve the message text, deferring formatting and I/O to the listener.
+
+        The message is merged with its arguments here so that arguments which
+        the caller mutates after logging can't change what's written; the rest
+        of the formatting happens on the listener thread.
+
+        :param logging.LogRecord record: record being enqueued
+        :return logging.LogRecord: the same record, with its message resolved
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        """
+        Put a record on the queue, applying the overflow policy if it's full.
+
+        :param logging.LogRecord record: record to enqueue
+        """
+        if self.overflow == OVERFLOW_BLOCK:
+            self.queue.put(record)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                if self.overflow == OVERFLOW_DROP_NEWEST:
+                    self._count_dropped()
+                    return
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                continue
+            self.queue.task_done()
+            self._count_dropped()
+
+    def flush(self):
+        """ Block until every record enqueued so far has been emitted. """
+        if self.listener is not None:
+            self.queue.join()
+            for h in self.listener.handlers:
+                h.flush()
+
+    def close(self):
+        """ Drain the queue, stop the listener, and close owned handlers. """
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            _ACTIVE_QUEUEING_HANDLERS.discard(self)
+            listener.stop()
+            for h in listener.handlers:
+                h.close()
+        super(QueueingHandler, self).close()
+
+    def _count_dropped(self):
+        # Records may be enqueued from many threads, and not only by handle.
+        with self.lock:
+            self.dropped += 1
+
+    def _restart_after_fork(self):
+        """ Give a forked child a fresh queue and a listener of its own. """
+        if self.listener is None:
+            return
+        self.queue = queue.Queue(self.queue_size)
+        self.listener = _QueueListener(self.queue, *self.listener.handlers)
+        self.listener.start()
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """ Queue listener that won't fail to stop when the queue is full. """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Flight recorder: keeps recent fine-grained records for when they matter.
+
+    Records below the level at which the target handlers emit are kept,
+    unformatted, in a fixed-size buffer, the oldest discarded to make room.
+    When a record at or above the trigger level arrives, or on request, the
+    buffered records are passed to the targets, regardless of their levels
+    and filters.
+    With this handler ahead of the targets on a logger, the context appears
+    just before the record that triggered its release.
+
+    Since formatting is deferred until then, arguments to a logging call
+    shouldn't be mutated after the call.
+    """
+
+    def __init__(
+        self,
+        targets,
+        capacity=DEFAULT_RECORDER_CAPACITY,
+        trigger_level=logging.ERROR,
+        pass_level=logging.INFO,
+        pass_filter=None,
+    ):
+        """
+        Create an empty buffer.
+
+        :param Iterable[logging.Handler] targets: handlers to which to pass
+            the buffered records
+        :param int capacity: maximum number of records to keep
+        :param int trigger_level: level at and above which a record releases
+            the buffered ones
+        :param int pass_level: level from which the targets emit records on
+            their own; only records below it are kept
+        :param logging.Filter pass_filter: filter by which the targets decide
+            which records to emit on their own, such as a LevelOverrideFilter;
+            if given, only records it rejects are kept, and pass_level is
+            ignored
+        """
+        super(RingBufferHandler, self).__init__()
+        self.targets = list(targets)
+        self.buffer = deque(maxlen=capacity)
+        self.trigger_level = trigger_level
+        self.pass_level = pass_level
+        self.pass_filter = pass_filter
+
+    def handle(self, record):
+        """
+        Keep a fine-grained record, or release the buffer for a severe one.
+
+        :param logging.LogRecord record: the record to handle
+        :return bool: whether the record passed this handler's filters
+        """
+        if not self.filter(record):
+            return False
+        if record.levelno >= self.trigger_level:
+            self.dump()
+        elif self.pass_filter is not None:
+            if not self.pass_filter.filter(record):
+                self.buffer.append(record)
+        elif record.levelno < self.pass_level:
+            self.buffer.append(record)
+        return True
+
+    def emit(self, record):
+        self.handle(record)
+
+    def dump(self):
+        """ Pass buffered records, oldest first, to the targets. """
+        with self.lock:
+            while True:
+                try:
+                    record = self.buffer.popleft()
+                except IndexError:
+                    break
+                for t in self.targets:
+                    # Past the target's filters, which might thin out
+                    # the very records that are wanted now.
+                    t.acquire()
+                    try:
+                        t.emit(record)
+                    finally:
+                        t.release()
+
+    def close(self):
+        self.buffer.clear()
+        super(RingBufferHandler, self).close()
+
+
+class PropagatingHandler(logging.Handler):
+    """
+    Handler that passes records on to the handlers of a logger's ancestors.
+
+    It stands in for a logger's own propagation while the logger's level is
+    below the logging level, e.g. so a flight recorder sees finer records.
+    The ancestors then get only what they would have at the logging level:
+    records at or above this handler's level that pass its filters.
+    """
+
+    def __init__(self, logger, level=logging.NOTSET):
+        """
+        Set the logger whose ancestors are to get the records.
+
+        :param logging.Logger logger: logger whose propagation this replaces
+        :param int level: level from which to pass records on
+        """
+        super(PropagatingHandler, self).__init__(level)
+        self.logger = logger
+
+    def handle(self, record):
+        """
+        Pass on a record, if it passes this handler's filters.
+
+        Unlike logging.Handler, this takes no lock; the ancestors' handlers
+        take their own.
+
+        :param logging.LogRecord record: the record to handle
+        :return bool: whether the record passed this handler's filters
+        """
+        rv = self.filter(record)
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record):
+        """
+        Have the ancestors' handlers handle a record, as propagation would.
+
+        :param logging.LogRecord record: the record to pass on
+        """
+        ancestor = self.logger.parent
+        while ancestor is not None:
+            for h in ancestor.handlers:
+                if record.levelno >= h.level:
+                    h.handle(record)
+            ancestor = ancestor.parent if ancestor.propagate else None
+
+
+def dump_flight_recorder(logger):
+    """
+    Release the records a logger's flight recorder is keeping.
+
+    :param logging.Logger | str logger: logger, or name of logger, configured
+        with init_logger(flight_recorder=...)
+    :return int: number of records released
+    """
+    if not isinstance(logger, logging.Logger):
+        logger = logging.getLogger(logger)
+    count = 0
+    for h in logger.handlers:
+        if isinstance(h, RingBufferHandler):
+            count += len(h.buffer)
+            h.dump()
+    return count
+
+
+def _restart_queueing_handlers():
+    for h in list(_ACTIVE_QUEUEING_HANDLERS):
+        h._restart_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_queueing_handlers)
@@ -0,0 +1,397 @@
+"""
+Index a text logfile, so that its records can be found without reading it all.
+
+    python -m logmuse.index build LOGFILE
+    python -m logmuse.index query LOGFILE [--level L] [--name N] [--module M]
+        [--since TIME] [--until TIME]
+
+The logfile's to be in a dev format (DEV_LOGGING_FMT or FULL_DEV_LOGGING_FMT),
+as init_logger writes to a file; lines that don't begin a record, e.g. those of
+a traceback, belong to the record before them. The file's split into blocks of
+records, and the index, a JSON file alongside the logfile, has each block's
+offset and range of record times, and the blocks in which each level, logger
+name, and module appears. A query reads just the blocks that may hold matching
+records. Updating the index reads only what's been added to the file since it
+was last indexed; a file that's been replaced is indexed anew.
+
+"""
+
+import argparse
+import calendar
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from .est import DEFAULT_DATE_FMT, LEVEL_BY_VERBOSITY, _level_value
+
+__all__ = ["build_index", "load_index", "main", "query"]
+
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+DEFAULT_BLOCK_SIZE = 64 * 1024
+FIELDS = ("level", "name", "module")
+
+# Number of leading bytes of the logfile by which to recognize it
+_HEAD_SIZE = 4096
+
+# Start of a record: level name (perhaps cut to 4 letters), time, logger name,
+# module, and line number. A logger name may contain colons, a module not.
+_RECORD_START = re.compile(
+    rb"(?P<level>[A-Z]+) (?P<time>.*?) \| "
+    rb"(?P<name>\S+?):(?P<module>[^:\s]+):(?P<lineno>\d+) > "
+)
+
+# Full level name, by the 4 letters to which DEV_LOGGING_FMT cuts it
+_LEVEL_NAMES = {
+    name[:4]: logging.getLevelName(_level_value(name))
+    for name in LEVEL_BY_VERBOSITY
+}
+
+
+def index_path(path):
+    """
+    Path to the index of a logfile.
+
+    :param str path: path to the logfile
+    :return str: path to the logfile's index
+    """
+    return path + INDEX_SUFFIX
+
+
+def load_index(path):
+    """
+    Read the index of a logfile, if there is one.
+
+    :param str path: path to the logfile
+    :return dict: the index, or None if there's none
+    """
+    try:
+        with open(index_path(path)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return index if index.get("version") == INDEX_VERSION else None
+
+
+def build_index(path, datefmt=None, block_size=None, rebuild=False):
+    """
+    Index a logfile, or bring its index up to date.
+
+    Only what's been written since the index was last updated is read,
+    unless the file's been replaced or cut short, or the index was made with
+    other settings, in which case the file's indexed anew.
+
+    :param str path: path to the logfile
+    :param str datefmt: format of record times in the logfile, as for
+        init_logger; by default, that of the existing index, or
+        DEFAULT_DATE_FMT
+    :param int block_size: number of bytes of records in a block; the
+        smaller, the more precisely a query finds records, and the larger
+        the index. By default, that of the existing index, or
+        DEFAULT_BLOCK_SIZE.
+    :param bool rebuild: whether to index the file anew in any case
+    :return dict: the index, which has been saved alongside the logfile
+    """
+    with open(path, "rb") as f:
+        head = f.read(_HEAD_SIZE)
+        size = os.fstat(f.fileno()).st_size
+        index = None if rebuild else load_index(path)
+        if index is not None:
+            datefmt = datefmt or index["datefmt"]
+            block_size = block_size or index["block_size"]
+        if (
+            index is None
+            or index["datefmt"] != datefmt
+            or index["block_size"] != block_size
+            or index["size"] > size
+            or index["head"] != _fingerprint(head[: index["head_size"]])
+        ):
+            index = {
+                "version": INDEX_VERSION,
+                "datefmt": datefmt or DEFAULT_DATE_FMT,
+                "block_size": block_size or DEFAULT_BLOCK_SIZE,
+                "head_size": 0,
+                "head": _fingerprint(b""),
+                "size": 0,
+                "records": 0,
+                "blocks": [],
+                "fields": {field: {} for field in FIELDS},
+            }
+        if index["size"] < size:
+            _scan(f, index)
+            index["head_size"] = min(len(head), index["size"])
+            index["head"] = _fingerprint(head[: index["head_size"]])
+    tmp = index_path(path) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp, index_path(path))
+    return index
+
+
+def query(
+    path,
+    level=None,
+    name=None,
+    module=None,
+    since=None,
+    until=None,
+    datefmt=None,
+    update=True,
+):
+    """
+    Find the records in a logfile that match all of the given criteria.
+
+    :param str path: path to the logfile
+    :param int | str level: minimal level of a record, by value or name
+    :param str name: name of the logger of a record, or of an ancestor
+    :param str module: name of the module that logged a record
+    :param str since: earliest time of a record, in the logfile's date format
+    :param str until: latest time of a record, in the logfile's date format
+    :param str datefmt: format of record times in the logfile; by default,
+        that of the existing index, or DEFAULT_DATE_FMT
+    :param bool update: whether to bring the index up to date first;
+        otherwise, what's been added to the logfile since it was indexed is
+        disregarded
+    :return Iterable[str]: text of each matching record, including lines
+        that follow the first, in the order logged
+    :raise ValueError: if a time isn't in the given format
+    """
+    index = build_index(path, datefmt) if update else load_index(path)
+    if index is None:
+        index = build_index(path, datefmt)
+    if isinstance(level, str):
+        level = _level_number(level.upper())
+    start = None if since is None else _parse_time(since, index["datefmt"])
+    end = None if until is None else _parse_time(until, index["datefmt"])
+    if (since is not None and start is None) or (until is not None and end is None):
+        raise ValueError(
+            "Times must be in the logfile's date format: {}".format(index["datefmt"])
+        )
+
+    # Narrow down the blocks by what appears in them.
+    fields = index["fields"]
+    candidates = set(range(len(index["blocks"])))
+    for field, accept in (
+        ("level", None if level is None else lambda v: _level_number(v) >= level),
+        ("name", None if name is None else lambda v: _in_family(v, name)),
+        ("module", None if module is None else lambda v: v == module),
+    ):
+        if accept is not None:
+            candidates &= {
+                b for value, blocks in fields[field].items() if accept(value)
+                for b in blocks
+            }
+    blocks = index["blocks"]
+    with open(path, "rb") as f:
+        for b in sorted(candidates):
+            first, last = blocks[b][2], blocks[b][3]
+            if first is not None and (
+                (start is not None and last < start)
+                or (end is not None and first > end)
+            ):
+                continue
+            for values, when, text in _read_block(f, index, b):
+                if level is not None and _level_number(values[0]) < level:
+                    continue
+                if name is not None and not _in_family(values[1], name):
+                    continue
+                if module is not None and values[2] != module:
+                    continue
+                if (start is not None or end is not None) and (
+                    when is None
+                    or (start is not None and when < start)
+                    or (end is not None and when > end)
+                ):
+                    continue
+                yield text
+
+
+def _scan(f, index):
+    """ Index the lines of a logfile from where the index left off. """
+    blocks = index["blocks"]
+    fields = index["fields"]
+    block_size = index["block_size"]
+    datefmt = index["datefmt"]
+    block = blocks[-1] if blocks else None
+    offset = index["size"]
+    records = index["records"]
+    last_time_text, last_time = None, None
+    f.seek(offset)
+    for line in f:
+        if not line.endswith(b"\n"):
+            # Leave a line that's still being written for the next update.
+            break
+        m = _RECORD_START.match(line)
+        if m:
+            if block is None or offset - block[0] >= block_size:
+                block = [offset, 0, None, None]
+                blocks.append(block)
+            block[1] += 1
+            records += 1
+            block_id = len(blocks) - 1
+            for field, value in zip(FIELDS, _record_fields(m)):
+                ids = fields[field].setdefault(value, [])
+                if not ids or ids[-1] != block_id:
+                    ids.append(block_id)
+            time_text = m.group("time")
+            if time_text != last_time_text:
+                last_time_text = time_text
+                last_time = _parse_time(time_text.decode("utf-8", "replace"), datefmt)
+            if last_time is not None:
+                block[2] = last_time if block[2] is None else min(block[2], last_time)
+                block[3] = last_time if block[3] is None else max(block[3], last_time)
+        offset += len(line)
+    index["size"] = offset
+    index["records"] = records
+
+
+def _read_block(f, index, block_id):
+    """
+    Read the records in a block, each with its indexed fields and time.
+
+    Lines that follow the block, up to the start of the next record, belong
+    to its last record; lines that begin it without starting a record belong
+    to the block before it.
+    """
+    blocks = index["blocks"]
+    start = blocks[block_id][0]
+    end = blocks[block_id + 1][0] if block_id + 1 < len(blocks) else index["size"]
+    datefmt = index["datefmt"]
+    f.seek(start)
+    offset = start
+    current = None
+    for line in f:
+        m = _RECORD_START.match(line)
+        if m:
+            if current is not None:
+                yield _finish(current)
+            if offset >= end:
+                return
+            time_text = m.group("time").decode("utf-8", "replace")
+            current = (_record_fields(m), _parse_time(time_text, datefmt), [line])
+        elif current is not None:
+            current[2].append(line)
+        offset += len(line)
+    if current is not None:
+        yield _finish(current)
+
+
+def _finish(record):
+    fields, when, lines = record
+    return fields, when, b"".join(lines).decode("utf-8", "replace").rstrip("\n")
+
+
+def _record_fields(match):
+    level = match.group("level").decode("ascii")
+    return (
+        _LEVEL_NAMES.get(level, level),
+        match.group("name").decode("utf-8", "replace"),
+        match.group("module").decode("utf-8", "replace"),
+    )
+
+
+def _level_number(name):
+    """ Numeric value of a level name, or 0 if it's unknown. """
+    value = logging.getLevelName(_LEVEL_NAMES.get(name, name))
+    return value if isinstance(value, int) else 0
+
+
+def _in_family(name, ancestor):
+    """ Whether a logger name is, or is a descendant of, another. """
+    return name == ancestor or name.startswith(ancestor + ".")
+
+
+def _parse_time(text, datefmt):
+    """ Seconds represented by a record time, or None if it's not parseable. """
+    try:
+        return calendar.timegm(time.strptime(text, datefmt))
+    except ValueError:
+        return None
+
+
+def _fingerprint(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def main(argv=None):
+    """
+    Index or query a logfile named on the command line.
+
+    :param Iterable[str] argv: command-line arguments; by default, those of
+        the current process
+    :return int: exit status
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m logmuse.index",
+        description="Index a logfile, and find records in it by way of the index.",
+    )
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    build_parser = commands.add_parser(
+        "build", help="Index a logfile, or update its index."
+    )
+    query_parser = commands.add_parser(
+        "query", help="Write the records of a logfile that match."
+    )
+    for p in (build_parser, query_parser):
+        p.add_argument("logfile", help="Path to logfile.")
+        p.add_argument(
+            "-d",
+            "--datefmt",
+            help="Format of record time (default: as indexed, or {}).".format(
+                DEFAULT_DATE_FMT.replace("%", "%%")
+            ),
+        )
+    build_parser.add_argument(
+        "-b",
+        "--block-size",
+        type=int,
+        help="Number of bytes of records per block of the index "
+        "(default: as indexed, or {}).".format(DEFAULT_BLOCK_SIZE),
+    )
+    build_parser.add_argument(
+        "--rebuild", action="store_true", help="Index the logfile anew."
+    )
+    query_parser.add_argument("-l", "--level", help="Minimal level of a record.")
+    query_parser.add_argument(
+        "-n", "--name", help="Name of the logger, or of an ancestor of it."
+    )
+    query_parser.add_argument("-m", "--module", help="Name of the module.")
+    query_parser.add_argument("-s", "--since", help="Earliest time of a record.")
+    query_parser.add_argument("-u", "--until", help="Latest time of a record.")
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "build":
+            index = build_index(
+                args.logfile, args.datefmt, args.block_size, args.rebuild
+            )
+            print(
+                "Indexed {} records in {} blocks: {}".format(
+                    index["records"], len(index["blocks"]), index_path(args.logfile)
+                )
+            )
+        else:
+            for text in query(
+                args.logfile,
+                args.level,
+                args.name,
+                args.module,
+                args.since,
+                args.until,
+                args.datefmt,
+            ):
+                sys.stdout.write(text + "\n")
+    except BrokenPipeError:
+        # The reader's gone (e.g., head); don't complain writing at exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except (OSError, ValueError) as e:
+        parser.exit(1, "{}\n".format(e))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,454 @@
+"""
+Measurement of the work done by handlers that init_logger installs.
+
+With init_logger(instrument=True), each handler counts the records it emits
+and drops, by level, and the text it writes, and times its emit, format, and
+flush calls. The results are available from stats(logger).
+
+With init_logger(profile=True), the same sort of measurement is made by call
+site instead: for each line of code and level, the records logged, those that
+were filtered out, and the time spent handling and formatting them. The call
+sites that cost the most are reported by profile_report(logger).
+
+"""
+
+import atexit
+import json
+import logging
+import sys
+import threading
+import time
+
+__all__ = [
+    "CallSiteProfiler",
+    "HandlerStats",
+    "LatencyHistogram",
+    "instrument_handler",
+    "profile_report",
+    "stats",
+]
+
+
+DEFAULT_PROFILE_TOP = 20
+
+# Names of loggers whose stats are to be written at exit, unless the logger's
+# been set up again since without instrumentation.
+_DUMP_AT_EXIT = set()
+# Names of loggers whose call site profiles are to be written at exit, unless
+# the logger's been set up again since without profiling.
+_PROFILE_AT_EXIT = set()
+
+
+class LatencyHistogram(object):
+    """
+    Distribution of durations, in buckets by power of two nanoseconds.
+
+    Bucket i holds durations of at least 2^(i-1) and less than 2^i ns, so
+    recording a duration is just a bit-length calculation and an increment.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * 64
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns):
+        """
+        Record a duration.
+
+        :param int ns: duration in nanoseconds
+        """
+        self.buckets[min(ns.bit_length(), 63)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, p):
+        """
+        Estimate a percentile of the durations recorded.
+
+        :param float p: percentile, between 0 and 100
+        :return int: upper bound of the bucket containing the percentile, in
+            nanoseconds, or 0 if nothing's been recorded
+        """
+        if not self.count:
+            return 0
+        rank = p / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(2 ** i, self.max_ns)
+        return self.max_ns
+
+    def as_dict(self):
+        """
+        Summarize the distribution.
+
+        :return dict: count, mean, median, 99th percentile, and maximum, and
+            the nonempty buckets, keyed by upper bound
+        """
+        return {
+            "count": self.count,
+            "mean_ns": self.total_ns // self.count if self.count else 0,
+            "p50_ns": self.percentile(50),
+            "p99_ns": self.percentile(99),
+            "max_ns": self.max_ns,
+            "buckets": {2 ** i: n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class HandlerStats(object):
+    """ Counts and timings for one handler. """
+
+    def __init__(self, handler):
+        """
+        Start with nothing counted or timed.
+
+        :param logging.Handler handler: the handler being measured
+        """
+        self.handler = handler
+        self.emitted = {}
+        self.dropped = {}
+        self.bytes = 0
+        self.emit = LatencyHistogram()
+        self.format = LatencyHistogram()
+        self.flush = LatencyHistogram()
+        self.lock = threading.Lock()
+
+    def as_dict(self):
+        """
+        Summarize the counts and timings.
+
+        :return dict: records emitted and dropped by level name, text written,
+            and emit, format, and flush latency distributions
+        """
+        with self.lock:
+            result = {
+                "emitted": dict(self.emitted),
+                "dropped": dict(self.dropped),
+                "bytes": self.bytes,
+                "emit": self.emit.as_dict(),
+                "format": self.format.as_dict(),
+                "flush": self.flush.as_dict(),
+            }
+        # Records a queueing handler discarded because its queue was full.
+        overflow = getattr(self.handler, "dropped", None)
+        if overflow is not None:
+            result["overflow_dropped"] = overflow
+        return result
+
+
+def instrument_handler(handler):
+    """
+    Make a handler count and time its work.
+
+    The handler's handle, emit, format, and flush methods are replaced on the
+    instance by versions that measure the originals; the handler's type and
+    other behavior are unchanged.
+
+    :param logging.Handler handler: the handler to instrument
+    :return HandlerStats: the handler's stats, also available as its 'stats'
+        attribute
+    """
+    if getattr(handler, "stats", None) is not None:
+        return handler.stats
+    stats = HandlerStats(handler)
+    clock = time.perf_counter_ns
+    handle, emit, fmt, flush = (
+        handler.handle,
+        handler.emit,
+        handler.format,
+        handler.flush,
+    )
+    terminator_size = len(getattr(handler, "terminator", ""))
+
+    def timed_handle(record):
+        rv = handle(record)
+        counts = stats.emitted if rv else stats.dropped
+        with stats.lock:
+            counts[record.levelname] = counts.get(record.levelname, 0) + 1
+        return rv
+
+    def timed_emit(record):
+        start = clock()
+        try:
+            emit(record)
+        finally:
+            elapsed = clock() - start
+            with stats.lock:
+                stats.emit.add(elapsed)
+
+    def timed_format(record):
+        start = clock()
+        text = fmt(record)
+        elapsed = clock() - start
+        with stats.lock:
+            stats.format.add(elapsed)
+            stats.bytes += len(text) + terminator_size
+        return text
+
+    def timed_flush():
+        start = clock()
+        try:
+            flush()
+        finally:
+            elapsed = clock() - start
+            with stats.lock:
+                stats.flush.add(elapsed)
+
+    handler.handle = timed_handle
+    handler.emit = timed_emit
+    handler.format = timed_format
+    handler.flush = timed_flush
+    handler.stats = stats
+    return stats
+
+
+def iter_handlers(handlers):
+    """
+    Iterate over handlers, including those owned by queueing handlers.
+
+    :param Iterable[logging.Handler] handlers: handlers to search
+    :return Iterable[logging.Handler]: each handler, followed by any it owns
+    """
+    for h in handlers:
+        yield h
+        for owned in iter_handlers(getattr(h, "handlers", ())):
+            yield owned
+
+
+def _label(handler):
+    """ Text by which to identify a handler. """
+    dest = getattr(handler, "baseFilename", None)
+    if dest is None:
+        stream = getattr(handler, "stream", None)
+        dest = getattr(stream, "name", None)
+    kind = type(handler).__name__
+    return kind if dest is None else "{}({})".format(kind, dest)
+
+
+def stats(logger):
+    """
+    Get counts and timings for the instrumented handlers of a logger.
+
+    :param logging.Logger | str logger: logger, or name of logger, configured
+        with init_logger(instrument=True)
+    :return dict[str, dict]: stats by handler, identified by type and
+        destination
+    """
+    if not isinstance(logger, logging.Logger):
+        logger = logging.getLogger(logger)
+    result = {}
+    for h in iter_handlers(logger.handlers):
+        if getattr(h, "stats", None) is None:
+            continue
+        label = _label(h)
+        if label in result:
+            label = "{} #{}".format(label, len(result))
+        result[label] = h.stats.as_dict()
+    return result
+
+
+def dump_stats_at_exit(logger, stream=None):
+    """
+    Write a logger's handler stats, as JSON, when the interpreter exits.
+
+    Nothing's written if the logger's no longer instrumented by then.
+
+    :param logging.Logger logger: the instrumented logger
+    :param file stream: where to write the stats; by default, standard error
+    """
+    if logger.name in _DUMP_AT_EXIT:
+        return
+    _DUMP_AT_EXIT.add(logger.name)
+
+    def dump():
+        result = stats(logger)
+        if result:
+            json.dump(
+                {logger.name: result}, stream or sys.stderr, indent=2, default=str
+            )
+            (stream or sys.stderr).write("\n")
+
+    atexit.register(dump)
+
+
+class CallSiteProfiler(logging.Handler):
+    """
+    Handler that tallies a logger's records, and their cost, by call site.
+
+    Installed ahead of a logger's other handlers, it counts each record that
+    reaches them, by module, line number, and level; with the logger's level
+    at its lowest, and the logging level applied by the handlers, that's
+    every logging call. The handlers it watches
+    count the records they emit, and time handling and formatting them.
+    """
+
+    def __init__(self):
+        super(CallSiteProfiler, self).__init__()
+        # Records, emitted records, and nanoseconds handling and formatting,
+        # by (module, line number, level name)
+        self.sites = {}
+        self._sites_lock = threading.Lock()
+        self._emitted = threading.local()
+
+    def handle(self, record):
+        """
+        Count a record.
+
+        :param logging.LogRecord record: record reaching the logger's handlers
+        :return bool: True
+        """
+        site = self._site(record)
+        with self._sites_lock:
+            site[0] += 1
+        return True
+
+    def emit(self, record):
+        pass
+
+    def watch(self, handler):
+        """
+        Make one of the logger's handlers, and those it owns, report costs.
+
+        :param logging.Handler handler: handler to which the logger passes
+            records
+        """
+        clock = time.perf_counter_ns
+        handle = handler.handle
+
+        def profiled_handle(record):
+            start = clock()
+            rv = handle(record)
+            elapsed = clock() - start
+            site = self._site(record)
+            # A record emitted by several handlers counts once.
+            first = rv and getattr(self._emitted, "record", None) is not record
+            if first:
+                self._emitted.record = record
+            with self._sites_lock:
+                site[2] += elapsed
+                if first:
+                    site[1] += 1
+            return rv
+
+        handler.handle = profiled_handle
+        for h in iter_handlers([handler]):
+            self._watch_format(h)
+
+    def report(self, top=DEFAULT_PROFILE_TOP):
+        """
+        Summarize the costliest call sites.
+
+        :param int top: number of call sites to include
+        :return list[dict]: for each call site, costliest (time handling plus
+            time formatting) first: module, line number, level, and numbers of
+            records logged, emitted, and filtered out, and milliseconds
+            handling and formatting them
+        """
+        with self._sites_lock:
+            sites = [k + tuple(v) for k, v in self.sites.items()]
+        sites.sort(key=lambda s: s[5] + s[6], reverse=True)
+        del sites[top:]
+        return [
+            {
+                "module": module,
+                "lineno": lineno,
+                "level": level,
+                "calls": calls,
+                "emitted": emitted,
+                "filtered": calls - emitted,
+                "handle_ms": handle_ns / 1e6,
+                "format_ms": format_ns / 1e6,
+            }
+            for module, lineno, level, calls, emitted, handle_ns, format_ns in sites
+        ]
+
+    def _site(self, record):
+        key = (record.module, record.lineno, record.levelname)
+        site = self.sites.get(key)
+        if site is None:
+            with self._sites_lock:
+                site = self.sites.setdefault(key, [0, 0, 0, 0])
+        return site
+
+    def _watch_format(self, handler):
+        clock = time.perf_counter_ns
+        fmt = handler.format
+
+        def profiled_format(record):
+            start = clock()
+            text = fmt(record)
+            elapsed = clock() - start
+            site = self._site(record)
+            with self._sites_lock:
+                site[3] += elapsed
+            return text
+
+        handler.format = profiled_format
+
+
+def profile_report(logger, top=DEFAULT_PROFILE_TOP):
+    """
+    Render a table of the costliest call sites for a profiled logger.
+
+    :param logging.Logger | str logger: logger, or name of logger, configured
+        with init_logger(profile=True)
+    :param int top: number of call sites to include
+    :return str: the table, or a note that the logger isn't profiled; the
+        time handling a record includes formatting it, unless formatting's
+        done by a background thread (e.g., in async mode)
+    """
+    if not isinstance(logger, logging.Logger):
+        logger = logging.getLogger(logger)
+    profiler = next(
+        (h for h in logger.handlers if isinstance(h, CallSiteProfiler)), None
+    )
+    if profiler is None:
+        return "Logger '{}' isn't profiled\n".format(logger.name)
+    rows = profiler.report(top)
+    lines = [
+        "Logging cost by call site for '{}' (top {} of {})".format(
+            logger.name, len(rows), len(profiler.sites)
+        ),
+        "{:<32} {:<8} {:>9} {:>9} {:>9} {:>11} {:>11}".format(
+            "site", "level", "calls", "emitted", "filtered", "handle ms", "format ms"
+        ),
+    ]
+    for r in rows:
+        lines.append(
+            "{:<32} {:<8} {:>9} {:>9} {:>9} {:>11.3f} {:>11.3f}".format(
+                "{}:{}".format(r["module"], r["lineno"]),
+                r["level"],
+                r["calls"],
+                r["emitted"],
+                r["filtered"],
+                r["handle_ms"],
+                r["format_ms"],
+            )
+        )
+    return "\n".join(lines) + "\n"
+
+
+def dump_profile_at_exit(logger, stream=None, top=DEFAULT_PROFILE_TOP):
+    """
+    Write a logger's call site profile when the interpreter exits.
+
+    Nothing's written if the logger's no longer profiled by then.
+
+    :param logging.Logger logger: the profiled logger
+    :param file stream: where to write the profile; by default, standard error
+    :param int top: number of call sites to include
+    """
+    if logger.name in _PROFILE_AT_EXIT:
+        return
+    _PROFILE_AT_EXIT.add(logger.name)
+
+    def dump():
+        if any(isinstance(h, CallSiteProfiler) for h in logger.handlers):
+            (stream or sys.stderr).write(profile_report(logger, top))
+
+    atexit.register(dump)
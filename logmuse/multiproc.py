@@ -0,0 +1,139 @@
+"""
+Logging from a pool of worker processes through a single writer.
+
+With init_logger(multiprocess=True), the parent process starts a collector: a
+listener thread that owns the configured handlers and drains a process-shared
+queue. Worker processes call init_worker_logger to send their records to that
+queue, so that each run has one log, in arrival order, with one writer.
+
+"""
+
+import logging
+import logging.handlers
+import multiprocessing
+import os
+from .contextual import ContextFilter
+from .handlers import _QueueListener
+
+__all__ = ["ProcessQueueHandler", "init_worker_logger", "worker_config"]
+
+
+# Configuration for worker loggers, set by the parent's init_logger call and
+# inherited by forked workers; otherwise, pass it along from worker_config().
+_WORKER_CONFIG = None
+
+
+class ProcessQueueHandler(logging.handlers.QueueHandler):
+    """
+    Handler that sends records to the collector in the parent process.
+
+    Records are rendered picklable before they're sent: the message is merged
+    with its arguments and any traceback is rendered as text. In the parent
+    process, the handler also owns the collector's listener, which it stops
+    when it's closed; a copy inherited by a forked worker leaves it alone.
+    """
+
+    def __init__(self, queue, listener=None):
+        """
+        Create the handler, taking ownership of the collector if provided.
+
+        :param multiprocessing.Queue queue: queue shared with the collector
+        :param logging.handlers.QueueListener listener: the collector, if
+            this handler belongs to the process in which it runs
+        """
+        super(ProcessQueueHandler, self).__init__(queue)
+        self.listener = listener
+        self._owner_pid = os.getpid()
+
+    @property
+    def handlers(self):
+        """
+        Handlers that write the records gathered by the collector.
+
+        :return list[logging.Handler]: handlers owned by the collector, empty
+            if this handler doesn't own one
+        """
+        return list(self.listener.handlers) if self.listener else []
+
+    def close(self):
+        """ In the owning process, drain the queue and stop the collector. """
+        listener, self.listener = self.listener, None
+        if listener is not None and os.getpid() == self._owner_pid:
+            listener.stop()
+            for h in listener.handlers:
+                h.close()
+        super(ProcessQueueHandler, self).close()
+
+
+def start_collector(handlers, name, level, propagate=False):
+    """
+    Start gathering records from worker processes into the given handlers.
+
+    :param Iterable[logging.Handler] handlers: handlers that write records;
+        the collector owns these from here on
+    :param str name: name of the logger that workers should configure
+    :param int level: level at which workers should log
+    :param bool propagate: whether the workers' loggers should propagate
+    :return ProcessQueueHandler: handler for the parent's logger, which
+        sends the parent's own records through the collector as well
+    """
+    global _WORKER_CONFIG
+    queue = multiprocessing.Queue(-1)
+    listener = _QueueListener(queue, *handlers)
+    listener.start()
+    _WORKER_CONFIG = {
+        "name": name,
+        "level": level,
+        "propagate": propagate,
+        "queue": queue,
+    }
+    return ProcessQueueHandler(queue, listener)
+
+
+def worker_config():
+    """
+    Get what a worker needs in order to log through the parent's collector.
+
+    Forked workers inherit this, but workers begun by another start method
+    (e.g., spawn) need it passed along, e.g. as an initializer argument
+    for a process pool: Pool(initializer=init_worker_logger,
+    initargs=(worker_config(),))
+
+    :return dict: worker logger configuration, or None if there's no
+        collector running
+    """
+    return _WORKER_CONFIG
+
+
+def init_worker_logger(config=None, name=None):
+    """
+    Configure a worker process's logger to send records to the collector.
+
+    Level and logger name come from the parent's init_logger call; message
+    format, devmode, and destination are applied by the collector, so they
+    match the parent's setup without being repeated here.
+
+    :param dict config: worker logger configuration from worker_config in
+        the parent; by default, use what's been inherited from the parent
+    :param str name: name for the logger, if not the parent's logger name; to
+        reach the collector, this should be beneath the parent's logger or
+        that logger should be configured in the worker too.
+    :return logging.Logger: the worker's configured logger
+    :raise RuntimeError: if no collector configuration is available
+    """
+    config = config or _WORKER_CONFIG
+    if config is None:
+        raise RuntimeError(
+            "No log collector to send records to; use "
+            "init_logger(multiprocess=True) in the parent process first"
+        )
+    logger = logging.getLogger(config["name"] if name is None else name)
+    for h in logger.handlers:
+        h.close()
+    logger.handlers = []
+    handler = ProcessQueueHandler(config["queue"])
+    handler.addFilter(ContextFilter())
+    logger.addHandler(handler)
+    logger.setLevel(config["level"])
+    logger.propagate = config["propagate"]
+    return logger
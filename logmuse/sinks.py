@@ -0,0 +1,900 @@
+"""
+File destinations for log records, for use by init_logger's logfile option.
+
+Each of these is a logging.FileHandler, so it's treated like the plain file
+handler with respect to message format and identification of the logfile.
+
+Text handlers for the same file, e.g. those of several libraries' loggers,
+share one open file and one lock, by way of a registry keyed by the file's
+real path; the file's opened once, and closed when its last handler is. The
+other handlers have their files to themselves, so each is entered in the
+registry as its file's sole user, and a file that's open for one handler
+can't be opened for another of a different kind.
+
+"""
+
+import logging
+import logging.handlers
+import mmap
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from .est import (
+    COMPRESSIONS,
+    DEFAULT_BUFFER_RECORDS,
+    DEFAULT_BUFFER_SIZE,
+    DEFAULT_FLUSH_INTERVAL,
+    DEFAULT_MAP_CHUNK_SIZE,
+    DEFAULT_QUEUE_SIZE,
+    SINK_BUFFERED,
+    SINK_FILE,
+    SINK_MMAP,
+    SINKS,
+)
+
+__all__ = [
+    "BufferedFileHandler",
+    "CompressedFileHandler",
+    "MmapFileHandler",
+    "RotatingFileSink",
+    "SharedFileHandler",
+    "COMPRESSIONS",
+    "SINK_BUFFERED",
+    "SINK_FILE",
+    "SINK_MMAP",
+    "SINKS",
+]
+
+
+DEFAULT_FLUSH_LEVEL = logging.ERROR
+
+# Requests to the compressing thread of a CompressedFileHandler
+_FLUSH = "flush"
+_CLOSE = "close"
+
+# Where supported (Linux), have the pages of each chunk of a mapped file
+# faulted in when it's mapped, rather than one by one as they're written.
+_MAP_POPULATE = getattr(mmap, "MAP_POPULATE", 0)
+
+# Logfiles open for handlers, by real path: shared by text handlers, or held
+# by the one handler that has the file to itself
+_SHARED_FILES = {}
+_SHARED_FILES_LOCK = threading.Lock()
+# Folders known to exist, so that each is checked just once
+_KNOWN_FOLDERS = set()
+
+
+def _ensure_folder(path):
+    """
+    Create the folder for a file, unless it's known to exist.
+
+    :param str path: path to the file, absolute or relative
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    if folder not in _KNOWN_FOLDERS:
+        os.makedirs(folder, exist_ok=True)
+        _KNOWN_FOLDERS.add(folder)
+
+
+def _open_in_folder(path, open_file):
+    """
+    Open a file, creating its folder first unless it's known to exist.
+
+    A folder that's been removed since it was created is created anew.
+
+    :param str path: path to the file, absolute or relative
+    :param function() -> object open_file: function that opens the file
+    :return object: what open_file returns
+    """
+    _ensure_folder(path)
+    try:
+        return open_file()
+    except FileNotFoundError:
+        _KNOWN_FOLDERS.discard(os.path.dirname(os.path.abspath(path)))
+        _ensure_folder(path)
+        return open_file()
+
+
+def _claim_file(path, handler):
+    """
+    Enter a handler in the registry as the sole user of its file.
+
+    :param str path: path to the file
+    :param logging.Handler handler: the handler that's to have the file
+    :return str: the file's real path, by which it's registered
+    :raise ValueError: if the file's open for another handler
+    """
+    key = os.path.realpath(path)
+    with _SHARED_FILES_LOCK:
+        if key in _SHARED_FILES:
+            raise ValueError(
+                "Logfile is already open for another handler: {}".format(path)
+            )
+        _SHARED_FILES[key] = handler
+    return key
+
+
+def _release_file(key, handler):
+    """
+    Remove a handler from the registry as the sole user of its file.
+
+    :param str key: the file's real path, as registered
+    :param logging.Handler handler: the handler that had the file
+    """
+    with _SHARED_FILES_LOCK:
+        if _SHARED_FILES.get(key) is handler:
+            del _SHARED_FILES[key]
+
+
+class _SharedFile(object):
+    """ A logfile that's open for one or more handlers, with their lock. """
+
+    __slots__ = ("key", "stream", "lock", "users")
+
+    def __init__(self, key, stream, lock):
+        self.key = key
+        self.stream = stream
+        self.lock = lock
+        self.users = 0
+
+
+class SharedFileHandler(logging.FileHandler):
+    """
+    File handler that shares its file, and its lock, with others for the file.
+
+    The file's opened by the first handler for it, in that handler's mode, so
+    a later handler for the same file neither truncates it nor opens it
+    again; records from every handler are written through the one stream,
+    a whole record at a time.
+    """
+
+    def __init__(self, filename, mode="w", encoding=None):
+        """
+        Open the file, or take up the stream that's open for it.
+
+        :param str filename: path to the logfile
+        :param str mode: 'w' to start the file anew, 'a' to append to it, if
+            it isn't open already
+        :param str encoding: text encoding for the logfile
+        """
+        super(SharedFileHandler, self).__init__(
+            filename, mode=mode, encoding=encoding, delay=True
+        )
+        self._key = os.path.realpath(self.baseFilename)
+        self._shared = None
+        self.stream = self._open()
+        self.lock = self._shared.lock
+
+    def close(self):
+        """ Flush, and close the file unless another handler's using it. """
+        self.acquire()
+        try:
+            try:
+                if self.stream:
+                    try:
+                        self.flush()
+                    finally:
+                        self.stream = None
+                        self._release()
+            finally:
+                logging.StreamHandler.close(self)
+        finally:
+            self.release()
+
+    def _open(self):
+        """ Take up the stream that's open for the file, or open it. """
+        with _SHARED_FILES_LOCK:
+            shared = _SHARED_FILES.get(self._key)
+            if shared is not None and not isinstance(shared, _SharedFile):
+                raise ValueError(
+                    "Logfile is already open for another handler: {}".format(
+                        self.baseFilename
+                    )
+                )
+            if shared is None:
+                stream = super(SharedFileHandler, self)._open()
+                shared = _SharedFile(self._key, stream, self.lock)
+                _SHARED_FILES[self._key] = shared
+            shared.users += 1
+        self._shared = shared
+        return shared.stream
+
+    def _release(self):
+        shared = self._shared
+        with _SHARED_FILES_LOCK:
+            shared.users -= 1
+            if shared.users:
+                return
+            if _SHARED_FILES.get(shared.key) is shared:
+                del _SHARED_FILES[shared.key]
+        shared.stream.close()
+
+
+class BufferedFileHandler(SharedFileHandler):
+    """
+    File handler that writes formatted records in batches.
+
+    Formatted records accumulate in memory and are written with a single call
+    once there's enough pending text, enough pending records, or the pending
+    text has waited long enough. A record at or above the flush level is
+    written immediately, along with anything pending before it, and the
+    buffer's written out when the handler's flushed or closed, which
+    logging.shutdown does at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        filename,
+        mode="w",
+        encoding=None,
+        buffer_size=DEFAULT_BUFFER_SIZE,
+        buffer_records=DEFAULT_BUFFER_RECORDS,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        flush_level=DEFAULT_FLUSH_LEVEL,
+    ):
+        """
+        Open the file and, if there's a flush interval, start the timer.
+
+        :param str filename: path to the logfile
+        :param str mode: mode in which to open the logfile
+        :param str encoding: text encoding for the logfile
+        :param int buffer_size: number of characters of pending text that
+            triggers a write
+        :param int buffer_records: number of pending records that triggers
+            a write
+        :param float flush_interval: maximum number of seconds for which
+            text may remain pending; nonpositive disables the timer
+        :param int flush_level: minimum level of a record that's written at
+            once, along with everything pending
+        """
+        super(BufferedFileHandler, self).__init__(
+            filename, mode=mode, encoding=encoding
+        )
+        self.buffer_size = buffer_size
+        self.buffer_records = buffer_records
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self._pending = []
+        self._pending_size = 0
+        self._closing = threading.Event()
+        if flush_interval and flush_interval > 0:
+            timer = threading.Thread(
+                target=self._flush_periodically,
+                name="logmuse-flush-{}".format(filename),
+            )
+            timer.daemon = True
+            timer.start()
+
+    def emit(self, record):
+        """
+        Add a formatted record to the buffer, writing the buffer if it's due.
+
+        :param logging.LogRecord record: the record to write
+        """
+        try:
+            msg = self.format(record) + self.terminator
+            self._pending.append(msg)
+            self._pending_size += len(msg)
+            if (
+                record.levelno >= self.flush_level
+                or self._pending_size >= self.buffer_size
+                or len(self._pending) >= self.buffer_records
+            ):
+                self._write_pending()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """ Write out whatever's pending. """
+        with self.lock:
+            self._write_pending()
+            super(BufferedFileHandler, self).flush()
+
+    def close(self):
+        """ Stop the timer, and write out whatever's pending. """
+        self._closing.set()
+        with self.lock:
+            self._write_pending()
+        super(BufferedFileHandler, self).close()
+
+    def _write_pending(self):
+        """ Write and clear the buffer; the caller must hold the lock. """
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        if self.stream is None:
+            if self.mode == "w" and getattr(self, "_closed", False):
+                # Don't reopen, and so truncate, a file that's been closed.
+                return
+            self.stream = self._open()
+        self.stream.write(text)
+        self.stream.flush()
+
+    def _flush_periodically(self):
+        while not self._closing.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                if logging.raiseExceptions:
+                    traceback.print_exc(file=sys.stderr)
+
+
+class RotatingFileSink(logging.handlers.BaseRotatingHandler):
+    """
+    File handler that starts a new file by size, by age, or both.
+
+    At rollover, the current file becomes backup 1, after each existing backup
+    is moved up by one, dropping any beyond the backup count. With no backups,
+    the file's simply emptied. Backups may be compressed, on a background
+    thread so that a logging call doesn't wait for it; only a rollover that
+    comes before the previous backup's compression is done will wait.
+    """
+
+    def __init__(
+        self,
+        filename,
+        mode="a",
+        max_bytes=0,
+        rotate_interval=0,
+        backup_count=0,
+        compress=None,
+        encoding=None,
+    ):
+        """
+        Open the file, noting its size and when it's due for rollover.
+
+        :param str filename: path to the logfile
+        :param str mode: mode in which to open the logfile
+        :param int max_bytes: size at which the file is rolled over, counted
+            in characters (so bytes, for ASCII text); nonpositive for no limit
+        :param float rotate_interval: number of seconds after which the file's
+            rolled over; nonpositive for no limit
+        :param int backup_count: number of rolled-over files to keep
+        :param str compress: how to compress rolled-over files, if at all;
+            one of COMPRESSIONS
+        :param str encoding: text encoding for the logfile
+        :raise ValueError: if the compression method is unknown, or the file's
+            open for another handler
+        :raise ImportError: if the compression method's library isn't installed
+        """
+        if compress is not None:
+            if compress not in COMPRESSIONS:
+                raise ValueError(
+                    "Invalid compression method ('{}'); choose from: {}".format(
+                        compress, ", ".join(COMPRESSIONS)
+                    )
+                )
+            _get_compressed_opener(compress)
+        self._key = _claim_file(filename, self)
+        try:
+            super(RotatingFileSink, self).__init__(filename, mode, encoding=encoding)
+        except Exception:
+            _release_file(self._key, self)
+            raise
+        self.max_bytes = max_bytes or 0
+        self.rotate_interval = rotate_interval or 0
+        self.backup_count = backup_count or 0
+        self.compress = compress
+        self._size = os.path.getsize(self.baseFilename)
+        self._rollover_at = self._next_rollover_time()
+        self._compressor = None
+        self._compressing = None
+
+    def shouldRollover(self, record):
+        """
+        Determine whether the file is due for rollover.
+
+        :param logging.LogRecord record: record about to be written
+        :return bool: whether the file is to be rolled over before writing
+        """
+        if self._rollover_at is not None and record.created >= self._rollover_at:
+            return True
+        return 0 < self.max_bytes <= self._size
+
+    def emit(self, record):
+        """
+        Write a record, rolling the file over first if it's due.
+
+        :param logging.LogRecord record: the record to write
+        """
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(msg)
+            self.flush()
+            self._size += len(msg)
+        except Exception:
+            self.handleError(record)
+
+    def doRollover(self):
+        """ Move the current file to backup, and start a new one. """
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if self._compressing is not None:
+            compressing, self._compressing = self._compressing, None
+            compressing.result()
+        if self.backup_count > 0:
+            suffix = COMPRESSIONS.get(self.compress, "")
+            for i in range(self.backup_count - 1, 0, -1):
+                src = "{}.{}{}".format(self.baseFilename, i, suffix)
+                if os.path.exists(src):
+                    os.replace(src, "{}.{}{}".format(self.baseFilename, i + 1, suffix))
+            backup = self.baseFilename + ".1"
+            if os.path.exists(self.baseFilename):
+                os.replace(self.baseFilename, backup)
+                if self.compress:
+                    if self._compressor is None:
+                        self._compressor = ThreadPoolExecutor(max_workers=1)
+                    self._compressing = self._compressor.submit(
+                        _compress_file, backup, self.compress
+                    )
+        elif os.path.exists(self.baseFilename):
+            os.remove(self.baseFilename)
+        self.stream = self._open()
+        self._size = 0
+        self._rollover_at = self._next_rollover_time()
+
+    def close(self):
+        """ Close the file, waiting for compression of a backup to finish. """
+        super(RotatingFileSink, self).close()
+        _release_file(self._key, self)
+        compressor, self._compressor = self._compressor, None
+        if compressor is not None:
+            compressor.shutdown(wait=True)
+
+    def _next_rollover_time(self):
+        if self.rotate_interval > 0:
+            return time.time() + self.rotate_interval
+        return None
+
+
+class CompressedFileHandler(logging.FileHandler):
+    """
+    File handler that compresses the logfile as it's written.
+
+    A logging call only formats the record and queues the text; a background
+    thread compresses what's queued, in batches, and writes the result. The
+    compressed data are flushed to the file, so that a reader can decompress
+    all of it, once the queue's been idle for the flush interval (at once, if
+    the interval's nonpositive), once the flush interval has passed while
+    records keep arriving, or when a record at or above the flush level
+    arrives. A file that's cut short by a crash is thus readable up to about
+    the last flush. The queue is bounded, so a logging call waits if the
+    compression falls far behind, unless the compressing thread has stopped,
+    in which case records are discarded.
+    """
+
+    def __init__(
+        self,
+        filename,
+        mode="w",
+        compress="gzip",
+        encoding=None,
+        buffer_records=DEFAULT_BUFFER_RECORDS,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        flush_level=DEFAULT_FLUSH_LEVEL,
+        queue_size=DEFAULT_QUEUE_SIZE,
+    ):
+        """
+        Open the file and start the thread that compresses and writes to it.
+
+        :param str filename: path to the logfile
+        :param str mode: 'w' to start the file anew, 'a' to append to it (a
+            new gzip member or zstd frame)
+        :param str compress: compression method; one of COMPRESSIONS
+        :param str encoding: text encoding for the logfile; by default, UTF-8
+        :param int buffer_records: maximum number of records to compress at a
+            time
+        :param float flush_interval: number of seconds for which the queue's
+            idle, or for which records keep arriving, before compressed data
+            are flushed; nonpositive to flush whenever the queue runs dry
+        :param int flush_level: minimum level of a record that's flushed to
+            the file as soon as it's compressed
+        :param int queue_size: maximum number of records awaiting compression
+        :raise ValueError: if the compression method is unknown, or the file's
+            open for another handler
+        :raise ImportError: if the compression method's library isn't installed
+        """
+        compressor = _get_stream_compressor(compress)
+        super(CompressedFileHandler, self).__init__(
+            filename, mode=mode, encoding=encoding, delay=True
+        )
+        self.compress = compress
+        self.buffer_records = buffer_records
+        self.flush_interval = max(flush_interval or 0, 0)
+        self.flush_level = flush_level
+        self._queue = queue.Queue(queue_size)
+        self._key = _claim_file(self.baseFilename, self)
+        try:
+            self._file = open(self.baseFilename, mode.replace("b", "") + "b")
+        except Exception:
+            _release_file(self._key, self)
+            raise
+        self._writer = threading.Thread(
+            target=self._write,
+            args=(compressor,),
+            name="logmuse-compress-{}".format(filename),
+        )
+        self._writer.daemon = True
+        self._writer.start()
+
+    def emit(self, record):
+        """
+        Queue a formatted record for compression.
+
+        :param logging.LogRecord record: the record to write
+        """
+        try:
+            if self._put(self.format(record) + self.terminator):
+                if record.levelno >= self.flush_level:
+                    self._put((_FLUSH, None))
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """ Wait until everything queued has been compressed and written. """
+        writer = self._writer
+        done = threading.Event()
+        if writer is not None and self._put((_FLUSH, done), writer):
+            # Don't wait on a thread that's stopped.
+            while not done.wait(0.1) and writer.is_alive():
+                pass
+
+    def close(self):
+        """ Write everything queued, finish the compressed data, and close. """
+        with self.lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._put((_CLOSE, None), writer)
+            writer.join()
+        _release_file(self._key, self)
+        super(CompressedFileHandler, self).close()
+
+    def _put(self, item, writer=None):
+        """
+        Queue an item for the compressing thread, unless it's stopped.
+
+        :return bool: whether the item was queued
+        """
+        writer = writer or self._writer
+        while writer is not None and writer.is_alive():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _write(self, compressor):
+        """ Compress and write what's queued, until told to close. """
+        compress, sync, finish = compressor
+        encoding = self.encoding or "utf-8"
+        errors = getattr(self, "errors", None) or "backslashreplace"
+        pending = False
+        last_sync = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(
+                    timeout=self.flush_interval if pending else None
+                )
+            except queue.Empty:
+                item = (_FLUSH, None)
+            batch = []
+            while isinstance(item, str):
+                batch.append(item)
+                if len(batch) >= self.buffer_records:
+                    item = None
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            # A failure loses at most a batch; the thread keeps draining the
+            # queue, lest logging calls wait on it forever.
+            try:
+                if batch:
+                    data = "".join(batch).encode(encoding, errors)
+                    self._file.write(compress(data))
+                    pending = True
+                # Compressed data are flushed once the queue's been idle, or
+                # busy, for the flush interval, or when that's requested.
+                if item is None and time.monotonic() - last_sync < self.flush_interval:
+                    continue
+                if item is not None and item[0] == _CLOSE:
+                    try:
+                        self._file.write(finish())
+                    finally:
+                        self._file.close()
+                    return
+                if pending:
+                    self._file.write(sync())
+                    self._file.flush()
+                    pending = False
+                    last_sync = time.monotonic()
+            except Exception:
+                if logging.raiseExceptions:
+                    traceback.print_exc(file=sys.stderr)
+                if item is not None and item[0] == _CLOSE:
+                    return
+            finally:
+                if item is not None and item[1] is not None:
+                    item[1].set()
+
+
+class MmapFileHandler(logging.FileHandler):
+    """
+    File handler that copies formatted records into a memory-mapped logfile.
+
+    The file's extended, and mapped, a large chunk at a time, so writing a
+    record takes no system call, just a copy into memory, and the operating
+    system writes the pages out in its own time. Until the handler's closed,
+    the file ends with the zero bytes of the unused part of its last chunk,
+    as it does for good if the process is killed; what was logged before
+    then is intact, though. The handler has the file to itself.
+    """
+
+    def __init__(
+        self, filename, mode="w", encoding=None, chunk_size=DEFAULT_MAP_CHUNK_SIZE
+    ):
+        """
+        Open and map the logfile.
+
+        :param str filename: path to the logfile
+        :param str mode: 'w' to start the file anew, 'a' to append to it
+        :param str encoding: text encoding for the logfile; by default, UTF-8
+        :param int chunk_size: number of bytes by which to extend the file
+        :raise ValueError: if the file's open for another handler
+        """
+        super(MmapFileHandler, self).__init__(
+            filename, mode=mode, encoding=encoding or "utf-8", delay=True
+        )
+        self.chunk_size = chunk_size
+        self._key = _claim_file(self.baseFilename, self)
+        try:
+            self._writer = _MappedWriter(self.baseFilename, mode, chunk_size)
+        except Exception:
+            _release_file(self._key, self)
+            raise
+
+    def emit(self, record):
+        """
+        Copy a formatted record into the map.
+
+        :param logging.LogRecord record: the record to write
+        """
+        if self._writer.map is None:
+            # Don't reopen, and so truncate, a file that's been closed.
+            return
+        try:
+            msg = self.format(record) + self.terminator
+            # FileHandler has 'errors' only as of Python 3.9.
+            errors = getattr(self, "errors", None) or "strict"
+            self._writer.write(msg.encode(self.encoding, errors))
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """ Write what's been copied into the map through to the file. """
+        with self.lock:
+            self._writer.flush()
+
+    def close(self):
+        """ Unmap the file, and cut off its unused end. """
+        with self.lock:
+            try:
+                self._writer.close()
+            finally:
+                _release_file(self._key, self)
+                logging.StreamHandler.close(self)
+
+
+class _MappedWriter(object):
+    """
+    Append-only writer to a memory-mapped file.
+
+    The file's extended a chunk at a time, and just its end, from where
+    writing's reached, mapped anew, so a write is just a copy into memory, and
+    the cost of growing the file doesn't grow with it. The unused end of the last chunk (zero bytes) is
+    cut off when the writer's closed, or, if it never was, when the file's
+    next appended to.
+    """
+
+    def __init__(
+        self, path, mode="w", chunk_size=DEFAULT_MAP_CHUNK_SIZE, find_end=None
+    ):
+        """
+        Open and map the file.
+
+        :param str path: path to the file
+        :param str mode: 'w' to start the file anew, 'a' to append to it
+        :param int chunk_size: number of bytes by which to extend the file
+        :param function(io.BufferedRandom) -> int find_end: function to find
+            where what was written to a file that's appended to ends; by
+            default, after its last nonzero byte
+        """
+        exists = mode == "a" and os.path.exists(path)
+        self._file = open(path, "r+b" if exists else "w+b")
+        self.position = (find_end or _end_of_text)(self._file) if exists else 0
+        self.chunk_size = chunk_size
+        self.map = None
+        self._capacity = 0
+        # Offset in the file at which the map begins
+        self._offset = 0
+        self._extend(self.position, self.position + chunk_size)
+
+    def reserve(self, size):
+        """
+        Claim space for the next write, extending the file if need be.
+
+        :param int size: number of bytes to claim
+        :return int: offset in the map at which the claimed space begins
+        """
+        start = self.position
+        self.position += size
+        if self.position > self._capacity:
+            self._extend(start, self.position + self.chunk_size)
+        return start - self._offset
+
+    def write(self, data):
+        """
+        Append bytes to the file.
+
+        :param bytes data: bytes to append
+        """
+        start = self.position
+        end = start + len(data)
+        if end > self._capacity:
+            self._extend(start, end + self.chunk_size)
+        self.map[start - self._offset : end - self._offset] = data
+        self.position = end
+
+    def flush(self):
+        """ Write changes in the map through to the file. """
+        if self.map is not None:
+            self.map.flush()
+
+    def close(self):
+        """ Unmap the file, and cut off its unused end. """
+        if self.map is None:
+            return
+        self.map.flush()
+        self.map.close()
+        self.map = None
+        self._file.truncate(self.position)
+        self._file.close()
+
+    def _extend(self, start, size):
+        """
+        Extend the file, and map its end.
+
+        :param int start: offset in the file from which the map must reach
+        :param int size: new size of the file
+        """
+        if self.map is not None:
+            self.map.close()
+        fd = self._file.fileno()
+        # Allocate the chunk's blocks now, rather than on first write to
+        # each page of a sparse file, where the filesystem allows.
+        try:
+            os.posix_fallocate(fd, self._capacity, size - self._capacity)
+        except (AttributeError, OSError):
+            self._file.truncate(size)
+        offset = start - start % mmap.ALLOCATIONGRANULARITY
+        if _MAP_POPULATE:
+            self.map = mmap.mmap(
+                fd,
+                size - offset,
+                flags=mmap.MAP_SHARED | _MAP_POPULATE,
+                offset=offset,
+            )
+        else:
+            self.map = mmap.mmap(fd, size - offset, offset=offset)
+        self._offset = offset
+        self._capacity = size
+
+
+def _end_of_text(f):
+    """
+    Find the end of the text in a file, ahead of any trailing zero bytes.
+
+    :param io.BufferedRandom f: the open file
+    :return int: offset following the last nonzero byte
+    """
+    end = f.seek(0, os.SEEK_END)
+    while end > 0:
+        start = max(0, end - DEFAULT_MAP_CHUNK_SIZE)
+        f.seek(start)
+        text = f.read(end - start).rstrip(b"\0")
+        if text:
+            return start + len(text)
+        end = start
+    return 0
+
+
+def _get_stream_compressor(method):
+    """
+    Get functions with which to compress a stream of data, chunk by chunk.
+
+    :param str method: compression method; one of COMPRESSIONS
+    :return (function(bytes) -> bytes, function() -> bytes, function() -> bytes):
+        functions to compress a chunk, to flush compressed data so far so
+        that it can be decompressed, and to end the compressed data
+    :raise ValueError: if the compression method is unknown
+    :raise ImportError: if the compression method's library isn't installed
+    """
+    if method == "gzip":
+        import zlib
+
+        c = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return (
+            c.compress,
+            lambda: c.flush(zlib.Z_SYNC_FLUSH),
+            lambda: c.flush(zlib.Z_FINISH),
+        )
+    if method == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "Compression method '{}' requires the zstandard package".format(
+                    method
+                )
+            )
+        c = zstandard.ZstdCompressor().compressobj()
+        return (
+            c.compress,
+            lambda: c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            c.flush,
+        )
+    raise ValueError(
+        "Invalid compression method ('{}'); choose from: {}".format(
+            method, ", ".join(COMPRESSIONS)
+        )
+    )
+
+
+def _get_compressed_opener(method):
+    """
+    Get the function with which to open a file for compressed writing.
+
+    :param str method: compression method; one of COMPRESSIONS
+    :return function(str) -> io.BufferedIOBase: function to open a path for
+        writing, with compression
+    :raise ImportError: if the compression method's library isn't installed
+    """
+    if method == "gzip":
+        import gzip
+
+        return lambda path: gzip.open(path, "wb")
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "Compression method '{}' requires the zstandard package".format(method)
+        )
+    return lambda path: zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+
+
+def _compress_file(path, method):
+    """
+    Replace a file with a compressed copy.
+
+    :param str path: path to the file to compress
+    :param str method: compression method; one of COMPRESSIONS
+    """
+    with open(path, "rb") as src, _get_compressed_opener(method)(
+        path + COMPRESSIONS[method]
+    ) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.remove(path)
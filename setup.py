@@ -21,6 +21,11 @@ def read_reqs(reqs_name):
 extra = {}
 
 extra["install_requires"] = []
+extra["extras_require"] = {
+    "toml": ["tomli; python_version < '3.11'"],
+    "yaml": ["pyyaml"],
+    "zstd": ["zstandard"],
+}
 
 with open(os.path.join(PKG, "_version.py"), 'r') as versionfile:
     version = versionfile.readline().split()[-1].strip("\"'\n")
@@ -39,14 +44,19 @@ setup(
     classifiers=[
         "Development Status :: 4 - Beta",
         "License :: OSI Approved :: BSD License",
-        "Programming Language :: Python :: 2.7",
-        "Programming Language :: Python :: 3.5",
-        "Programming Language :: Python :: 3.6",
+        "Programming Language :: Python :: 3",
+        "Programming Language :: Python :: 3 :: Only",
+        "Programming Language :: Python :: 3.8",
+        "Programming Language :: Python :: 3.9",
+        "Programming Language :: Python :: 3.10",
+        "Programming Language :: Python :: 3.11",
+        "Programming Language :: Python :: 3.12",
     ],
     keywords="logging, workflow, logger, logs",
     url="https://github.com/databio/{}/".format(PKG),
     author=u"Vince Reuter, Nathan Sheffield",
     license="BSD-2-Clause",
+    python_requires=">=3.8",
     scripts=None,
     include_package_data=True,
     test_suite="tests",
@@ -63,11 +63,14 @@ def _build_action_usage(act_kind):
     :return function(argparse._StoreAction) -> list[str]: function that when
         given a CLI action will create the representative command line chunks
     """
-    from logmuse.est import _VERBOSITY_CHOICES, VERBOSITY_OPTNAME
     def get_general_use(act):
         name = _get_opt_first_name(act)
-        arg = random.choice(_VERBOSITY_CHOICES) \
-            if name == "--" + VERBOSITY_OPTNAME else _random_chars_option()
+        if act.choices:
+            arg = random.choice(list(act.choices))
+        elif act.type in (int, float):
+            arg = str(random.randint(1, 100))
+        else:
+            arg = _random_chars_option()
         return [name, arg]
     strategies = [
         ((argparse._StoreTrueAction, argparse._StoreFalseAction),
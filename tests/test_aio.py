@@ -0,0 +1,75 @@
+""" Tests for logging from asyncio applications """
+
+import argparse
+import asyncio
+import pytest
+from logmuse import add_logging_options, async_logger_via_cli, \
+    init_async_logger, logger_flush
+from logmuse.est import OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST
+from logmuse.handlers import QueueingHandler
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_init_async_logger_enqueues():
+    """ The logger's only handler is a queueing one, that won't block. """
+    async def main():
+        return await init_async_logger(name="aio-enqueue")
+    log = _run(main())
+    try:
+        assert 1 == len(log.handlers)
+        assert isinstance(log.handlers[0], QueueingHandler)
+        assert OVERFLOW_DROP_OLDEST == log.handlers[0].overflow
+    finally:
+        log.handlers[0].close()
+
+
+def test_overflow_policy_may_be_chosen():
+    """ The overflow policy given is used. """
+    async def main():
+        return await init_async_logger(name="aio-overflow",
+                                       overflow=OVERFLOW_BLOCK)
+    log = _run(main())
+    assert OVERFLOW_BLOCK == log.handlers[0].overflow
+    log.handlers[0].close()
+
+
+@pytest.mark.parametrize("close", [False, True])
+def test_logger_flush_writes_everything(tmpdir, close):
+    """ Once flushed, every record logged is in the file. """
+    fp = tmpdir.join("aio.log").strpath
+
+    async def main():
+        log = await init_async_logger(name="aio-flush", logfile=fp,
+                                      fmt="%(message)s")
+        for i in range(200):
+            log.info("message %d", i)
+        await logger_flush("aio-flush", close=close)
+        return log
+    log = _run(main())
+    with open(fp) as f:
+        lines = [l.rstrip() for l in f if l.startswith("message")]
+    assert ["message {}".format(i) for i in range(200)] == lines
+    assert close == (log.handlers[0].listener is None)
+    log.handlers[0].close()
+
+
+def test_async_logger_via_cli(tmpdir):
+    """ The logging options parsed from the command line apply. """
+    fp = tmpdir.join("cli.log").strpath
+    parser = add_logging_options(argparse.ArgumentParser())
+    opts = parser.parse_args(["--verbosity", "4", "--logformat", "json"])
+
+    async def main():
+        log = await async_logger_via_cli(opts, name="aio-cli", logfile=fp)
+        log.debug("hidden")
+        log.info("shown")
+        await logger_flush("aio-cli", close=True)
+        return log
+    _run(main())
+    with open(fp) as f:
+        lines = f.readlines()
+    assert 1 == len(lines)
+    assert '"message":"shown"' in lines[0]
@@ -0,0 +1,137 @@
+""" Tests for queue-backed, background-thread emission of log records """
+
+import logging
+import threading
+import pytest
+from logmuse import init_logger
+from logmuse.est import OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST, \
+    OVERFLOW_DROP_OLDEST
+from logmuse.handlers import QueueingHandler
+
+
+class _GatedHandler(logging.Handler):
+    """ Handler that holds up the listener thread until its gate opens. """
+
+    def __init__(self):
+        super(_GatedHandler, self).__init__()
+        self.gate = threading.Event()
+        self.messages = []
+
+    def emit(self, record):
+        self.gate.wait()
+        self.messages.append(record.getMessage())
+
+
+def _record(msg):
+    return logging.makeLogRecord({"msg": msg, "levelno": logging.INFO})
+
+
+def test_async_mode_wraps_writing_handlers():
+    """ In async mode the logger has one queueing handler owning the writer. """
+    log = init_logger(name="async-wraps", async_mode=True)
+    try:
+        assert 1 == len(log.handlers)
+        qh = log.handlers[0]
+        assert isinstance(qh, QueueingHandler)
+        assert 1 == len(qh.handlers)
+        assert isinstance(qh.handlers[0], logging.StreamHandler)
+        assert qh.level == qh.handlers[0].level == log.level
+    finally:
+        log.handlers[0].close()
+
+
+def test_async_mode_writes_file(tmpdir):
+    """ Everything logged is in the file once the handler's been closed. """
+    fp = tmpdir.join("async.log").strpath
+    log = init_logger(name="async-file", logfile=fp, async_mode=True)
+    for i in range(100):
+        log.info("message %d", i)
+    log.handlers[0].close()
+    with open(fp) as f:
+        lines = f.readlines()
+    assert 100 == len(lines)
+    assert lines[-1].rstrip().endswith("message 99")
+
+
+def test_message_arguments_are_resolved_on_enqueue():
+    """ Mutating an argument after the call doesn't change what's logged. """
+    hdlr = _GatedHandler()
+    qh = QueueingHandler([hdlr])
+    arg = ["before"]
+    rec = logging.makeLogRecord(
+        {"msg": "%s", "args": (arg,), "levelno": logging.INFO})
+    qh.handle(rec)
+    arg[0] = "after"
+    hdlr.gate.set()
+    qh.close()
+    assert ["['before']"] == hdlr.messages
+
+
+@pytest.mark.parametrize(
+    ["overflow", "exp"],
+    [(OVERFLOW_DROP_NEWEST, ["0", "1", "2"]),
+     (OVERFLOW_DROP_OLDEST, ["0", "3", "4"])])
+def test_overflow_policy(overflow, exp):
+    """ A full queue loses either the incoming or the oldest queued record. """
+    hdlr = _GatedHandler()
+    qh = QueueingHandler([hdlr], queue_size=2, overflow=overflow)
+    qh.handle(_record("0"))
+    # Wait until the listener holds the first record, leaving the queue empty.
+    while not qh.queue.empty():
+        pass
+    for i in range(1, 5):
+        qh.handle(_record(str(i)))
+    assert 2 == qh.dropped
+    hdlr.gate.set()
+    qh.close()
+    assert exp == hdlr.messages
+
+
+def test_drops_counted_across_threads():
+    """ Records dropped by several threads at once are all counted. """
+    hdlr = _GatedHandler()
+    qh = QueueingHandler([hdlr], queue_size=1, overflow=OVERFLOW_DROP_NEWEST)
+    qh.handle(_record("held"))
+    while not qh.queue.empty():
+        pass
+    qh.handle(_record("queued"))
+
+    def drop_many():
+        for _ in range(1000):
+            qh.emit(_record("dropped"))
+
+    threads = [threading.Thread(target=drop_many) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert 8000 == qh.dropped
+    hdlr.gate.set()
+    qh.close()
+
+
+def test_blocking_overflow_loses_nothing():
+    """ With the blocking policy, every record is eventually emitted. """
+    hdlr = _GatedHandler()
+    hdlr.gate.set()
+    qh = QueueingHandler([hdlr], queue_size=1, overflow=OVERFLOW_BLOCK)
+    for i in range(50):
+        qh.handle(_record(str(i)))
+    qh.close()
+    assert 0 == qh.dropped
+    assert [str(i) for i in range(50)] == hdlr.messages
+
+
+def test_invalid_overflow_policy():
+    """ Overflow policy must be one of the known ones. """
+    with pytest.raises(ValueError):
+        QueueingHandler([], overflow="not_a_policy")
+
+
+def test_reinitialization_stops_listener():
+    """ Setting up the same logger again stops the previous listener thread. """
+    log = init_logger(name="async-reinit", async_mode=True)
+    thread = log.handlers[0].listener._thread
+    assert thread.is_alive()
+    init_logger(name="async-reinit")
+    assert not thread.is_alive()
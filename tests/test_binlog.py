@@ -0,0 +1,154 @@
+""" Tests for the binary logfile sink and its decoder """
+
+import io
+import logging
+import os
+import subprocess
+import sys
+import pytest
+from logmuse import init_logger
+from logmuse.binlog import BinaryLogHandler, read_records
+from logmuse.decode import decode
+from logmuse.est import FULL_DEV_LOGGING_FMT
+
+
+def _messages(path):
+    return [r.getMessage() for r in read_records(path)
+            if not r.getMessage().startswith("Configured logger")]
+
+
+@pytest.fixture
+def binlog(tmpdir):
+    """ Path to a binary logfile, and a logger writing to it. """
+    fp = tmpdir.join("log.bin").strpath
+    log = init_logger(name="binlog-test", logfile=fp, sink="binary",
+                      level=logging.DEBUG)
+    yield fp, log
+    for h in log.handlers:
+        h.close()
+
+
+def test_binary_sink_handler(tmpdir):
+    """ The binary sink replaces the text handler for the logfile. """
+    fp = tmpdir.join("log.bin").strpath
+    log = init_logger(name="binlog-sink", logfile=fp, sink="binary")
+    assert 1 == len(log.handlers)
+    assert isinstance(log.handlers[0], BinaryLogHandler)
+    log.handlers[0].close()
+
+
+@pytest.mark.parametrize(
+    ["msg", "args"],
+    [("%s and %d and %.3f", ("text", 42, 2.5)),
+     ("%r %r %r", (None, True, b"raw")),
+     ("%d", (2 ** 80, )),
+     ("no arguments", ()),
+     ("object: %s", (object, )),
+     ("%(key)s", ({"key": "mapped"}, ))])
+def test_round_trip(binlog, msg, args):
+    """ Decoded messages are as they would have been formatted at the time. """
+    fp, log = binlog
+    log.info(msg, *args)
+    log.handlers[0].close()
+    assert [msg % (args[0] if len(args) == 1 and isinstance(args[0], dict)
+                   else args)] == _messages(fp)
+
+
+def test_templates_written_once_per_call_site(binlog):
+    """ Repeat records from a call site don't repeat the template. """
+    fp, log = binlog
+    for i in range(100):
+        log.info("first %d", i)
+    hdlr = log.handlers[0]
+    hdlr.close()
+    assert 2 == len(hdlr._templates)
+    assert ["first {}".format(i) for i in range(100)] == _messages(fp)
+
+
+def test_record_attributes(binlog):
+    """ Level, logger name, source location, and traceback are kept. """
+    fp, log = binlog
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        log.exception("failed")
+    log.handlers[0].close()
+    rec = list(read_records(fp))[-1]
+    assert logging.ERROR == rec.levelno
+    assert "ERROR" == rec.levelname
+    assert "binlog-test" == rec.name
+    assert "test_binlog" == rec.module
+    assert "test_record_attributes" == rec.funcName
+    assert "ZeroDivisionError" in rec.exc_text
+
+
+def test_unclosed_file_is_readable(binlog):
+    """ What was written is readable without the handler having closed. """
+    fp, log = binlog
+    log.info("before %s", "crash")
+    log.handlers[0].flush()
+    assert ["before crash"] == _messages(fp)
+
+
+def test_not_a_binary_logfile(tmpdir):
+    """ A text file is rejected. """
+    fp = tmpdir.join("log.txt")
+    fp.write("text\n")
+    with pytest.raises(ValueError):
+        list(read_records(fp.strpath))
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".zst"])
+def test_compressed_binary_logfile_rejected(tmpdir, suffix):
+    """ A binary logfile isn't written under a compressed file's name. """
+    fp = tmpdir.join("log.bin" + suffix).strpath
+    with pytest.raises(ValueError):
+        init_logger(name="binlog-compressed", logfile=fp, sink="binary")
+    assert not os.path.exists(fp)
+
+
+def test_decode_with_format(binlog):
+    """ Records are rendered with the requested format. """
+    fp, log = binlog
+    log.warning("careful %s", "now")
+    log.handlers[0].close()
+    out = io.StringIO()
+    assert 2 == decode(fp, fmt=FULL_DEV_LOGGING_FMT, out=out)
+    last = out.getvalue().splitlines()[-1]
+    assert last.startswith("WARNING ")
+    assert "binlog-test:test_binlog:" in last
+    assert last.rstrip().endswith("> careful now")
+
+
+def test_decode_cli(binlog):
+    """ The decoder runs as a module, with a named format. """
+    fp, log = binlog
+    log.info("from %s", "cli")
+    log.handlers[0].close()
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.check_output(
+        [sys.executable, "-m", "logmuse.decode", "-f", "basic", fp],
+        cwd=root, universal_newlines=True)
+    assert "from cli" == out.splitlines()[-1]
+
+
+def _crash_after_logging(path, sink, msg):
+    """ Log to a file in another process, which exits without cleaning up. """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import logging, os; from logmuse import init_logger; " \
+        "log = init_logger(name='crashing', logfile={!r}, sink={!r}, " \
+        "fmt='%(message)s', logfile_mode='a'); log.info({!r}); " \
+        "os._exit(0)".format(path, sink, msg)
+    subprocess.check_call([sys.executable, "-c", code], cwd=root)
+
+
+def test_append_after_unclean_exit(tmpdir):
+    """ A later run's records follow those of one that didn't close. """
+    fp = tmpdir.join("crashed.bin").strpath
+    _crash_after_logging(fp, "binary", "first run")
+    assert os.path.getsize(fp) > 1000
+    log = init_logger(name="binlog-after-crash", logfile=fp, sink="binary",
+                      logfile_mode="a")
+    log.info("second run")
+    log.handlers[0].close()
+    assert ["first run", "second run"] == _messages(fp)
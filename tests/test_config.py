@@ -0,0 +1,158 @@
+""" Tests for configuring several loggers at once """
+
+import json
+import logging
+import sys
+import pytest
+from logmuse import init_logger, init_loggers, set_verbosity
+from logmuse.config import load_spec
+
+
+def _spec(logfile):
+    return {
+        "defaults": {"logfile": logfile, "fmt": "%(name)s %(message)s"},
+        "loggers": {
+            "cfgpkg": {"level": "INFO"},
+            "cfgpkg.io": {"level": "DEBUG"},
+            "cfgpkg.db": {"verbosity": 2},
+        },
+    }
+
+
+def _close(loggers):
+    for log in loggers.values():
+        for h in log.handlers:
+            h.close()
+
+
+def test_logfile_handler_shared(tmpdir):
+    """ Loggers writing to the same logfile share one handler for it. """
+    loggers = init_loggers(_spec(tmpdir.join("app.log").strpath))
+    try:
+        handlers = {id(h) for log in loggers.values() for h in log.handlers}
+        assert 1 == len(handlers)
+        assert logging.DEBUG == loggers["cfgpkg"].handlers[0].level
+    finally:
+        _close(loggers)
+
+
+def test_reconfigured_logger_leaves_shared_handler_open(tmpdir):
+    """ Setting up one logger anew doesn't close what another still uses. """
+    fp = tmpdir.join("app.log").strpath
+    spec = {"defaults": {"logfile": fp, "fmt": "%(name)s %(message)s"},
+            "loggers": {"cfgshare.a": {}, "cfgshare.b": {}}}
+    loggers = init_loggers(spec)
+    init_logger("cfgshare.b", stream="OUT")
+    a = loggers["cfgshare.a"]
+    try:
+        a.info("a2")
+    finally:
+        _close({"a": a})
+    with open(fp) as f:
+        assert "cfgshare.a a2" in f.read()
+
+
+def test_set_verbosity_keeps_shared_handler_level(tmpdir):
+    """ Making one logger quieter leaves another's records on the handler. """
+    fp = tmpdir.join("app.log").strpath
+    spec = {"defaults": {"logfile": fp, "fmt": "%(name)s %(message)s"},
+            "loggers": {"cfgverb.app": {"level": "INFO"},
+                        "cfgverb.lib": {"level": "DEBUG"}}}
+    loggers = init_loggers(spec)
+    app, lib = loggers["cfgverb.app"], loggers["cfgverb.lib"]
+    try:
+        set_verbosity(app, "WARN")
+        assert logging.DEBUG == app.handlers[0].level
+        app.info("app info")
+        lib.debug("lib debug")
+        set_verbosity(lib, "ERROR")
+        assert logging.WARNING == lib.handlers[0].level
+    finally:
+        _close(loggers)
+    with open(fp) as f:
+        lines = f.read().splitlines()
+    assert ["cfgverb.lib lib debug"] == \
+        [l for l in lines if "Configured logger" not in l]
+
+
+def test_levels_set_per_logger(tmpdir):
+    """ Each logger filters records by its own level. """
+    fp = tmpdir.join("app.log").strpath
+    loggers = init_loggers(_spec(fp))
+    assert logging.INFO == loggers["cfgpkg"].level
+    assert logging.DEBUG == loggers["cfgpkg.io"].level
+    assert logging.ERROR == loggers["cfgpkg.db"].level
+    for name, log in loggers.items():
+        log.debug("debug")
+        log.warning("warning")
+    _close(loggers)
+    with open(fp) as f:
+        lines = [l.rstrip() for l in f if "Configured" not in l]
+    assert ["cfgpkg warning", "cfgpkg.io debug", "cfgpkg.io warning"] == \
+        sorted(lines)
+
+
+def test_options_inherited_from_ancestors(tmpdir):
+    """ A logger without a destination of its own uses its ancestor's. """
+    fp = tmpdir.join("app.log").strpath
+    loggers = init_loggers({"loggers": {
+        "inherit": {"logfile": fp, "level": "WARNING"},
+        "inherit.child": {"level": "DEBUG"},
+        "inherit.child.tee": {"stream": "OUT"}}})
+    try:
+        assert loggers["inherit"].handlers == loggers["inherit.child"].handlers
+        tee = loggers["inherit.child.tee"]
+        assert logging.DEBUG == tee.level
+        assert 2 == len(tee.handlers)
+        assert tee.handlers[0] is loggers["inherit"].handlers[0]
+        assert sys.stdout is tee.handlers[1].stream
+    finally:
+        _close(loggers)
+
+
+def test_conflicting_logfile_options(tmpdir):
+    """ A logfile's options must be the same for every logger using it. """
+    fp = tmpdir.join("app.log").strpath
+    with pytest.raises(ValueError):
+        init_loggers({"loggers": {"conflict.a": {"logfile": fp},
+                                  "conflict.b": {"logfile": fp,
+                                                 "fmt": "%(message)s"}}})
+
+
+@pytest.mark.parametrize("opt", ["flight_recorder", "multiprocess"])
+def test_unshared_options_rejected(opt):
+    """ Options that tie handlers to one logger aren't allowed. """
+    with pytest.raises(ValueError):
+        init_loggers({"loggers": {"unshared": {opt: 1}}})
+
+
+def test_silent_logger():
+    """ A silent logger gets only a null handler. """
+    loggers = init_loggers({"loggers": {"quiet": {"silent": True}}})
+    assert [logging.NullHandler] == \
+        [type(h) for h in loggers["quiet"].handlers]
+
+
+def test_load_json_and_toml(tmpdir):
+    """ Specs may be read from JSON or TOML files. """
+    pytest.importorskip("tomllib" if sys.version_info >= (3, 11) else "tomli")
+    spec = {"defaults": {"stream": "OUT"}, "loggers": {"a.b": {"level": "DEBUG"}}}
+    jf = tmpdir.join("spec.json")
+    jf.write(json.dumps(spec))
+    tf = tmpdir.join("spec.toml")
+    tf.write('[defaults]\nstream = "OUT"\n\n[loggers."a.b"]\nlevel = "DEBUG"\n')
+    assert spec == load_spec(jf.strpath) == load_spec(tf.strpath)
+
+
+def test_load_yaml(tmpdir):
+    """ Specs may be read from YAML files, with PyYAML. """
+    pytest.importorskip("yaml")
+    yf = tmpdir.join("spec.yaml")
+    yf.write("loggers:\n  a.b:\n    level: DEBUG\n")
+    assert {"loggers": {"a.b": {"level": "DEBUG"}}} == load_spec(yf.strpath)
+
+
+def test_unknown_spec_format(tmpdir):
+    """ Only known file extensions are accepted. """
+    with pytest.raises(ValueError):
+        load_spec(tmpdir.join("spec.ini").strpath)
@@ -0,0 +1,156 @@
+""" Tests for fields that apply to the records logged within a scope """
+
+import asyncio
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from logmuse import context, get_context, init_logger, with_context
+from logmuse.binlog import read_records
+
+
+def _lines(fp):
+    with open(fp) as f:
+        return [l.rstrip() for l in f if "Configured logger" not in l]
+
+
+def _close(log):
+    for h in log.handlers:
+        h.close()
+
+
+def test_context_scopes_nest():
+    """ Inner scopes add to and replace fields, until they end. """
+    assert {} == dict(get_context())
+    with context(run=1, sample="a"):
+        with context(sample="b", worker=2):
+            assert {"run": 1, "sample": "b", "worker": 2} == \
+                dict(get_context())
+        assert {"run": 1, "sample": "a"} == dict(get_context())
+    assert {} == dict(get_context())
+
+
+def test_context_is_read_only():
+    """ The fields in effect can't be changed but by a scope. """
+    with context(run=1):
+        with pytest.raises(TypeError):
+            get_context()["run"] = 2
+
+
+@pytest.mark.parametrize(["kwargs", "exp"], [
+    ({"show_context": True}, ["before", "during run=7 sample=x", "after"]),
+    ({"fmt": "%(message)s [%(context)s]"},
+     ["before []", "during [run=7 sample=x]", "after []"])])
+def test_context_in_text(tmpdir, kwargs, exp):
+    """ Fields follow the message, or go where the format puts them. """
+    fp = tmpdir.join("ctx.log").strpath
+    kwargs.setdefault("fmt", None)
+    log = init_logger(name="ctx-text", logfile=fp, plain_format=True,
+                      **kwargs)
+    log.info("before")
+    with context(run=7, sample="x"):
+        log.info("during")
+    log.info("after")
+    _close(log)
+    assert exp == _lines(fp)
+
+
+def test_show_context_with_format_warns(tmpdir):
+    """ A given format without the fields isn't changed, but is noted. """
+    fp = tmpdir.join("ctx-warn.log").strpath
+    with pytest.warns(UserWarning, match="show_context"):
+        log = init_logger(name="ctx-warn", logfile=fp, fmt="%(message)s",
+                          show_context=True)
+    _close(log)
+
+
+def test_context_in_json(tmpdir):
+    """ Fields are spread into JSON output. """
+    fp = tmpdir.join("ctx.jsonl").strpath
+    log = init_logger(name="ctx-json", logfile=fp, fmt="json")
+    with context(run=7, sample="x"):
+        log.info("during")
+    _close(log)
+    obj = json.loads(_lines(fp)[-1])
+    assert 7 == obj["run"]
+    assert "x" == obj["sample"]
+    assert "context" not in obj
+
+
+def test_context_in_async_mode(tmpdir):
+    """ Fields are taken as the record's logged, not as it's written. """
+    fp = tmpdir.join("ctx-async.log").strpath
+    log = init_logger(name="ctx-async", logfile=fp, async_mode=True,
+                      fmt="%(message)s %(context)s")
+    with context(sample="x"):
+        log.info("queued")
+    _close(log)
+    assert ["queued sample=x"] == _lines(fp)
+
+
+def test_context_follows_asyncio_tasks():
+    """ Each task sees the fields of its own scope. """
+    async def task(name):
+        with context(task=name):
+            await asyncio.sleep(0.01)
+            return dict(get_context())
+
+    async def main():
+        return await asyncio.gather(task("a"), task("b"))
+    assert [{"task": "a"}, {"task": "b"}] == asyncio.run(main())
+
+
+def test_with_context_for_threads():
+    """ A bound function sees the fields in effect where it was bound. """
+    seen = {}
+
+    def work(key):
+        seen[key] = dict(get_context())
+
+    with context(sample="x"):
+        bound = threading.Thread(target=with_context(work), args=("bound",))
+        unbound = threading.Thread(target=work, args=("unbound",))
+    for t in (bound, unbound):
+        t.start()
+        t.join()
+    assert {"bound": {"sample": "x"}, "unbound": {}} == seen
+
+
+def test_with_context_concurrent_calls():
+    """ A bound function may run in several threads at once. """
+    barrier = threading.Barrier(4, timeout=5)
+
+    def work(i):
+        barrier.wait()
+        with context(worker=i):
+            return dict(get_context())
+
+    with context(sample="x"):
+        bound = with_context(work)
+    with ThreadPoolExecutor(4) as pool:
+        seen = list(pool.map(bound, range(4)))
+    assert [{"sample": "x", "worker": i} for i in range(4)] == seen
+
+
+def test_context_in_binary_log(tmpdir):
+    """ Fields are kept, as text, in a binary logfile. """
+    fp = tmpdir.join("ctx.bin").strpath
+    log = init_logger(name="ctx-bin", logfile=fp, sink="binary")
+    with context(sample="x"):
+        log.info("during")
+    log.info("after")
+    _close(log)
+    assert ["sample=x", ""] == [r.context for r in read_records(fp)][-2:]
+
+
+def test_context_with_flight_recorder(tmpdir):
+    """ Records kept by the flight recorder have their fields, too. """
+    fp = tmpdir.join("ctx-recorder.log").strpath
+    log = init_logger(name="ctx-recorder", logfile=fp, level=logging.INFO,
+                      flight_recorder=10, fmt="%(message)s %(context)s")
+    with context(sample="x"):
+        log.debug("detail")
+    log.error("failure")
+    _close(log)
+    assert ["detail sample=x", "failure"] == _lines(fp)
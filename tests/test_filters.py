@@ -0,0 +1,133 @@
+""" Tests for sampling, rate-limiting, and deduplication of fine records """
+
+import logging
+import pytest
+from logmuse import add_logging_options, logger_via_cli
+from logmuse.filters import DedupFilter, RateLimitFilter, SamplingFilter
+
+
+def _record(created=0.0, msg="message", lineno=1, levelno=logging.DEBUG):
+    rec = logging.makeLogRecord(
+        {"msg": msg, "levelno": levelno, "lineno": lineno,
+         "pathname": __file__, "name": "filters"})
+    rec.created = created
+    return rec
+
+
+def test_sampling():
+    """ One in N records from each call site passes, starting with the first. """
+    f = SamplingFilter(3)
+    assert [True, False, False, True, False] == \
+        [f.filter(_record(lineno=1)) for _ in range(5)]
+    assert f.filter(_record(lineno=2))
+
+
+def test_rate_limit():
+    """ Call sites get a burst of records, then their tokens' refill rate. """
+    f = RateLimitFilter(2)
+    assert [True, True, False] == [f.filter(_record(0.0)) for _ in range(3)]
+    assert f.filter(_record(0.0, lineno=2))
+    assert [True, False] == [f.filter(_record(0.5)) for _ in range(2)]
+
+
+def test_dedup():
+    """ Repeats are suppressed within the window, then counted. """
+    f = DedupFilter(10)
+    assert f.filter(_record(0.0))
+    assert not any(f.filter(_record(t)) for t in [1.0, 2.0, 3.0])
+    assert f.filter(_record(0.0, msg="other"))
+    rec = _record(11.0)
+    assert f.filter(rec)
+    assert "message (suppressed 3 repeats)" == rec.getMessage()
+    assert not f.filter(_record(12.0))
+
+
+class _Capture(logging.Handler):
+    """ Handler that keeps the records it's given. """
+
+    def __init__(self):
+        super(_Capture, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_dedup_reported_on_flush():
+    """ Flushing a handler notes repeats in windows that have closed. """
+    f = DedupFilter(10)
+    h = _Capture()
+    h.addFilter(SamplingFilter(2))
+    h.addFilter(f)
+    f.report_to(h)
+    for t in [0.0, 1.0, 2.0]:
+        h.handle(_record(created=t))    # The second isn't sampled.
+    h.flush()
+    assert ["message", "message (suppressed 1 repeats)"] == \
+        [r.getMessage() for r in h.records]
+    assert 1 == h.records[1].suppressed_repeats
+    h.flush()
+    rec = _record(created=20.0)
+    h.handle(rec)
+    assert 2 == len(h.records)
+    assert "message" == rec.getMessage()
+
+
+def test_dedup_reported_on_close(parser, tmpdir):
+    """ Repeats in a window that's still open are noted at closing. """
+    fp = tmpdir.join("dedup.log").strpath
+    opts = add_logging_options(parser).parse_args(
+        ["--logdedup", "60", "--verbosity", "DEBUG"])
+    log = logger_via_cli(opts, name="dedup-close", logfile=fp,
+                         fmt="%(message)s")
+    for _ in range(3):
+        log.debug("again")
+    log.handlers[0].flush()
+    log.handlers[0].close()
+    with open(fp) as f:
+        lines = [l for l in f.read().splitlines() if not l.startswith("Config")]
+    assert ["again", "again (suppressed 2 repeats)"] == lines
+
+
+@pytest.mark.parametrize(
+    "f", [SamplingFilter(2), RateLimitFilter(1), DedupFilter(10)])
+def test_coarse_records_pass(f):
+    """ Records above the filtered level always pass. """
+    assert all(f.filter(_record(levelno=logging.INFO)) for _ in range(5))
+
+
+def test_decision_made_once_per_record():
+    """ A filter shared by handlers decides a record's fate just once. """
+    f = SamplingFilter(2)
+    rec = _record()
+    assert f.filter(rec) and f.filter(rec)
+    rec = _record()
+    assert not f.filter(rec) and not f.filter(rec)
+
+
+@pytest.mark.parametrize(
+    ["kind", "arg"], [(SamplingFilter, 0), (RateLimitFilter, 0),
+                      (DedupFilter, -1)])
+def test_invalid_filter_parameter(kind, arg):
+    """ Filter parameters must be positive. """
+    with pytest.raises(ValueError):
+        kind(arg)
+
+
+def test_filters_via_cli(parser, tmpdir):
+    """ Filters may be configured from the command line. """
+    fp = tmpdir.join("cli.log").strpath
+    opts = add_logging_options(parser).parse_args(
+        ["--logsample", "10", "--verbosity", "DEBUG"])
+    log = logger_via_cli(opts, name="filters-cli", logfile=fp, stream="ERR",
+                         fmt="%(message)s")
+    assert all(isinstance(h.filters[0], SamplingFilter) for h in log.handlers)
+    assert log.handlers[0].filters[0] is log.handlers[1].filters[0]
+    for i in range(100):
+        log.debug("message %d", i)
+    log.info("info")
+    log.handlers[0].close()
+    with open(fp) as f:
+        lines = [l for l in f.read().splitlines() if not l.startswith("Config")]
+    assert ["message {}".format(i) for i in range(0, 100, 10)] + ["info"] == \
+        lines
@@ -0,0 +1,137 @@
+""" Tests for keeping fine-grained records until they're needed """
+
+import logging
+import pytest
+from logmuse import init_logger, dump_flight_recorder
+from logmuse.est import TRACE_LEVEL_VALUE, get_logger
+from logmuse.handlers import RingBufferHandler
+
+
+class _ListHandler(logging.Handler):
+    """ Handler that remembers the messages it emits. """
+
+    def __init__(self, level=logging.INFO):
+        super(_ListHandler, self).__init__(level)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def _record(msg, level):
+    return logging.makeLogRecord({"msg": msg, "levelno": level})
+
+
+def test_fine_records_kept_until_trigger():
+    """ Records below the pass level are released ahead of the trigger. """
+    target = _ListHandler()
+    rb = RingBufferHandler([target], capacity=10)
+    rb.handle(_record("a", logging.DEBUG))
+    rb.handle(_record("b", logging.DEBUG))
+    assert [] == target.messages
+    rb.handle(_record("boom", logging.ERROR))
+    assert ["a", "b"] == target.messages
+    assert 0 == len(rb.buffer)
+
+
+def test_capacity_bounds_buffer():
+    """ Only the most recent records are kept. """
+    target = _ListHandler()
+    rb = RingBufferHandler([target], capacity=3)
+    for i in range(10):
+        rb.handle(_record(str(i), logging.DEBUG))
+    rb.dump()
+    assert ["7", "8", "9"] == target.messages
+
+
+def test_records_targets_emit_are_not_kept():
+    """ What the targets write anyway isn't duplicated by a dump. """
+    target = _ListHandler()
+    rb = RingBufferHandler([target], capacity=10)
+    rb.handle(_record("info", logging.INFO))
+    rb.handle(_record("warn", logging.WARNING))
+    assert 0 == len(rb.buffer)
+
+
+def test_records_passing_level_overrides_not_kept(tmpdir):
+    """ A record a level override lets through isn't written twice. """
+    fp = tmpdir.join("overrides.log").strpath
+    log = init_logger(name="fr", logfile=fp, flight_recorder=10,
+                      fmt="%(message)s", level_overrides="fr.sub=DEBUG")
+    logging.getLogger("fr.sub").debug("sub debug once")
+    log.debug("fr debug kept")
+    log.error("boom")
+    for h in log.handlers:
+        h.close()
+    with open(fp) as f:
+        text = f.read()
+    assert 1 == text.count("sub debug once")
+    assert text.index("fr debug kept") < text.index("boom")
+
+
+@pytest.mark.parametrize("logfile", [False, True])
+def test_init_logger_flight_recorder(tmpdir, logfile):
+    """ With a logfile, TRACE and DEBUG context precede the error in it. """
+    kwargs = {"fmt": "%(message)s"}
+    if logfile:
+        fp = tmpdir.join("recorder.log").strpath
+        kwargs["logfile"] = fp
+    else:
+        kwargs["stream"] = "OUT"
+    log = init_logger(name="recorder-" + str(logfile), level=logging.INFO,
+                      flight_recorder=100, **kwargs)
+    assert TRACE_LEVEL_VALUE == log.level
+    assert isinstance(log.handlers[0], RingBufferHandler)
+    get_logger(log.name).whisper("traced")
+    log.debug("detail")
+    log.info("progress")
+    log.error("failure")
+    if logfile:
+        for h in log.handlers:
+            h.close()
+        with open(fp) as f:
+            lines = [l.rstrip() for l in f
+                     if not l.startswith("Configured logger")]
+        assert ["progress", "traced", "detail", "failure"] == lines
+
+
+def test_dump_flight_recorder_on_request():
+    """ Kept records may be released without an error. """
+    log = init_logger(name="recorder-dump", level=logging.INFO,
+                      flight_recorder=100)
+    target = _ListHandler()
+    log.handlers[0].targets = [target]
+    log.handlers[0].buffer.clear()
+    log.debug("detail")
+    assert 1 == dump_flight_recorder(log)
+    assert ["detail"] == target.messages
+    assert 0 == dump_flight_recorder("recorder-dump")
+
+
+def test_no_flight_recorder_by_default():
+    """ Without the option, the logger's level and handlers are as usual. """
+    log = init_logger(name="recorder-none", level=logging.INFO)
+    assert logging.INFO == log.level
+    assert not any(isinstance(h, RingBufferHandler) for h in log.handlers)
+
+
+@pytest.mark.parametrize("overrides", [None, "fr-parent.child.sub=DEBUG"])
+def test_kept_records_not_propagated(overrides):
+    """ Ancestors get only what the logging level lets through. """
+    parent = logging.getLogger("fr-parent")
+    target = _ListHandler(logging.NOTSET)
+    parent.addHandler(target)
+    try:
+        log = init_logger(name="fr-parent.child", level=logging.INFO,
+                          flight_recorder=10, propagate=True,
+                          level_overrides=overrides)
+        log.debug("kept")
+        get_logger(log.name).whisper("traced")
+        logging.getLogger("fr-parent.child.sub").debug("sub")
+        log.info("progress")
+        log.error("failure")
+    finally:
+        parent.removeHandler(target)
+    exp = ["progress", "failure"] if overrides is None \
+        else ["sub", "progress", "failure"]
+    assert exp == target.messages
@@ -0,0 +1,62 @@
+""" Tests for the shared, faster formatters used by configured handlers """
+
+import logging
+import time
+import pytest
+from logmuse import init_logger
+from logmuse.est import DEFAULT_DATE_FMT, DEV_LOGGING_FMT
+from logmuse.formatters import FastFormatter, get_formatter
+
+
+def _record(created, msg="message"):
+    rec = logging.makeLogRecord({"msg": msg, "levelno": logging.INFO,
+                                 "levelname": "INFO"})
+    rec.created = created
+    rec.msecs = (created - int(created)) * 1000
+    return rec
+
+
+@pytest.mark.parametrize("datefmt", [DEFAULT_DATE_FMT, "%Y-%m-%d %H:%M:%S", None])
+@pytest.mark.parametrize("fmt", [DEV_LOGGING_FMT, "%(asctime)s %(message)s"])
+def test_fast_formatter_matches_standard(fmt, datefmt):
+    """ Output is the same as that of the standard formatter. """
+    fast = FastFormatter(fmt, datefmt)
+    std = logging.Formatter(fmt, datefmt)
+    now = time.time()
+    for created in [now, now + 0.25, now + 1.5, now + 3600]:
+        rec = _record(created)
+        assert std.format(rec) == fast.format(rec)
+
+
+def test_fast_formatter_reuses_time_within_second():
+    """ The time is rendered once per second. """
+    fast = FastFormatter("%(asctime)s", DEFAULT_DATE_FMT)
+    now = float(int(time.time()))
+    first = fast.formatTime(_record(now + 0.1), DEFAULT_DATE_FMT)
+    assert first is fast.formatTime(_record(now + 0.9), DEFAULT_DATE_FMT)
+    assert first is not fast.formatTime(_record(now + 1.1), DEFAULT_DATE_FMT)
+
+
+@pytest.mark.parametrize(
+    ["fmt", "exp"], [("%(message)s", False), ("%(asctime)s", True),
+                     ("{asctime}", True)])
+def test_fast_formatter_uses_time(fmt, exp):
+    """ Whether the time's needed is determined from the template. """
+    style = "{" if fmt.startswith("{") else "%"
+    assert exp is FastFormatter(fmt, style=style).usesTime()
+
+
+def test_formatter_cache():
+    """ Same configuration gives the same formatter; different doesn't. """
+    f = get_formatter(DEV_LOGGING_FMT, DEFAULT_DATE_FMT, "%")
+    assert f is get_formatter(DEV_LOGGING_FMT, DEFAULT_DATE_FMT, "%")
+    assert f is not get_formatter(DEV_LOGGING_FMT, "%H:%M", "%")
+
+
+def test_loggers_share_formatters(tmpdir):
+    """ Handlers of separately configured loggers share formatters. """
+    logs = [init_logger(name="share-{}".format(i), devmode=True,
+                        logfile=tmpdir.join("{}.log".format(i)).strpath,
+                        stream="ERR") for i in range(2)]
+    formatters = {id(h.formatter) for l in logs for h in l.handlers}
+    assert 1 == len(formatters)
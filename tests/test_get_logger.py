@@ -0,0 +1,158 @@
+""" Tests for the custom logger methods, including lazily built messages """
+
+import logging
+import sys
+import pytest
+from logmuse import init_logger, lazy_log
+from logmuse.est import get_logger, LEVEL_BY_VERBOSITY, MuseLogger, \
+    TRACE_LEVEL_VALUE
+
+
+class _Capture(logging.Handler):
+    """ Handler that keeps the records it's given. """
+
+    def __init__(self):
+        super(_Capture, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def capture():
+    """ Logger configured at INFO level, with a handler keeping records. """
+    init_logger(name="lazy", level=logging.INFO)
+    log = get_logger("lazy")
+    hdlr = _Capture()
+    log.addHandler(hdlr)
+    return log, hdlr
+
+
+def _builder(calls):
+    def build():
+        calls.append(1)
+        return "built"
+    return build
+
+
+@pytest.mark.parametrize("method", ["lazy_debug", "lazy_whisper"])
+def test_lazy_message_not_built_when_filtered(capture, method):
+    """ A message for a disabled level is never created. """
+    log, hdlr = capture
+    calls = []
+    getattr(log, method)(_builder(calls))
+    assert [] == calls
+    assert [] == hdlr.records
+
+
+@pytest.mark.parametrize(
+    ["method", "level"],
+    [("lazy_debug", logging.DEBUG), ("lazy_whisper", TRACE_LEVEL_VALUE)])
+def test_lazy_message_built_when_enabled(capture, method, level):
+    """ A message for an enabled level is created and logged. """
+    log, hdlr = capture
+    log.setLevel(level)
+    calls = []
+    getattr(log, method)(_builder(calls))
+    assert [1] == calls
+    assert ["built"] == [r.getMessage() for r in hdlr.records]
+    assert level == hdlr.records[0].levelno
+
+
+def test_reconfiguration_invalidates_enabled_level(capture):
+    """ Once the logger's been set up again, a newly enabled level is used. """
+    log, _ = capture
+    calls = []
+    log.lazy_debug(_builder(calls))
+    init_logger(name="lazy", level=logging.DEBUG)
+    hdlr = _Capture()
+    log.addHandler(hdlr)
+    log.lazy_debug(_builder(calls))
+    assert [1] == calls
+    assert 1 == len(hdlr.records)
+
+
+def test_whisper(capture):
+    """ Whispering logs at TRACE level, and only when that's enabled. """
+    log, hdlr = capture
+    log.whisper("quiet %s", "please")
+    assert [] == hdlr.records
+    log.setLevel(TRACE_LEVEL_VALUE)
+    log.whisper("quiet %s", "please")
+    assert ["quiet please"] == [r.getMessage() for r in hdlr.records]
+    assert TRACE_LEVEL_VALUE == hdlr.records[0].levelno
+
+
+@pytest.mark.parametrize(
+    "call",
+    [lambda l: l.whisper("here"),
+     lambda l: l.lazy_debug(lambda: "here"),
+     lambda l: l.lazy_whisper(lambda: "here"),
+     lambda l: lazy_log(l, logging.DEBUG, lambda: "here")])
+def test_record_attributed_to_caller(capture, call):
+    """ Records identify the calling code rather than logmuse. """
+    log, hdlr = capture
+    log.setLevel(TRACE_LEVEL_VALUE)
+    call(log)
+    assert __file__ == hdlr.records[0].pathname
+
+
+def test_record_lines_and_functions(capture):
+    """ Each record has the line and function from which it was logged. """
+    log, hdlr = capture
+    log.setLevel(TRACE_LEVEL_VALUE)
+
+    def log_each():
+        first = sys._getframe().f_lineno + 1
+        log.whisper("here")
+        log.lazy_debug(lambda: "here")
+        log.lazy_whisper(lambda: "here")
+        lazy_log(log, logging.DEBUG, lambda: "here")
+        return first
+
+    first = log_each()
+    assert [(first + i, "log_each") for i in range(4)] == \
+        [(r.lineno, r.funcName) for r in hdlr.records]
+
+
+def test_loggers_are_muse_loggers():
+    """ Loggers from init_logger, get_logger, and logging have the methods. """
+    assert isinstance(init_logger(name="muse-init"), MuseLogger)
+    assert isinstance(get_logger("muse-get"), MuseLogger)
+    assert isinstance(logging.getLogger("muse-plain"), MuseLogger)
+    assert MuseLogger.whisper is MuseLogger.trace
+
+
+def test_existing_plain_logger_is_equipped():
+    """ A logger created as a plain Logger becomes a MuseLogger. """
+    logging.setLoggerClass(logging.Logger)
+    try:
+        log = logging.getLogger("muse-before")
+    finally:
+        logging.setLoggerClass(MuseLogger)
+    assert type(log) is logging.Logger
+    assert get_logger("muse-before") is log
+    assert isinstance(log, MuseLogger)
+
+
+def test_root_logger_gets_methods():
+    """ The root logger, of its own class, has the methods attached. """
+    root = get_logger("root")
+    assert not isinstance(root, MuseLogger)
+    for method in ["trace", "whisper", "lazy_whisper", "lazy_debug"]:
+        assert callable(getattr(root, method))
+
+
+def test_trace_verbosity(capture):
+    """ The greatest verbosity, or the level's name, enables TRACE. """
+    assert "TRACE" == LEVEL_BY_VERBOSITY[5]
+    for spec in [{"verbosity": 6}, {"verbosity": "trace"},
+                 {"level": "TRACE"}]:
+        log = init_logger(name="lazy", **spec)
+        assert TRACE_LEVEL_VALUE == log.level
+        hdlr = _Capture()
+        log.addHandler(hdlr)
+        log.trace("traced")
+        assert ["traced"] == [r.getMessage() for r in hdlr.records]
+        assert "TRACE" == hdlr.records[0].levelname
@@ -0,0 +1,65 @@
+""" Tests for the cost of importing the package """
+
+import subprocess
+import sys
+import pytest
+import logmuse
+
+# Seconds within which the package, and the names a CLI typically needs from
+# it, should be imported, beyond the cost of importing the logging module.
+IMPORT_BUDGET = 0.05
+
+# Modules that a CLI shouldn't pay for unless using a feature that needs them.
+HEAVY_MODULES = ["concurrent.futures", "json", "logging.handlers",
+                 "multiprocessing", "queue"]
+
+_TYPICAL_IMPORT = "from logmuse import init_logger, add_logging_options"
+
+
+def _run(code):
+    """ Run Python code in a fresh interpreter, returning what it prints. """
+    return subprocess.check_output(
+        [sys.executable, "-c", code], universal_newlines=True).strip()
+
+
+def test_package_import_is_lazy():
+    """ Importing the package imports no submodule beyond the version. """
+    obs = _run("import sys, logmuse; "
+               "print(sorted(m for m in sys.modules if m.startswith('logmuse')))")
+    assert "['logmuse', 'logmuse._version']" == obs
+
+
+@pytest.mark.parametrize("module", HEAVY_MODULES)
+def test_typical_import_avoids_heavy_modules(module):
+    """ The names a CLI typically uses don't require the heavier modules. """
+    obs = _run("import sys; {}; print({!r} in sys.modules)".format(
+        _TYPICAL_IMPORT, module))
+    assert "False" == obs
+
+
+def test_import_time_budget():
+    """ Importing what a CLI typically needs takes little time. """
+    code = ("import logging, time; t = time.perf_counter(); {}; "
+            "print(time.perf_counter() - t)".format(_TYPICAL_IMPORT))
+    obs = min(float(_run(code)) for _ in range(3))
+    assert obs < IMPORT_BUDGET, \
+        "Import took {:.4f}s; budget is {}s".format(obs, IMPORT_BUDGET)
+
+
+@pytest.mark.parametrize("name", logmuse.__all__)
+def test_exported_names_resolve(name):
+    """ Each name the package exports is available from it. """
+    assert getattr(logmuse, name) is not None
+
+
+def test_submodule_attribute():
+    """ A submodule is available as an attribute without importing it. """
+    obs = _run("import logmuse; print(logmuse.est.init_logger.__module__, "
+               "logmuse.sinks.__name__)")
+    assert "logmuse.est logmuse.sinks" == obs
+
+
+def test_unknown_name():
+    """ An unknown name is still an attribute error. """
+    with pytest.raises(AttributeError):
+        logmuse.not_a_real_name
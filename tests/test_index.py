@@ -0,0 +1,126 @@
+""" Tests for indexing text logfiles, and querying them by way of the index """
+
+import logging
+import os
+import subprocess
+import sys
+import pytest
+from logmuse import init_logger
+from logmuse.index import build_index, index_path, load_index, query
+
+
+def _log_lines(fp, lines):
+    with open(fp, "a") as f:
+        for line in lines:
+            f.write(line + "\n")
+
+
+def _line(level, hms, name, module, msg):
+    return "{} {} | {}:{}:1 > {} ".format(level, hms, name, module, msg)
+
+
+@pytest.fixture
+def logfile(tmpdir):
+    """ Logfile with records from a few loggers, modules, levels, and times. """
+    fp = tmpdir.join("run.log").strpath
+    lines = []
+    for i in range(200):
+        name = ["app", "app.io", "other"][i % 3]
+        module = ["main", "reader"][i % 2]
+        level = "ERRO" if i % 50 == 7 else "INFO"
+        lines.append(_line(level, "10:{:02d}:00".format(i // 10), name, module,
+                           "message {}".format(i)))
+    _log_lines(fp, lines)
+    return fp
+
+
+def _numbers(records):
+    return [int(r.split("message ")[1].split()[0]) for r in records]
+
+
+def test_build_index(logfile):
+    """ The index is saved alongside the logfile, its blocks in order. """
+    index = build_index(logfile, block_size=512)
+    assert os.path.isfile(index_path(logfile))
+    assert index == load_index(logfile)
+    assert 200 == index["records"] == sum(b[1] for b in index["blocks"])
+    assert os.path.getsize(logfile) == index["size"]
+    offsets = [b[0] for b in index["blocks"]]
+    assert 1 < len(offsets) and offsets == sorted(offsets)
+    assert {"ERROR", "INFO"} == set(index["fields"]["level"])
+
+
+@pytest.mark.parametrize(["criteria", "exp"], [
+    ({"level": "ERROR"}, [7, 57, 107, 157]),
+    ({"level": logging.ERROR, "module": "reader"}, [7, 57, 107, 157]),
+    ({"level": "WARNING", "name": "other"}, [107]),
+    ({"name": "app", "module": "main", "since": "10:19:00"},
+     [190, 192, 196, 198]),
+    ({"until": "10:00:00"}, list(range(10))),
+])
+def test_query(logfile, criteria, exp):
+    """ Records matching every criterion are found. """
+    build_index(logfile, block_size=512)
+    assert exp == _numbers(query(logfile, **criteria))
+
+
+def test_query_reads_only_candidate_blocks(logfile):
+    """ Blocks without a matching value aren't read. """
+    index = build_index(logfile, block_size=512)
+    errors = index["fields"]["level"]["ERROR"]
+    assert len(errors) < len(index["blocks"])
+
+
+def test_continuation_lines_kept(tmpdir):
+    """ Lines that don't start a record belong to the one before. """
+    fp = tmpdir.join("trace.log").strpath
+    log = init_logger(name="indexed", logfile=fp, level=logging.DEBUG)
+    log.info("before")
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        log.exception("failed")
+    log.info("after")
+    log.handlers[0].close()
+    errors = list(query(fp, level="ERROR"))
+    assert 1 == len(errors)
+    assert "> failed" in errors[0]
+    assert errors[0].rstrip().endswith("ZeroDivisionError: division by zero")
+    assert ["indexed"] == list(load_index(fp)["fields"]["name"])
+
+
+def test_incremental_update(logfile):
+    """ Only what's been added is read; a replaced file is indexed anew. """
+    first = build_index(logfile, block_size=512)
+    _log_lines(logfile, [_line("CRIT", "11:00:00", "app", "main", "message 200"),
+                         "Traceback (most recent call last):"])
+    with open(logfile, "a") as f:
+        f.write("partial")
+    assert [200] == _numbers(query(logfile, level="CRITICAL"))
+    index = load_index(logfile)
+    assert 201 == index["records"]
+    assert first["blocks"][:-1] == index["blocks"][:len(first["blocks"]) - 1]
+    assert os.path.getsize(logfile) - len("partial") == index["size"]
+
+    os.remove(logfile)
+    _log_lines(logfile, [_line("WARN", "12:00:00", "new", "main", "message 0")])
+    index = build_index(logfile, block_size=512)
+    assert 1 == index["records"]
+    assert ["new"] == list(index["fields"]["name"])
+
+
+def test_bad_time(logfile):
+    """ A time that's not in the logfile's format is rejected. """
+    with pytest.raises(ValueError):
+        list(query(logfile, since="yesterday"))
+
+
+def test_index_cli(logfile):
+    """ The tool runs as a module, to build the index and to query it. """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    run = lambda *args: subprocess.check_output(
+        [sys.executable, "-m", "logmuse.index"] + list(args),
+        cwd=root, universal_newlines=True)
+    assert "Indexed 200 records" in run("build", logfile)
+    out = run("query", logfile, "-l", "error", "-n", "app.io")
+    assert [7, 157] == _numbers(out.splitlines())
@@ -0,0 +1,91 @@
+""" Tests for structured, JSON-per-line log output """
+
+import json
+import logging
+import sys
+import pytest
+from logmuse import add_logging_options, init_logger, logger_via_cli
+from logmuse.formatters import JsonFormatter, JSON_DEV_FIELDS, JSON_FIELDS
+
+
+def _record(msg="message %s", args=("text",), **kwargs):
+    data = {"msg": msg, "args": args, "levelno": logging.INFO,
+            "levelname": "INFO", "name": "json"}
+    data.update(kwargs)
+    return logging.makeLogRecord(data)
+
+
+def test_json_fields():
+    """ Each configured field is present, in the configured order. """
+    obs = json.loads(JsonFormatter().format(_record()))
+    assert list(JSON_FIELDS) == list(obs.keys())
+    assert "INFO" == obs["level"]
+    assert "json" == obs["name"]
+    assert "message text" == obs["message"]
+    assert isinstance(obs["time"], float)
+
+
+def test_json_output_is_compact():
+    """ Each record is rendered as a single line, without padding. """
+    text = JsonFormatter().format(_record(msg="two\nlines", args=()))
+    assert "\n" not in text
+    assert ", " not in text and '": ' not in text
+
+
+@pytest.mark.parametrize(
+    "extra", [{"sample": "x"}, {"count": 3, "ratio": 0.5, "ok": True},
+              {"tags": ["a", "b"], "missing": None}])
+def test_json_extra_fields(extra):
+    """ Attributes added to a record are carried through. """
+    obs = json.loads(JsonFormatter().format(_record(**extra)))
+    for k, v in extra.items():
+        assert v == obs[k]
+
+
+def test_json_unserializable_extra():
+    """ An extra value without JSON representation is rendered as text. """
+    obs = json.loads(JsonFormatter().format(_record(thing=object)))
+    assert str(object) == obs["thing"]
+
+
+def test_json_exception():
+    """ Any traceback is included. """
+    try:
+        raise ValueError("bad")
+    except ValueError:
+        rec = _record(exc_info=sys.exc_info())
+    obs = json.loads(JsonFormatter().format(rec))
+    assert "ValueError: bad" in obs["exc_info"]
+
+
+def test_json_stack_info():
+    """ Any stack trace is included. """
+    rec = _record(stack_info="Stack (most recent call last):\n  here")
+    obs = json.loads(JsonFormatter().format(rec))
+    assert "Stack (most recent call last):\n  here" == obs["stack_info"]
+
+
+@pytest.mark.parametrize(
+    ["kwargs", "fields"],
+    [({}, JSON_FIELDS), ({"devmode": True}, JSON_DEV_FIELDS),
+     ({"devmode": True, "plain_format": True}, JSON_FIELDS)])
+def test_init_logger_json(kwargs, fields):
+    """ Format name 'json' gives a JSON formatter, with fields per mode. """
+    log = init_logger(name="json-init", fmt="json", **kwargs)
+    formatter = log.handlers[0].formatter
+    assert isinstance(formatter, JsonFormatter)
+    assert fields == formatter.fields
+
+
+def test_json_via_cli(parser, tmpdir):
+    """ JSON output may be requested from the command line. """
+    fp = tmpdir.join("cli.log").strpath
+    opts = add_logging_options(parser).parse_args(["--logformat", "json"])
+    log = logger_via_cli(opts, name="json-cli", logfile=fp)
+    log.info("hello", extra={"sample": "s1"})
+    log.handlers[0].close()
+    with open(fp) as f:
+        obs = json.loads(f.readline())
+    assert "hello" == obs["message"]
+    assert "s1" == obs["sample"]
+    assert "module" in obs
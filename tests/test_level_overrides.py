@@ -0,0 +1,117 @@
+""" Tests for levels for particular loggers """
+
+import argparse
+import logging
+import pytest
+from logmuse import add_logging_options, init_logger, logger_via_cli, \
+    set_verbosity
+from logmuse.est import _parse_level_overrides
+from logmuse.filters import LevelOverrideFilter
+
+
+class _ListHandler(logging.Handler):
+    """ Handler that remembers the records it emits. """
+
+    def __init__(self):
+        super(_ListHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record.name, record.getMessage()))
+
+
+def _record(name, level):
+    return logging.makeLogRecord({"name": name, "levelno": level})
+
+
+@pytest.mark.parametrize(["text", "exp"], [
+    ("pkg.sub=DEBUG,other=WARN", {"pkg.sub": "DEBUG", "other": "WARN"}),
+    (" a = 10 , ", {"a": "10"})])
+def test_parse_level_overrides(text, exp):
+    """ Pairs are separated by commas, with names and levels by '='. """
+    assert exp == _parse_level_overrides(text)
+
+
+@pytest.mark.parametrize("text", ["pkg", "=DEBUG", "pkg="])
+def test_parse_invalid_level_overrides(text):
+    """ Each pair needs a name and a level. """
+    with pytest.raises(ValueError):
+        _parse_level_overrides(text)
+
+
+@pytest.mark.parametrize(["name", "exp"], [
+    ("pkg", logging.INFO), ("pkg.sub", logging.DEBUG),
+    ("pkg.sub.deep", logging.DEBUG), ("pkg.subtle", logging.INFO),
+    ("pkg.sub.quiet", logging.ERROR), ("other", logging.WARNING)])
+def test_level_for_nearest_ancestor(name, exp):
+    """ The level is that of the nearest overridden ancestor. """
+    f = LevelOverrideFilter({"pkg.sub": logging.DEBUG,
+                             "pkg.sub.quiet": logging.ERROR,
+                             "other": logging.WARNING}, logging.INFO)
+    assert exp == f.level_for(name)
+    assert exp == f.level_for(name)
+    assert f.filter(_record(name, exp))
+    assert not f.filter(_record(name, exp - 1))
+
+
+def test_init_logger_level_overrides():
+    """ One handler serves descendants at their own levels. """
+    log = init_logger(name="ovr", level="INFO",
+                      level_overrides="ovr.hot=DEBUG,ovr.noisy=ERROR")
+    hdlr = log.handlers[0]
+    target = _ListHandler()
+    target.filters = hdlr.filters
+    target.setLevel(hdlr.level)
+    log.handlers = [target]
+    assert logging.DEBUG == target.level
+    assert logging.DEBUG == logging.getLogger("ovr.hot").level
+    assert logging.ERROR == logging.getLogger("ovr.noisy").level
+    for name in ["ovr", "ovr.hot", "ovr.cold", "ovr.noisy"]:
+        l = logging.getLogger(name)
+        l.debug("debug")
+        l.warning("warning")
+    assert [("ovr", "warning"), ("ovr.hot", "debug"), ("ovr.hot", "warning"),
+            ("ovr.cold", "warning")] == target.records
+
+
+def test_logger_via_cli_level_overrides():
+    """ Overrides are parsed from the command line. """
+    parser = add_logging_options(argparse.ArgumentParser())
+    opts = parser.parse_args(["--loglevels", "ovr-cli.sub=DEBUG"])
+    log = logger_via_cli(opts, name="ovr-cli")
+    assert logging.DEBUG == logging.getLogger("ovr-cli.sub").level
+    assert logging.DEBUG == log.handlers[0].level
+    assert logging.INFO == log.level
+
+
+def test_overrides_undone_on_reinitialization():
+    """ Setting a logger up again without overrides restores their levels. """
+    logging.getLogger("ovr-again.kept").setLevel(logging.WARNING)
+    init_logger(name="ovr-again", level="INFO",
+                level_overrides="ovr-again.sub=DEBUG,ovr-again.kept=ERROR")
+    assert logging.DEBUG == logging.getLogger("ovr-again.sub").level
+    assert logging.ERROR == logging.getLogger("ovr-again.kept").level
+    init_logger(name="ovr-again", level="INFO")
+    assert logging.NOTSET == logging.getLogger("ovr-again.sub").level
+    assert logging.WARNING == logging.getLogger("ovr-again.kept").level
+
+
+def test_overrides_kept_while_another_holds_them():
+    """ An override still applied by another logger's handler is kept. """
+    init_logger(name="ovr-one", level_overrides="ovr-both=DEBUG")
+    init_logger(name="ovr-two", level_overrides="ovr-both=DEBUG")
+    init_logger(name="ovr-one")
+    assert logging.DEBUG == logging.getLogger("ovr-both").level
+    init_logger(name="ovr-two")
+    assert logging.NOTSET == logging.getLogger("ovr-both").level
+
+
+def test_set_verbosity_keeps_overrides():
+    """ Changing the logger's level leaves the overridden ones passing. """
+    log = init_logger(name="ovr-live", level="INFO",
+                      level_overrides={"ovr-live.hot": "DEBUG"})
+    set_verbosity(log, 1)
+    assert logging.DEBUG == log.handlers[0].level
+    f = log.handlers[0].filters[0]
+    assert logging.CRITICAL == f.level_for("ovr-live.cold")
+    assert logging.DEBUG == f.level_for("ovr-live.hot")
@@ -8,7 +8,7 @@ import pytest
 from logmuse import add_logging_options, logger_via_cli
 from logmuse.est import AbsentOptionException, LEVEL_BY_VERBOSITY, \
     LOGGING_CLI_OPTDATA, SILENCE_LOGS_OPTNAME, VERBOSITY_OPTNAME, \
-    _MIN_VERBOSITY, _MAX_VERBOSITY
+    _MIN_VERBOSITY, _MAX_VERBOSITY, _REQUIRED_OPTNAMES
 
 
 __author__ = "Vince Reuter"
@@ -33,13 +33,19 @@ def test_opts_not_added(parser, missing, strict):
     assert not hasattr(opts, _rawopt(missing))
     def create_logger():
         return logger_via_cli(opts, strict=strict)
-    if strict:
+    if strict and missing in _REQUIRED_OPTNAMES:
         with pytest.raises(AbsentOptionException):
             create_logger()
     else:
         assert isinstance(create_logger(), logging.Logger)
 
 
+def test_only_original_options_required():
+    """ A namespace with just the original options is enough when strict. """
+    opts = argparse.Namespace(silent=False, verbosity=None, logdev=False)
+    assert isinstance(logger_via_cli(opts, strict=True), logging.Logger)
+
+
 def test_repeat_parser_configuration_is_exceptional(parser):
     """ add_logging_options must be called just once. """
     with pytest.raises(argparse.ArgumentError):
@@ -73,7 +79,7 @@ def test_typical_verbosity(parser, verbosity):
     """ Typical verbosity specifications yield logger with expected level. """
     opts = parser.parse_args([VERBOSITY_OPTNAME, str(verbosity)])
     logger = logger_via_cli(opts)
-    exp = getattr(logging, LEVEL_BY_VERBOSITY[verbosity - 1])
+    exp = logging.getLevelName(LEVEL_BY_VERBOSITY[verbosity - 1])
     _assert_level(logger, exp)
 
 
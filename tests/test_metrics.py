@@ -0,0 +1,185 @@
+""" Tests for counting and timing of the work done by installed handlers """
+
+import logging
+import pytest
+import logmuse
+from logmuse import metrics
+from logmuse import init_logger, set_verbosity
+from logmuse.metrics import CallSiteProfiler, LatencyHistogram, \
+    instrument_handler, profile_report
+
+
+def test_uninstrumented_logger_has_no_stats():
+    """ Instrumentation is opt-in. """
+    log = init_logger(name="uninstrumented")
+    assert {} == logmuse.stats(log)
+    assert not hasattr(log.handlers[0], "stats")
+
+
+def test_instrumented_handler_counts(tmpdir):
+    """ Records emitted and text written are counted, by level. """
+    fp = tmpdir.join("counted.log").strpath
+    log = init_logger(name="counted", logfile=fp, verbosity=4,
+                      fmt="%(message)s", instrument=True)
+    for _ in range(3):
+        log.info("12345")
+    log.warning("1234")
+    obs = logmuse.stats("counted")
+    assert ["SharedFileHandler({})".format(fp)] == list(obs)
+    s = obs["SharedFileHandler({})".format(fp)]
+    assert {"INFO": 3, "WARNING": 1} == s["emitted"]
+    assert 3 * 6 + 5 == s["bytes"]
+    assert 4 == s["emit"]["count"] == s["format"]["count"]
+    assert 4 <= s["flush"]["count"]
+
+
+def test_instrumented_handler_counts_drops():
+    """ Records a handler's filters reject are counted as dropped. """
+    log = init_logger(name="dropping", level=logging.DEBUG, sample=2,
+                      instrument=True)
+    for _ in range(4):
+        log.debug("message")
+    s = list(logmuse.stats(log).values())[0]
+    assert 2 == s["dropped"]["DEBUG"]
+
+
+def test_instrumented_async_handlers():
+    """ A queueing handler and the handlers it owns are all measured. """
+    log = init_logger(name="instrumented-async", async_mode=True,
+                      instrument=True)
+    log.info("message")
+    log.handlers[0].flush()
+    obs = logmuse.stats(log)
+    assert 2 == len(obs)
+    assert all(1 == s["emitted"]["INFO"] for s in obs.values())
+    assert any("overflow_dropped" in s for s in obs.values())
+    log.handlers[0].close()
+
+
+def test_instrumentation_is_idempotent():
+    """ Instrumenting a handler twice doesn't measure it twice. """
+    h = logging.NullHandler()
+    assert instrument_handler(h) is instrument_handler(h)
+
+
+@pytest.mark.parametrize(
+    ["durations", "p", "exp"],
+    [([], 50, 0), ([100] * 10, 50, 100), ([1, 2, 3, 1000], 50, 4),
+     ([1] * 99 + [10 ** 6], 100, 10 ** 6)])
+def test_histogram_percentile(durations, p, exp):
+    """ Percentiles are estimated by bucket upper bound, capped at the max. """
+    h = LatencyHistogram()
+    for d in durations:
+        h.add(d)
+    assert exp == h.percentile(p)
+
+
+@pytest.fixture
+def no_exit_report(monkeypatch):
+    """ Keep profiles from being written when the tests are done. """
+    monkeypatch.setattr(metrics.atexit, "register", lambda func: func)
+
+
+def _profiled_logger(name, **kwargs):
+    return init_logger(name=name, profile=True, stream="OUT", **kwargs)
+
+
+def test_profile_counts_by_call_site(no_exit_report):
+    """ Records are tallied by line and level, emitted or filtered. """
+    log = _profiled_logger("profile-sites", level=logging.INFO, sample=2)
+    profiler = log.handlers[0]
+    assert isinstance(profiler, CallSiteProfiler)
+    for i in range(10):
+        log.info("info %d", i)
+        log.debug("debug %d", i)
+    rows = {(r["level"], r["calls"], r["emitted"], r["filtered"])
+            for r in profiler.report() if r["module"] == "test_metrics"}
+    assert {("INFO", 10, 10, 0), ("DEBUG", 10, 0, 10)} == rows
+
+
+def test_profile_counts_filtered_records(no_exit_report):
+    """ Records that a filter or handler level stops count as filtered. """
+    log = _profiled_logger("profile-filtered", level=logging.DEBUG,
+                           sample=4, flight_recorder=5)
+    for i in range(8):
+        log.debug("debug %d", i)
+    log.handlers[2].setLevel(logging.INFO)
+    log.debug("below handler level")
+    rows = sorted((r["lineno"], r["calls"], r["emitted"], r["filtered"])
+                  for r in log.handlers[0].report()
+                  if r["module"] == "test_metrics")
+    assert [8, 2, 6] == list(rows[0][1:])
+    assert [1, 0, 1] == list(rows[1][1:])
+
+
+def test_profile_counts_records_below_level(no_exit_report, capsys):
+    """ Calls below the logging level are counted, but not written. """
+    log = _profiled_logger("profile-below", level=logging.INFO)
+    for i in range(100):
+        log.debug("debug %d", i)
+    rows = [(r["calls"], r["emitted"], r["filtered"])
+            for r in log.handlers[0].report()
+            if r["module"] == "test_metrics"]
+    assert [(100, 0, 100)] == rows
+    assert "debug" not in capsys.readouterr().out
+
+
+def test_profile_keeps_level_with_verbosity(no_exit_report):
+    """ Changing the verbosity of a profiled logger changes what's written. """
+    log = _profiled_logger("profile-verbosity", level=logging.INFO)
+    set_verbosity(log, level=logging.DEBUG)
+    assert 1 == log.level
+    assert logging.DEBUG == log.handlers[1].level
+
+
+def test_profile_records_below_level_not_propagated(no_exit_report):
+    """ Ancestors of a profiled logger get only what's at the level. """
+    parent = logging.getLogger("profile-parent")
+    seen = []
+    hdlr = logging.Handler()
+    hdlr.emit = lambda r: seen.append(r.getMessage())
+    parent.addHandler(hdlr)
+    try:
+        log = _profiled_logger("profile-parent.child", level=logging.INFO,
+                               propagate=True)
+        log.debug("detail")
+        log.info("progress")
+    finally:
+        parent.removeHandler(hdlr)
+    assert ["progress"] == seen
+
+
+def test_no_exit_report_once_unprofiled(monkeypatch, capsys):
+    """ A logger set up again without profiling isn't reported at exit. """
+    at_exit = []
+    monkeypatch.setattr(metrics.atexit, "register", at_exit.append)
+    monkeypatch.setattr(metrics, "_PROFILE_AT_EXIT", set())
+    _profiled_logger("profile-then-not")
+    init_logger(name="profile-then-not", stream="OUT")
+    capsys.readouterr()
+    for dump in at_exit:
+        dump()
+    assert "" == capsys.readouterr().err
+
+
+def test_profile_times_handling_and_formatting(no_exit_report):
+    """ Time handling and formatting a record is attributed to its site. """
+    log = _profiled_logger("profile-times")
+    log.info("timed")
+    row = [r for r in log.handlers[0].report()
+           if r["module"] == "test_metrics"][0]
+    assert row["handle_ms"] >= row["format_ms"] > 0
+
+
+def test_profile_report_table(no_exit_report):
+    """ The report lists the costliest sites first, up to the number asked. """
+    log = _profiled_logger("profile-report")
+    for _ in range(3):
+        log.info("cheap")
+    log.info("costly %s", "x" * 100000)
+    lines = profile_report(log, top=1).splitlines()
+    assert 3 == len(lines)
+    assert "top 1 of" in lines[0]
+    assert lines[2].startswith("test_metrics:")
+    assert "Logger 'unprofiled' isn't profiled" == \
+        profile_report("unprofiled").strip()
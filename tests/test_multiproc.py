@@ -0,0 +1,79 @@
+""" Tests for logging from worker processes through the parent's collector """
+
+import logging
+import multiprocessing
+import pytest
+from logmuse import init_logger, init_worker_logger, worker_config
+from logmuse import multiproc
+from logmuse.multiproc import ProcessQueueHandler
+
+fork_only = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="Workers need to be forked")
+
+
+def _work(i):
+    log = init_worker_logger()
+    log.info("worker message %d", i)
+    log.debug("filtered message %d", i)
+    return i
+
+
+def _close(log):
+    for h in log.handlers:
+        h.close()
+
+
+def test_multiprocess_installs_collector(tmpdir):
+    """ The parent's logger gets a handler that owns the collector. """
+    fp = tmpdir.join("collector.log").strpath
+    log = init_logger(name="mp-collector", logfile=fp, multiprocess=True)
+    try:
+        assert 1 == len(log.handlers)
+        h = log.handlers[0]
+        assert isinstance(h, ProcessQueueHandler)
+        assert isinstance(h.handlers[0], logging.FileHandler)
+        cfg = worker_config()
+        assert "mp-collector" == cfg["name"]
+        assert log.level == cfg["level"]
+    finally:
+        _close(log)
+
+
+@fork_only
+def test_workers_write_one_log(tmpdir):
+    """ Records from the parent and its workers end up in the one file. """
+    fp = tmpdir.join("workers.log").strpath
+    log = init_logger(name="mp-workers", logfile=fp, multiprocess=True,
+                      fmt="%(message)s")
+    log.info("parent start")
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        assert list(range(20)) == pool.map(_work, range(20))
+    log.info("parent end")
+    _close(log)
+    with open(fp) as f:
+        lines = f.read().splitlines()
+    assert "parent start" == lines[0]
+    assert "parent end" == lines[-1]
+    assert {"worker message {}".format(i) for i in range(20)} == \
+        set(lines[1:-1])
+
+
+def test_worker_logger_without_collector(monkeypatch):
+    """ A worker can't be set up before the parent's collector exists. """
+    monkeypatch.setattr(multiproc, "_WORKER_CONFIG", None)
+    with pytest.raises(RuntimeError):
+        init_worker_logger()
+
+
+def test_worker_logger_takes_parent_settings():
+    """ The worker's logger gets its name and level from the parent. """
+    log = init_logger(name="mp-settings", verbosity=2, multiprocess=True)
+    try:
+        worker_log = init_worker_logger(worker_config())
+        assert "mp-settings" == worker_log.name
+        assert logging.ERROR == worker_log.level
+        assert isinstance(worker_log.handlers[0], ProcessQueueHandler)
+        assert worker_log.handlers[0].listener is None
+    finally:
+        _close(log)
@@ -0,0 +1,126 @@
+""" Tests for changing a logger's level while it's in use """
+
+import logging
+import os
+import signal
+import time
+import pytest
+from logmuse import init_logger, set_verbosity, step_verbosity, \
+    watch_control_file, watch_signals
+from logmuse.control import ControlFileWatcher
+from logmuse.est import TRACE_LEVEL_VALUE
+
+
+def _levels(log):
+    return log.level, [h.level for h in log.handlers]
+
+
+def test_set_verbosity_keeps_handlers_and_file(tmpdir):
+    """ The handlers and logfile remain, with what's been written. """
+    fp = tmpdir.join("live.log").strpath
+    log = init_logger(name="live-file", logfile=fp, fmt="%(message)s",
+                      verbosity=3)
+    handlers = list(log.handlers)
+    log.info("hidden")
+    log.warning("before")
+    assert logging.DEBUG == set_verbosity(log, 5)
+    log.debug("after")
+    assert handlers == log.handlers
+    assert (logging.DEBUG, [logging.DEBUG]) == _levels(log)
+    log.handlers[0].close()
+    with open(fp) as f:
+        assert ["before", "after"] == \
+            [l.strip() for l in f if "Configured" not in l]
+
+
+@pytest.mark.parametrize(["verbosity", "level", "exp"], [
+    ("debug", None, logging.DEBUG), (None, "ERROR", logging.ERROR),
+    (1, None, logging.CRITICAL), (None, 15, 15)])
+def test_set_verbosity_or_level(verbosity, level, exp):
+    """ Verbosity and level are accepted as for init_logger. """
+    log = init_logger(name="live-level", stream="OUT")
+    assert exp == set_verbosity("live-level", verbosity, level)
+    assert (exp, [exp]) == _levels(log)
+
+
+def test_set_verbosity_async_mode():
+    """ The handlers owned by a queueing handler are adjusted, too. """
+    log = init_logger(name="live-async", async_mode=True)
+    try:
+        set_verbosity(log, 5)
+        assert [logging.DEBUG] == [h.level for h in log.handlers[0].handlers]
+        assert logging.DEBUG == log.handlers[0].level
+    finally:
+        log.handlers[0].close()
+
+
+def test_set_verbosity_with_flight_recorder():
+    """ The recorder keeps its level; the logger's stays low enough for it. """
+    log = init_logger(name="live-recorder", level=logging.INFO,
+                      flight_recorder=10)
+    set_verbosity(log, level=logging.WARNING)
+    recorder, writer = log.handlers
+    assert logging.WARNING == recorder.pass_level == writer.level
+    assert recorder.level == log.level < logging.DEBUG
+
+
+@pytest.mark.parametrize(["start", "steps", "exp"], [
+    (logging.INFO, 1, logging.DEBUG), (logging.INFO, -1, logging.WARNING),
+    (logging.INFO, -10, logging.CRITICAL),
+    (logging.DEBUG, 1, TRACE_LEVEL_VALUE), (logging.INFO, 5, TRACE_LEVEL_VALUE),
+    (15, -1, logging.INFO), (logging.INFO, 0, logging.INFO)])
+def test_step_verbosity(start, steps, exp):
+    """ Steps are between the levels that verbosity expresses. """
+    log = init_logger(name="live-step", level=start)
+    assert exp == step_verbosity(log, steps)
+    assert exp == log.level
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="No SIGUSR1")
+def test_watch_signals():
+    """ The user signals step the verbosity up and down. """
+    log = init_logger(name="live-signal", level=logging.INFO)
+    previous = signal.getsignal(signal.SIGUSR1), signal.getsignal(signal.SIGUSR2)
+    watch_signals(log)
+    try:
+        os.kill(os.getpid(), signal.SIGUSR1)
+        assert logging.DEBUG == log.level
+        os.kill(os.getpid(), signal.SIGUSR2)
+        os.kill(os.getpid(), signal.SIGUSR2)
+        assert logging.WARNING == log.level
+    finally:
+        signal.signal(signal.SIGUSR1, previous[0])
+        signal.signal(signal.SIGUSR2, previous[1])
+
+
+def test_control_file(tmpdir):
+    """ A change to the control file sets the verbosity. """
+    ctl = tmpdir.join("verbosity")
+    ctl.write("1")
+    log = init_logger(name="live-control", level=logging.INFO)
+    watcher = ControlFileWatcher(log, ctl.strpath)
+    assert not watcher.check()
+    assert logging.INFO == log.level
+    ctl.write("DEBUG\n")
+    os.utime(ctl.strpath, ns=(0, 1))
+    assert watcher.check()
+    assert logging.DEBUG == log.level
+    ctl.write("junk")
+    assert not watcher.check()
+    assert logging.DEBUG == log.level
+
+
+def test_watch_control_file_thread(tmpdir):
+    """ The watching thread applies changes, and stops on request. """
+    ctl = tmpdir.join("verbosity")
+    log = init_logger(name="live-control-thread", level=logging.INFO)
+    watcher = watch_control_file(log, ctl.strpath, interval=0.01)
+    try:
+        ctl.write("2")
+        deadline = time.time() + 5
+        while log.level != logging.ERROR and time.time() < deadline:
+            time.sleep(0.01)
+        assert logging.ERROR == log.level
+    finally:
+        watcher.stop()
+    assert not watcher.is_alive()
@@ -0,0 +1,469 @@
+""" Tests for the alternative logfile destinations """
+
+import argparse
+import gzip
+import logging
+import mmap
+import os
+import subprocess
+import sys
+import time
+import zlib
+import pytest
+from logmuse import add_logging_options, init_logger, logger_via_cli
+from logmuse import sinks
+from logmuse.est import DEFAULT_MAP_CHUNK_SIZE
+from logmuse.sinks import BufferedFileHandler, CompressedFileHandler, \
+    MmapFileHandler, RotatingFileSink, SharedFileHandler, SINK_BUFFERED
+
+
+def _read(fp):
+    with open(fp) as f:
+        return f.read()
+
+
+def _buffered_logger(fp, name, **kwargs):
+    return init_logger(name=name, logfile=fp, sink=SINK_BUFFERED, **kwargs)
+
+
+def test_buffered_sink_is_file_handler(tmpdir):
+    """ The buffered sink stands in for the plain file handler. """
+    fp = tmpdir.join("buffered.log").strpath
+    log = _buffered_logger(fp, "buffered-kind")
+    assert 1 == len(log.handlers)
+    h = log.handlers[0]
+    assert isinstance(h, BufferedFileHandler)
+    assert fp == h.stream.name
+
+
+def test_buffered_sink_holds_records_until_flush(tmpdir):
+    """ Records below the thresholds aren't written until a flush. """
+    fp = tmpdir.join("held.log").strpath
+    log = _buffered_logger(fp, "buffered-held", flush_interval=0,
+                           fmt="%(message)s")
+    log.info("first")
+    log.info("second")
+    assert "" == _read(fp)
+    log.handlers[0].flush()
+    assert ["first", "second"] == _read(fp).split()
+
+
+@pytest.mark.parametrize(
+    ["kwargs", "count"],
+    [({"buffer_records": 3}, 3), ({"buffer_size": 25}, 3)])
+def test_buffered_sink_thresholds(tmpdir, kwargs, count):
+    """ Reaching the record count or text size threshold triggers a write. """
+    fp = tmpdir.join("thresholds.log").strpath
+    log = _buffered_logger(
+        fp, "buffered-thresholds", flush_interval=0, fmt="%(message)s",
+        **kwargs)
+    for i in range(count - 1):
+        log.info("message %d", i)
+    assert "" == _read(fp)
+    log.info("message %d", count - 1)
+    assert count == len(_read(fp).splitlines())
+
+
+def test_buffered_sink_writes_errors_at_once(tmpdir):
+    """ An error is written immediately, along with what preceded it. """
+    fp = tmpdir.join("errors.log").strpath
+    log = _buffered_logger(fp, "buffered-errors", flush_interval=0,
+                           fmt="%(message)s")
+    log.info("context")
+    log.error("failure")
+    assert ["context", "failure"] == _read(fp).split()
+
+
+def test_buffered_sink_timer(tmpdir):
+    """ Pending records are written once they've waited for the interval. """
+    fp = tmpdir.join("timer.log").strpath
+    h = BufferedFileHandler(fp, flush_interval=0.01)
+    h.handle(logging.makeLogRecord({"msg": "late", "levelno": logging.INFO}))
+    h._closing.wait(0.5)
+    try:
+        assert "late" == _read(fp).strip()
+    finally:
+        h.close()
+
+
+def test_buffered_sink_close_writes_pending(tmpdir):
+    """ Closing the handler writes out the buffer. """
+    fp = tmpdir.join("close.log").strpath
+    log = _buffered_logger(fp, "buffered-close", flush_interval=0)
+    log.info("pending")
+    log.handlers[0].close()
+    assert "pending" in _read(fp)
+
+
+def test_invalid_sink():
+    """ The logfile sink must be one of the known kinds. """
+    with pytest.raises(ValueError):
+        init_logger(sink="not_a_sink")
+
+
+def _rotating_logger(fp, name, **kwargs):
+    return init_logger(name=name, logfile=fp, fmt="%(message)s", **kwargs)
+
+
+def test_rotation_by_size(tmpdir):
+    """ Once the file reaches its size limit, it's moved to a backup. """
+    fp = tmpdir.join("sized.log").strpath
+    log = _rotating_logger(fp, "rotate-size", max_bytes=30, backup_count=2)
+    assert isinstance(log.handlers[0], RotatingFileSink)
+    for i in range(9):
+        log.info("message %d", i)    # 10 characters per line
+    log.handlers[0].close()
+    assert ["message 6", "message 7", "message 8"] == _read(fp).split("\n")[:-1]
+    assert "message 3" == _read(fp + ".1").splitlines()[0]
+    assert "message 0" == _read(fp + ".2").splitlines()[0]
+    assert not os.path.exists(fp + ".3")
+
+
+def test_rotation_by_time(tmpdir):
+    """ Once the file's old enough, it's moved to a backup. """
+    fp = tmpdir.join("timed.log").strpath
+    log = _rotating_logger(fp, "rotate-time", rotate_interval=60,
+                           backup_count=1)
+    log.info("old")
+    log.handlers[0]._rollover_at = 0
+    log.info("new")
+    log.handlers[0].close()
+    assert "new" == _read(fp).strip()
+    assert "old" == _read(fp + ".1").strip()
+
+
+def test_rotation_without_backups(tmpdir):
+    """ With no backups to keep, the file is emptied at rollover. """
+    fp = tmpdir.join("nobackup.log").strpath
+    log = _rotating_logger(fp, "rotate-none", max_bytes=10)
+    for i in range(3):
+        log.info("message %d", i)
+    log.handlers[0].close()
+    assert "message 2" == _read(fp).strip()
+    assert [os.path.basename(fp)] == os.listdir(os.path.dirname(fp))
+
+
+def test_rotation_compresses_backups(tmpdir):
+    """ Backups may be compressed, in the background. """
+    fp = tmpdir.join("compressed.log").strpath
+    log = _rotating_logger(fp, "rotate-gzip", max_bytes=10, backup_count=3,
+                           compress="gzip")
+    for i in range(4):
+        log.info("message %d", i)
+    log.handlers[0].close()
+    for i in range(1, 4):
+        assert not os.path.exists("{}.{}".format(fp, i))
+        with gzip.open("{}.{}.gz".format(fp, i), "rt") as f:
+            assert "message {}".format(3 - i) == f.read().strip()
+
+
+def test_rotation_appends(tmpdir):
+    """ A rolling logfile is appended to rather than overwritten. """
+    fp = tmpdir.join("append.log").strpath
+    for msg in ["first", "second"]:
+        log = _rotating_logger(fp, "rotate-append", max_bytes=1000)
+        log.info(msg)
+        log.handlers[0].close()
+    assert ["first", "second"] == _read(fp).split()
+
+
+def test_invalid_compression(tmpdir):
+    """ Compression method must be one of the known ones. """
+    with pytest.raises(ValueError):
+        RotatingFileSink(tmpdir.join("bad.log").strpath, max_bytes=10,
+                         compress="not_a_method")
+
+
+def test_rotation_via_cli(parser, tmpdir):
+    """ Rotation may be configured from the command line. """
+    fp = tmpdir.join("cli.log").strpath
+    opts = add_logging_options(parser).parse_args(
+        ["--logmaxbytes", "100", "--logbackups", "3", "--logcompress", "gzip"])
+    h = logger_via_cli(opts, name="rotate-cli", logfile=fp).handlers[0]
+    assert isinstance(h, RotatingFileSink)
+    assert (100, 3, "gzip") == (h.max_bytes, h.backup_count, h.compress)
+    h.close()
+
+
+@pytest.mark.parametrize(
+    "cmdl",
+    [["--logcompress", "gzip"],
+     ["--logbackups", "3", "--logcompress", "gzip"]])
+def test_compression_without_rotation_warns(parser, tmpdir, cmdl):
+    """ Compression of backups is pointless unless the file rolls over. """
+    fp = tmpdir.join("unrotated.log").strpath
+    opts = add_logging_options(parser).parse_args(cmdl)
+    with pytest.warns(UserWarning, match="compress"):
+        log = logger_via_cli(opts, name="compress-unrotated", logfile=fp)
+    log.handlers[0].close()
+
+
+def _gunzip_partial(path):
+    """ Decompress what can be decompressed of a gzip file. """
+    with open(path, "rb") as f:
+        return zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(f.read())
+
+
+def test_compressed_logfile_by_suffix(tmpdir):
+    """ A logfile named with a compression extension is compressed. """
+    fp = tmpdir.join("run.log.gz").strpath
+    log = init_logger(name="sink-gzip", logfile=fp, fmt="%(message)s")
+    assert isinstance(log.handlers[0], CompressedFileHandler)
+    for i in range(1000):
+        log.info("repetitive message %d", i)
+    log.handlers[0].close()
+    with gzip.open(fp, "rt") as f:
+        lines = [l.rstrip() for l in f if l.startswith("repetitive")]
+    assert ["repetitive message {}".format(i) for i in range(1000)] == lines
+    assert os.path.getsize(fp) < 1000 * len("repetitive message 999\n") / 5
+
+
+def test_compressed_logfile_readable_before_close(tmpdir):
+    """ What's been flushed can be decompressed from an unfinished file. """
+    fp = tmpdir.join("partial.log.gz").strpath
+    hdlr = CompressedFileHandler(fp, flush_interval=60)
+    hdlr.setFormatter(logging.Formatter("%(message)s"))
+    hdlr.handle(logging.makeLogRecord(
+        {"msg": "first", "levelno": logging.INFO}))
+    hdlr.flush()
+    assert b"first\n" == _gunzip_partial(fp)
+    try:
+        hdlr.handle(logging.makeLogRecord(
+            {"msg": "failure", "levelno": logging.ERROR}))
+        deadline = time.time() + 5
+        while b"failure" not in _gunzip_partial(fp) and time.time() < deadline:
+            time.sleep(0.01)
+        assert b"first\nfailure\n" == _gunzip_partial(fp)
+    finally:
+        hdlr.close()
+
+
+def test_compressed_logfile_unencodable_text(tmpdir):
+    """ Text that can't be encoded neither stops nor holds up logging. """
+    fp = tmpdir.join("surrogate.log.gz").strpath
+    log = init_logger(name="sink-gzip-surrogate", logfile=fp,
+                      fmt="%(message)s")
+    log.info("bad \udcff surrogate")
+    for i in range(100):
+        log.info("after %d", i)
+    log.handlers[0].close()
+    with gzip.open(fp, "rt") as f:
+        lines = f.read().splitlines()
+    assert "bad \\udcff surrogate" == lines[0]
+    assert "after 99" == lines[-1]
+
+
+def test_compressed_logfile_stopped_writer(tmpdir):
+    """ Once the compressing thread's stopped, logging calls don't wait. """
+    fp = tmpdir.join("stopped.log.gz").strpath
+    hdlr = CompressedFileHandler(fp, queue_size=2)
+    hdlr._queue.put((sinks._CLOSE, None))
+    hdlr._writer.join()
+    for i in range(10):
+        hdlr.handle(logging.makeLogRecord(
+            {"msg": "dropped", "levelno": logging.ERROR}))
+    hdlr.flush()
+    hdlr.close()
+
+
+def test_compressed_logfile_rollover_rejected(tmpdir):
+    """ A compressed logfile can't also be rolled over. """
+    with pytest.raises(ValueError):
+        init_logger(name="sink-gzip-rotate", max_bytes=100,
+                    logfile=tmpdir.join("run.log.gz").strpath)
+
+
+def test_zstd_logfile(tmpdir):
+    """ A .zst logfile is compressed with zstd. """
+    zstandard = pytest.importorskip("zstandard")
+    fp = tmpdir.join("run.log.zst").strpath
+    log = init_logger(name="sink-zstd", logfile=fp, fmt="%(message)s")
+    log.info("compressed")
+    log.handlers[0].close()
+    with open(fp, "rb") as f:
+        text = zstandard.ZstdDecompressor().stream_reader(f).read()
+    assert text.decode().endswith("compressed\n")
+
+
+def test_loggers_share_logfile(tmpdir):
+    """ Loggers for one logfile share its stream, without truncating it. """
+    fp = tmpdir.join("shared.log").strpath
+    first = init_logger(name="shared-first", logfile=fp, fmt="%(message)s")
+    first.info("from first")
+    second = init_logger(name="shared-second",
+                         logfile=tmpdir.join("sub", "..", "shared.log").strpath,
+                         fmt="%(message)s")
+    second.info("from second")
+    h1, h2 = first.handlers[0], second.handlers[0]
+    assert isinstance(h1, SharedFileHandler)
+    assert h1.stream is h2.stream and h1.lock is h2.lock
+    h1.close()
+    assert not h2.stream.closed
+    second.info("after first closed")
+    h2.close()
+    assert h2.stream is None
+    assert os.path.realpath(fp) not in sinks._SHARED_FILES
+    assert "from first\nfrom second\nafter first closed\n" == _read(fp)
+
+
+def test_reconfigured_logger_truncates(tmpdir):
+    """ Configuring a logger anew releases its file, so starts it anew. """
+    fp = tmpdir.join("again.log").strpath
+    for msg in ["first", "second"]:
+        log = init_logger(name="truncated", logfile=fp, fmt="%(message)s")
+        log.info(msg)
+    log.handlers[0].close()
+    assert "second\n" == _read(fp)
+
+
+@pytest.mark.parametrize("sink", ["file", SINK_BUFFERED])
+def test_append_mode(tmpdir, sink):
+    """ A logfile may be appended to rather than started anew. """
+    fp = tmpdir.join("appended.log")
+    fp.write("earlier\n")
+    log = init_logger(name="appending", logfile=fp.strpath, sink=sink,
+                      fmt="%(message)s", logfile_mode="a")
+    log.info("later")
+    log.handlers[0].close()
+    assert "earlier\nlater\n" == fp.read()
+
+
+def test_invalid_logfile_mode(tmpdir):
+    """ Only truncating and appending are supported. """
+    with pytest.raises(ValueError):
+        init_logger(name="badmode", logfile=tmpdir.join("x.log").strpath,
+                    logfile_mode="r+")
+
+
+def test_bare_logfile_name(tmpdir):
+    """ A logfile without a folder goes in the working directory. """
+    with tmpdir.as_cwd():
+        log = init_logger(name="bare", logfile="bare.log")
+        log.handlers[0].close()
+    assert tmpdir.join("bare.log").exists()
+
+
+def test_logfile_folder_created(tmpdir):
+    """ A missing folder is created, and remembered. """
+    fp = tmpdir.join("a", "b", "nested.log").strpath
+    log = init_logger(name="nested", logfile=fp)
+    log.handlers[0].close()
+    assert os.path.isfile(fp)
+    assert os.path.dirname(fp) in sinks._KNOWN_FOLDERS
+
+
+def test_logfile_folder_created_again(tmpdir):
+    """ A folder that's been removed since it was created is made anew. """
+    fp = tmpdir.join("gone", "again.log").strpath
+    init_logger(name="regone", logfile=fp).handlers[0].close()
+    tmpdir.join("gone").remove()
+    log = init_logger(name="regone", logfile=fp)
+    log.handlers[0].close()
+    assert os.path.isfile(fp)
+
+
+@pytest.mark.parametrize(
+    ["first", "second"],
+    [({}, {"sink": "mmap"}),
+     ({"sink": "mmap"}, {}),
+     ({"sink": "mmap"}, {"sink": "mmap"}),
+     ({"sink": "binary"}, {"sink": SINK_BUFFERED}),
+     ({}, {"max_bytes": 100}),
+     ({"max_bytes": 100}, {"sink": "binary"})])
+def test_logfile_open_for_another_sink(tmpdir, first, second):
+    """ A logfile that one handler has to itself can't be opened again. """
+    fp = tmpdir.join("taken.log").strpath
+    log = init_logger(name="taken-first", logfile=fp, **first)
+    with pytest.raises(ValueError):
+        init_logger(name="taken-second", logfile=fp, **second)
+    log.handlers[0].close()
+    assert os.path.realpath(fp) not in sinks._SHARED_FILES
+    log = init_logger(name="taken-second", logfile=fp, **second)
+    log.handlers[0].close()
+
+
+def test_compressed_logfile_open_for_another_sink(tmpdir):
+    """ A compressed logfile is held by its handler alone. """
+    fp = tmpdir.join("taken.log.gz").strpath
+    log = init_logger(name="taken-gz", logfile=fp)
+    with pytest.raises(ValueError):
+        CompressedFileHandler(fp)
+    log.handlers[0].close()
+    assert os.path.realpath(fp) not in sinks._SHARED_FILES
+
+
+def test_mmap_sink(tmpdir):
+    """ Records are copied into a mapped file, cut to length when closed. """
+    fp = tmpdir.join("mapped.log").strpath
+    log = init_logger(name="mapped", logfile=fp, sink="mmap",
+                      fmt="%(message)s")
+    h = log.handlers[0]
+    assert isinstance(h, MmapFileHandler)
+    assert isinstance(h, logging.FileHandler)
+    for i in range(3):
+        log.info("récord %d", i)
+    h.flush()
+    with open(fp, "rb") as f:
+        assert DEFAULT_MAP_CHUNK_SIZE <= len(f.read())
+    h.close()
+    assert "récord 0\nrécord 1\nrécord 2\n" == \
+        open(fp, encoding="utf-8").read()
+    log.info("after closing")
+    assert 3 == len(_read(fp).splitlines())
+
+
+def test_mmap_sink_grows_and_appends(tmpdir):
+    """ The map's extended as need be, and may continue an existing file. """
+    fp = tmpdir.join("grown.log")
+    fp.write("earlier\n")
+    h = MmapFileHandler(fp.strpath, mode="a", chunk_size=64)
+    h.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(100):
+        h.handle(logging.makeLogRecord({"msg": "line {}".format(i)}))
+    h.close()
+    assert ["earlier"] + ["line {}".format(i) for i in range(100)] == \
+        fp.read().splitlines()
+
+
+def test_mmap_sink_maps_only_end(tmpdir):
+    """ As the file grows, only its end is mapped. """
+    fp = tmpdir.join("long.log")
+    h = MmapFileHandler(fp.strpath, chunk_size=1000)
+    h.setFormatter(logging.Formatter("%(message)s"))
+    lines = ["line {:06d}".format(i) for i in range(5000)]
+    for l in lines:
+        h.handle(logging.makeLogRecord({"msg": l}))
+        assert len(h._writer.map) < 1000 + 2 * mmap.ALLOCATIONGRANULARITY
+    h.close()
+    assert lines == fp.read().splitlines()
+
+
+def test_mmap_sink_appends_after_unclean_exit(tmpdir):
+    """ A file left with its mapped zeros is continued from its last text. """
+    fp = tmpdir.join("crashed.log").strpath
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = "import os; from logmuse import init_logger; " \
+        "log = init_logger(name='crashing', logfile={!r}, sink='mmap', " \
+        "fmt='%(message)s'); log.info('first run'); os._exit(0)".format(fp)
+    subprocess.check_call([sys.executable, "-c", code], cwd=root)
+    assert DEFAULT_MAP_CHUNK_SIZE <= os.path.getsize(fp)
+    log = init_logger(name="mapped-after-crash", logfile=fp, sink="mmap",
+                      fmt="%(message)s", logfile_mode="a")
+    log.info("second run")
+    log.handlers[0].close()
+    assert ["first run", "second run"] == \
+        [l for l in _read(fp).splitlines()
+         if not l.startswith("Configured logger")]
+
+
+def test_sink_via_cli(tmpdir):
+    """ The logfile's writer may be chosen on the command line. """
+    fp = tmpdir.join("cli.log").strpath
+    parser = add_logging_options(argparse.ArgumentParser())
+    assert "file" == parser.parse_args([]).logsink
+    opts = parser.parse_args(["--logsink", "mmap"])
+    log = logger_via_cli(opts, name="mapped-cli", logfile=fp)
+    assert isinstance(log.handlers[0], MmapFileHandler)
+    log.handlers[0].close()
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--logsink", "paper"])